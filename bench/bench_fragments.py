@@ -0,0 +1,61 @@
+"""
+Re-render de un CV tras editar una sola sección (la bio), con portafolios
+cada vez más grandes: página entera frente a Renderer.cache_fragments()
+(solo se renderiza el bloque de la sección que cambió).
+
+    PYTHONPATH=src python bench/bench_fragments.py --proyectos 10,100,1000 --ediciones 50
+
+Cada edición se parsea antes de medir (objetos nuevos, como en watch.py):
+solo cuenta el render. También se comprueba que el html sea el mismo.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from gen_cv import GenConfig, generate
+from parsers import rd_engine
+from render_engine import Renderer
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--proyectos", default="10,100,1000", help="tamaños de portafolio a probar")
+    ap.add_argument("--ediciones", type=int, default=50)
+    ap.add_argument("--template", default=str(ROOT / "templates" / "plantilla1.html"))
+    args = ap.parse_args()
+
+    plain, cached = Renderer(), Renderer()
+    cached.cache_fragments()
+    tpl_plain, tpl_cached = plain.template(args.template), cached.template(args.template)
+
+    print(f"{'proyectos':>10} {'página ms':>10} {'fragmentos ms':>14} {'x':>6}")
+    for n in (int(x) for x in args.proyectos.split(",")):
+        source = generate(GenConfig(cvs=1, proyectos=n, meritos=n // 10))
+        contexts = [
+            rd_engine.parse_source(source.replace("bio (", f"bio (Edición {n} {i} ", 1))[0].view()
+            for i in range(args.ediciones + 1)
+        ]
+        "".join(cached.generate(tpl_cached, contexts[0]))  # la versión anterior, ya en la caché
+
+        t0 = time.perf_counter()
+        a = ["".join(plain.generate(tpl_plain, c)) for c in contexts[1:]]
+        t1 = time.perf_counter()
+        b = ["".join(cached.generate(tpl_cached, c)) for c in contexts[1:]]
+        t2 = time.perf_counter()
+        if a != b:
+            sys.exit(f"[ERROR] html distinto con {n} proyectos")
+        page, frag = (t1 - t0) / args.ediciones * 1000, (t2 - t1) / args.ediciones * 1000
+        print(f"{n:>10} {page:>10.3f} {frag:>14.3f} {page / frag:>6.1f}")
+    f = cached.fragments
+    print(f"caché: {f.hits} aciertos, {f.misses} fallos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Memoria y velocidad del modelo de dominio con un corpus grande en memoria:
+dataclasses normales + to_dict() (asdict, copia profunda en cada render)
+frente a las clases con __slots__, cadenas internadas y view().
+
+    PYTHONPATH=src python bench/bench_model.py --n 100000
+
+Los CVs se construyen directamente con los valores que saldrían del visitor
+(sin parsear) para medir solo el modelo. Las cadenas se copian antes de
+construir cada objeto, como cuando salen de tokens distintos del lexer.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import MISSING, asdict, field, fields, make_dataclass
+import gc
+from pathlib import Path
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from datosPersonales import DatosPersonales
+from formacion import Formacion, FormacionItem
+from idiomas import Idiomas, Idioma
+from experiencia import Experiencia, ExperienciaItem
+from habilidades import Habilidades, Habilidad
+from portafolio import Portafolio, Proyecto, Merito
+
+_ORGS = [f"Empresa {n}" for n in "Norte Sur Levante Atlantica Digital Global Iberica Central".split()]
+_UNIS = [f"Universidad de {c}" for c in "Murcia Valencia Sevilla Madrid Granada Oviedo".split()]
+_IDIOMAS = "Ingles Frances Aleman Italiano Portugues".split()
+_NVI = ["A1", "A2", "B1", "B2", "C1", "C2", "nativo"]
+_NVH = ["bajo", "medio", "alto"]
+_SKILLS = "Python Java SQL Docker Linux Git Kotlin Rust Jinja Antlr Redis Postgres".split()
+_CATS = "Lenguajes Herramientas Datos Sistemas".split()
+
+
+def _fresh(s: str) -> str:
+    # Objeto str nuevo con el mismo contenido (como el texto de un token)
+    return s.encode("utf-8").decode("utf-8")
+
+
+def _plain(cls):
+    """Copia de una clase del modelo sin slots ni internado (el modelo de antes)."""
+    spec = []
+    for f in fields(cls):
+        if f.default is not MISSING:
+            spec.append((f.name, f.type, field(default=f.default)))
+        elif f.default_factory is not MISSING:
+            spec.append((f.name, f.type, field(default_factory=f.default_factory)))
+        else:
+            spec.append((f.name, f.type))
+    return make_dataclass(cls.__name__, spec)
+
+
+SLOTTED = dict(
+    DatosPersonales=DatosPersonales, Formacion=Formacion, FormacionItem=FormacionItem,
+    Idiomas=Idiomas, Idioma=Idioma, Experiencia=Experiencia, ExperienciaItem=ExperienciaItem,
+    Habilidades=Habilidades, Habilidad=Habilidad, Portafolio=Portafolio, Proyecto=Proyecto, Merito=Merito,
+)
+PLAIN = {name: _plain(cls) for name, cls in SLOTTED.items()}
+
+
+def build_cv(i: int, rnd: random.Random, C: Dict[str, type]) -> tuple:
+    f = _fresh
+    datos = C["DatosPersonales"](
+        nombre=f(f"Persona {i}"), foto=f(f"imagenes/p{i}.jpg"), fecha_nacimiento=f("01/02/1990"),
+        bio=f(f"Bio de la persona {i}"), email=f(f"p{i}@correo.es"), telefono=f("600000000"),
+        linkedin=f(f"linkedin.com/in/p{i}"), github=f(f"github.com/p{i}"), web=f(f"p{i}.dev"),
+    )
+    formacion = C["Formacion"](items=[
+        C["FormacionItem"](titulo=f("Grado en Informatica"), institucion=f(rnd.choice(_UNIS)), tipo="oficial",
+                           descripcion=f(f"Descripcion {i}"), fecha=f("01/06/2015")),
+        C["FormacionItem"](titulo=f("Curso de Docker"), institucion=f(rnd.choice(_ORGS)), tipo="complementaria",
+                           fecha=f("01/06/2018")),
+    ])
+    idiomas = C["Idiomas"](idiomas=[
+        C["Idioma"](nombre=f(n), nivel=f(rnd.choice(_NVI)), expedidor=f("Escuela Oficial de Idiomas"))
+        for n in rnd.sample(_IDIOMAS, 2)
+    ])
+    experiencia = C["Experiencia"](experiencias=[
+        C["ExperienciaItem"](tipo="laboral", organizacion=f(rnd.choice(_ORGS)), puesto=f("Desarrollador"),
+                             descripcion=f(f"Responsabilidades {i}-{k}"), horas=40)
+        for k in range(3)
+    ])
+    habilidades = C["Habilidades"](habilidades=[
+        C["Habilidad"](nombre=f(s), tipo="hard", categoria=f(rnd.choice(_CATS)), nivel=f(rnd.choice(_NVH)))
+        for s in rnd.sample(_SKILLS, 6)
+    ])
+    portafolio = C["Portafolio"](
+        proyectos=[
+            C["Proyecto"](nombre=f(f"Proyecto {i}-{k}"), descripcion=f(f"Descripcion {k}"), categoria=f("personal"),
+                          tecnologias=[f(t) for t in rnd.sample(_SKILLS, 3)], web=f(f"github.com/p{i}/{k}"))
+            for k in range(2)
+        ],
+        meritos=[C["Merito"](nombre=f("Premio"), descripcion=f(f"Merito {i}"))],
+    )
+    return datos, formacion, idiomas, experiencia, habilidades, portafolio
+
+
+def context_plain(cv: tuple) -> dict:
+    # Lo que hacía CVObjects.to_dict() con el modelo anterior
+    datos, formacion, idiomas, experiencia, habilidades, portafolio = cv
+    return {
+        "datos": asdict(datos),
+        "formacion": {"formacion": [asdict(x) for x in formacion.items]},
+        "idiomas": {"idiomas": [asdict(x) for x in idiomas.idiomas]},
+        "experiencia": {"experiencia": [asdict(x) for x in experiencia.experiencias]},
+        "habilidades": {"habilidades": [asdict(x) for x in habilidades.habilidades]},
+        "portafolio": {"proyectos": [asdict(x) for x in portafolio.proyectos],
+                       "meritos": [asdict(x) for x in portafolio.meritos]},
+    }
+
+
+def context_view(cv: tuple) -> dict:
+    datos, formacion, idiomas, experiencia, habilidades, portafolio = cv
+    return {
+        "datos": datos.view(), "formacion": formacion.view(), "idiomas": idiomas.view(),
+        "experiencia": experiencia.view(), "habilidades": habilidades.view(), "portafolio": portafolio.view(),
+    }
+
+
+def measure(classes: Dict[str, type], context: Callable[[tuple], dict], n: int, render_n: int,
+            template) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    rnd = random.Random(0)
+    t0 = time.perf_counter()
+    corpus = [build_cv(i, rnd, classes) for i in range(n)]
+    build_s = time.perf_counter() - t0  # incluye el coste de tracemalloc
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for cv in corpus:
+        context(cv)
+    ctx_s = time.perf_counter() - t0
+
+    res = {
+        "build_s": build_s,
+        "held_mb": held / 1e6,
+        "bytes_per_cv": held / n,
+        "context_s": ctx_s,
+        "context_per_s": n / ctx_s,
+    }
+    if template is not None and render_n:
+        t0 = time.perf_counter()
+        for cv in corpus[:render_n]:
+            template.render(**context(cv))
+        res["render_per_s"] = render_n / (time.perf_counter() - t0)
+    del corpus
+    return res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100_000, help="nº de CVs en memoria")
+    ap.add_argument("--render", type=int, default=5_000, help="nº de CVs a renderizar (0 = no renderizar)")
+    ap.add_argument("--template", default=str(ROOT / "templates" / "plantilla1.html"))
+    args = ap.parse_args()
+
+    template = None
+    if args.render:
+        from render_engine import get_renderer
+        template = get_renderer().template(args.template)
+
+    rows = [
+        ("dataclass + to_dict", measure(PLAIN, context_plain, args.n, args.render, template)),
+        ("slots + view", measure(SLOTTED, context_view, args.n, args.render, template)),
+    ]
+
+    print(f"{args.n} CVs en memoria, render de {args.render}")
+    print(f"{'modelo':<22} {'MB':>8} {'B/cv':>8} {'build s':>8} {'ctx/s':>10} {'render/s':>9}")
+    for name, r in rows:
+        print(
+            f"{name:<22} {r['held_mb']:>8.1f} {r['bytes_per_cv']:>8.0f} {r['build_s']:>8.2f} "
+            f"{r['context_per_s']:>10.0f} {r.get('render_per_s', 0):>9.0f}"
+        )
+    old, new = rows[0][1], rows[1][1]
+    print(f"memoria: {new['held_mb'] / old['held_mb'] * 100:.0f}% de la anterior; "
+          f"contexto: x{new['context_per_s'] / old['context_per_s']:.0f} más rápido")
+
+
+if __name__ == "__main__":
+    main()
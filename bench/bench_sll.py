@@ -0,0 +1,65 @@
+"""
+Benchmark: LL completo (por defecto) frente al parseo en dos fases SLL->LL
+sobre entradas válidas de tamaño creciente (N copias del cv de ejemplo).
+
+    PYTHONPATH=src:<carpeta con CVLangLexer.py> python bench/bench_sll.py
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from antlr4 import InputStream, CommonTokenStream
+
+from CVLangLexer import CVLangLexer
+from CVLangParser import CVLangParser
+
+from parsers.antlr_engine import parse_start
+
+SIZES = [1, 10, 50, 200]
+REPEAT = 5
+
+
+def _tokens(source: str) -> CommonTokenStream:
+    tokens = CommonTokenStream(CVLangLexer(InputStream(source)))
+    tokens.fill()  # el lexer no entra en la medida
+    return tokens
+
+
+def _ll(source: str) -> float:
+    tokens = _tokens(source)
+    parser = CVLangParser(tokens)
+    t0 = time.perf_counter()
+    parser.start()
+    return time.perf_counter() - t0
+
+
+def _two_stage(source: str) -> float:
+    tokens = _tokens(source)
+    parser = CVLangParser(tokens)
+    t0 = time.perf_counter()
+    parse_start(parser, tokens)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    cv = (ROOT / "entradas" / "entrada.txt").read_text(encoding="utf-8")
+
+    # Calentar la caché DFA compartida para comparar en régimen estable
+    _ll(cv)
+    _two_stage(cv)
+
+    print(f"{'cvs':>6} {'LL (ms)':>10} {'SLL->LL (ms)':>13} {'speedup':>8}")
+    for n in SIZES:
+        source = "\n".join([cv] * n)
+        ll = min(_ll(source) for _ in range(REPEAT))
+        two = min(_two_stage(source) for _ in range(REPEAT))
+        print(f"{n:>6} {ll * 1000:>10.2f} {two * 1000:>13.2f} {ll / two:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
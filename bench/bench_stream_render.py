@@ -0,0 +1,72 @@
+"""
+Memoria y tiempo del render de un CV a archivo, con portafolios cada vez más
+grandes: render() a un str + write_text() frente a render_to_file() (trozos
+de Template.generate() escritos a medida que salen).
+
+    PYTHONPATH=src python bench/bench_stream_render.py --proyectos 100,1000,10000
+
+El pico de memoria (tracemalloc) cuenta solo el render y la escritura; los
+CVObjects ya están construidos antes de empezar a medir.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from gen_cv import GenConfig, generate
+from parsers import rd_engine
+from render_engine import get_renderer
+
+
+def measure(fn: Callable[[], None]) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    secs = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"s": secs, "peak_mb": peak / 1e6}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--proyectos", default="100,1000,10000", help="tamaños de portafolio a probar")
+    ap.add_argument("--template", default=str(ROOT / "templates" / "plantilla1.html"))
+    args = ap.parse_args()
+
+    renderer = get_renderer()
+    renderer.template(args.template)  # compilada antes de medir
+
+    print(f"{'proyectos':>10} {'salida MB':>10} {'str pico MB':>12} {'str s':>7} {'stream pico MB':>15} {'stream s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "cv.html"
+        for n in (int(x) for x in args.proyectos.split(",")):
+            objs = rd_engine.parse_source(generate(GenConfig(cvs=1, proyectos=n, meritos=n // 10)))[0]
+            context = objs.view()
+
+            def whole() -> None:
+                html = renderer.render(args.template, **context)
+                out.write_text(html, encoding="utf-8")
+
+            def stream() -> None:
+                renderer.render_to_file(args.template, out, **context)
+
+            a = measure(whole)
+            b = measure(stream)
+            size_mb = out.stat().st_size / 1e6
+            print(f"{n:>10} {size_mb:>10.2f} {a['peak_mb']:>12.2f} {a['s']:>7.3f} {b['peak_mb']:>15.2f} {b['s']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Latencia del primer parseo ANTLR de un proceso: DFA en frío, calentadas con
+antlr_warmup.warm_up() y restauradas de disco con load_dfa(). Como las DFA
+son de la clase, cada medida se hace en un proceso nuevo; la mediana de
+--repeat procesos. "2º parseo" es la misma entrada otra vez (régimen estable).
+
+    PYTHONPATH=src:<carpeta con CVLangLexer.py> python bench/bench_warmup.py
+    PYTHONPATH=src:<carpeta con CVLangLexer.py> python bench/bench_warmup.py --input entradas/entrada.txt --repeat 9
+
+Sin DFA guardadas (build/antlr/dfa.pkl) la fila "restauradas" no aparece:
+python src/parsers/antlr_warmup.py --save
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+MODES = ("frío", "calentadas", "restauradas")
+
+
+def child(mode: str, input_path: str) -> None:
+    from antlr4 import CommonTokenStream, FileStream
+
+    from CVLangLexer import CVLangLexer
+    from CVLangParser import CVLangParser
+
+    from parsers import antlr_warmup
+    from parsers.antlr_engine import parse_start
+
+    t0 = time.perf_counter()
+    if mode == "restauradas":
+        if not antlr_warmup.load_dfa():
+            sys.exit(3)
+    elif mode == "calentadas":
+        antlr_warmup.warm_up()
+    prep = time.perf_counter() - t0
+
+    def parse() -> float:
+        t = time.perf_counter()
+        lexer = CVLangLexer(FileStream(input_path, encoding="utf-8"))
+        tokens = CommonTokenStream(lexer)
+        parser = CVLangParser(tokens)
+        parse_start(parser, tokens)
+        if parser.getNumberOfSyntaxErrors():
+            sys.exit(4)
+        return time.perf_counter() - t
+
+    first = parse()
+    second = parse()
+    print(json.dumps({"prep": prep, "first": first, "second": second, "states": antlr_warmup.dfa_states()}))
+
+
+def run(mode: str, input_path: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--input", input_path], capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        return {}
+    return json.loads(proc.stdout)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--input", help="Entrada a parsear (por defecto un cv generado con gen_cv.py)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.input)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = args.input
+        if input_path is None:
+            from gen_cv import GenConfig, generate
+
+            input_path = str(Path(tmp) / "cv.txt")
+            Path(input_path).write_text(generate(GenConfig(cvs=1, seed=7)), encoding="utf-8")
+
+        print(f"{'DFA':>12} {'preparar ms':>12} {'1er parseo ms':>14} {'2º parseo ms':>13} {'estados':>8}")
+        for mode in MODES:
+            runs = [r for r in (run(mode, input_path) for _ in range(args.repeat)) if r]
+            if not runs:
+                continue
+            med = {k: statistics.median(r[k] for r in runs) for k in ("prep", "first", "second", "states")}
+            print(
+                f"{mode:>12} {med['prep'] * 1000:>12.1f} {med['first'] * 1000:>14.1f} "
+                f"{med['second'] * 1000:>13.1f} {int(med['states']):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Control del arranque del CLI con `python -X importtime`: ejecuta el build de
+un solo CV (--out, como el workflow de Pages) y falla si
+
+  - se importa algún módulo que esa ruta no necesita (el runtime de ANTLR con
+    --engine rd, el pool de procesos, el servidor de --watch, cProfile...)
+  - la suma de tiempos de import pasa de --budget-ms
+
+También imprime los imports más caros y el tiempo de pared (mínimo de --runs).
+
+    PYTHONPATH=src python bench/check_startup.py --engine rd
+    PYTHONPATH=src:<carpeta con CVLangLexer.py> python bench/check_startup.py --engine antlr
+
+Los tiempos dependen de la máquina: --budget-ms es un tope holgado para
+detectar saltos (un import pesado nuevo en la ruta de arranque), no una medida.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que solo usan otras rutas del CLI (--out-dir, --input-dir, --watch, --profile)
+_FORBIDDEN_ALWAYS = [
+    "batch", "watch", "cv_stream", "concurrent.futures", "multiprocessing",
+    "http.server", "socketserver", "cProfile",
+]
+FORBIDDEN = {
+    "rd": _FORBIDDEN_ALWAYS + ["antlr4", "CVLangLexer", "CVLangParser", "CVLangVisitor", "cv_builder"],
+    "antlr": _FORBIDDEN_ALWAYS + ["parsers.rd_engine"],
+}
+BUDGET_MS = {"rd": 200.0, "antlr": 350.0}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(módulo, self µs, acumulado µs, profundidad) de cada línea de -X importtime."""
+    out = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            out.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return out
+
+
+def run_cli(engine: str, input_path: Path, template: Path, out: Path, importtime: bool) -> Tuple[float, str]:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += [
+        str(ROOT / "src" / "main.py"), "--input", str(input_path), "--template", str(template),
+        "--out", str(out), "--engine", engine, "--force", "--no-parse-cache",
+    ]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stdout + proc.stderr)
+        sys.exit(f"[ERROR] el CLI terminó con código {proc.returncode}")
+    return wall, proc.stderr
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--engine", choices=sorted(FORBIDDEN), default="rd")
+    ap.add_argument("--input", default=str(ROOT / "entradas" / "entrada.txt"))
+    ap.add_argument("--template", default=str(ROOT / "templates" / "plantilla1.html"))
+    ap.add_argument("--budget-ms", type=float, default=None, help="tope de la suma de imports (por defecto según engine)")
+    ap.add_argument("--runs", type=int, default=5, help="ejecuciones para el tiempo de pared")
+    ap.add_argument("--top", type=int, default=10, help="imports de primer nivel más caros a mostrar")
+    args = ap.parse_args()
+    budget = args.budget_ms if args.budget_ms is not None else BUDGET_MS[args.engine]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "index.html"
+        run_cli(args.engine, Path(args.input), Path(args.template), out, importtime=False)  # .pyc y cachés
+        walls = [run_cli(args.engine, Path(args.input), Path(args.template), out, False)[0] for _ in range(args.runs)]
+        _, stderr = run_cli(args.engine, Path(args.input), Path(args.template), out, importtime=True)
+
+    imports = parse_importtime(stderr)
+    total_ms = sum(self_us for _, self_us, _, _ in imports) / 1000
+    loaded: Dict[str, int] = {name: cum for name, _, cum, _ in imports}
+
+    print(f"engine={args.engine}  módulos={len(imports)}  imports={total_ms:.1f} ms (tope {budget:.0f})  "
+          f"pared min={min(walls) * 1000:.1f} ms")
+    top = sorted((x for x in imports if x[3] == 0), key=lambda x: -x[2])[: args.top]
+    for name, _, cum, _ in top:
+        print(f"  {cum / 1000:>8.1f} ms  {name}")
+
+    errors = [f"se importa {name} ({loaded[name] / 1000:.1f} ms)" for name in FORBIDDEN[args.engine] if name in loaded]
+    if total_ms > budget:
+        errors.append(f"imports {total_ms:.1f} ms > tope {budget:.0f} ms")
+    for e in errors:
+        print("REGRESIÓN", e)
+    if errors:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Generador de entradas CVLang sintéticas y válidas, de tamaño configurable.
+
+Sigue las reglas de gramatica/antlr/CVLang.g4 y de gramatica/flexcup: todos
+los campos que una de las dos gramáticas marca como obligatorios se generan
+siempre, y los valores de texto usan solo palabras separadas por un espacio
+(lo único que aceptan igual CONJPALYNUM en ANTLR y en JFlex).
+
+    python bench/gen_cv.py --cvs 100 --laboral 5 --proyectos 10 -o /tmp/cvs.txt
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from io import StringIO
+import random
+import sys
+from typing import List, TextIO
+
+# Palabras que no chocan con palabras clave ni con BOOL/NVI/NVH
+_WORDS = (
+    "analisis datos sistemas equipo proyecto cliente gestion desarrollo "
+    "aplicacion servicio diseno calidad soporte red seguridad plataforma "
+    "mantenimiento produccion ventas marketing logistica tecnica "
+    "documentacion integracion pruebas despliegue arquitectura usuario "
+    "interfaz rendimiento informe modelo proceso mejora control entorno"
+).split()
+_NOMBRES = "Ana Luis Marta Pedro Lucia Javier Elena Carlos Sara Pablo".split()
+_APELLIDOS = "Garcia Lopez Martin Sanchez Perez Gomez Ruiz Diaz Moreno Romero".split()
+_TECNOLOGIAS = "Python Java Docker Linux Postgres Redis Kotlin Rust Jinja Antlr".split()
+_NVI = ["A1", "A2", "B1", "B2", "C1", "C2", "nativo"]
+_NVH = ["bajo", "medio", "alto"]
+
+
+@dataclass
+class GenConfig:
+    cvs: int = 1
+    laboral: int = 2
+    voluntariado: int = 1
+    categorias: int = 2
+    habilidades_por_categoria: int = 3
+    idiomas: int = 2
+    proyectos: int = 2
+    meritos: int = 1
+    palabras: int = 8  # longitud de los textos libres (bio, descripciones...)
+    gvar: bool = False
+    seed: int = 0
+
+
+class _Gen:
+    def __init__(self, cfg: GenConfig) -> None:
+        self.cfg = cfg
+        self.rnd = random.Random(cfg.seed)
+
+    def text(self, n: int = 0) -> str:
+        n = n or self.cfg.palabras
+        words = [self.rnd.choice(_WORDS) for _ in range(max(2, n))]
+        words[0] = words[0].capitalize()
+        return " ".join(words)
+
+    def fecha(self) -> str:
+        return f"{self.rnd.randint(1, 28):02d}/{self.rnd.randint(1, 12):02d}/{self.rnd.randint(1970, 2025)}"
+
+    def cv(self, i: int, out: TextIO) -> None:
+        r, cfg = self.rnd, self.cfg
+        nombre = f"{r.choice(_NOMBRES)} {r.choice(_APELLIDOS)} {r.choice(_APELLIDOS)}"
+        user = nombre.split()[0].lower()
+        w = out.write
+
+        w(f'cv "{nombre} Numero {i}" {{\n')
+        w("  datospersonales {\n")
+        w(f"    nomyape ({nombre})\n")
+        w(f"    foto (imagenes/{user}.jpg)\n")
+        w(f"    fecha ({self.fecha()})\n")
+        w(f"    bio ({self.text()})\n")
+        w("    contacto {\n")
+        w(f"      email ({user}{i}@correo.es)\n")
+        w(f"      telefono (6{r.randint(0, 99999999):08d})\n")
+        w("      redes {\n")
+        w(f"        linkedin (linkedin.com/in/{user})\n")
+        w(f"        github (github.com/{user})\n")
+        w(f"        web ({user}.dev)\n")
+        w("      }\n    }\n  }\n")
+
+        w("  formacion {\n")
+        w("    oficial {\n")
+        w(f"      titulo ({self.text(4)})\n")
+        w(f'      expedidor ("Universidad de {r.choice(_APELLIDOS)}")\n')
+        w(f"      descripcion ({self.text()})\n")
+        w(f"      logros ({self.text()})\n")
+        w(f"      fecha ({self.fecha()})\n")
+        w("    }\n")
+        w("    complementaria {\n")
+        w(f"      titulo ({self.text(3)})\n")
+        w("      certificado (Si)\n")
+        w(f"      expedidor ({self.text(2)})\n")
+        w(f"      horas ({r.randint(10, 300)})\n")
+        w(f"      fecha ({self.fecha()})\n")
+        w("    }\n  }\n")
+
+        if cfg.idiomas:
+            w("  idiomas {\n")
+            for _ in range(cfg.idiomas):
+                w("    idioma {\n")
+                w(f"      nombre ({self.text(2)})\n")
+                w(f"      nivel ({r.choice(_NVI)})\n")
+                w(f"      expedidor ({self.text(2)})\n")
+                w("    }\n")
+            w("  }\n")
+
+        if cfg.laboral or cfg.voluntariado:
+            w("  experiencia {\n")
+            for _ in range(cfg.laboral):
+                w("    laboral {\n")
+                w(f"      puesto ({self.text(3)})\n")
+                w(f"      horas ({r.randint(5, 40)})\n")
+                w(f'      organizacion ("{self.text(2)}")\n')
+                w(f"      responsabilidades ({self.text()})\n")
+                w("    }\n")
+            for _ in range(cfg.voluntariado):
+                w("    voluntariado {\n")
+                w(f"      puesto ({self.text(3)})\n")
+                w(f"      descripcion ({self.text()})\n")
+                w(f"      horas ({r.randint(1, 20)})\n")
+                w(f"      organizacion ({self.text(2)})\n")
+                w("    }\n")
+            w("  }\n")
+
+        w("  habilidades {\n")
+        w("    soft {\n")
+        w("      " + ", ".join(f"habilidad ({self.text(2)})" for _ in range(3)) + "\n")
+        w("    }\n")
+        if cfg.categorias:
+            w("    hard {\n")
+            for _ in range(cfg.categorias):
+                w("      categoria {\n")
+                w(f"        nombre ({self.text(2)})\n")
+                pares = [
+                    f"habilidad ({self.text(2)}) nvhab ({r.choice(_NVH)})"
+                    for _ in range(max(1, cfg.habilidades_por_categoria))
+                ]
+                w("        " + ",\n        ".join(pares) + "\n")
+                w("      }\n")
+            w("    }\n")
+        w("  }\n")
+
+        if cfg.proyectos or cfg.meritos:
+            w("  portafolio {\n")
+            for _ in range(cfg.proyectos):
+                tec = " ".join(r.sample(_TECNOLOGIAS, 3))
+                w("    proyecto {\n")
+                w(f"      nombre ({self.text(3)})\n")
+                w(f"      descripcion ({self.text()})\n")
+                w(f"      tecnologias ({tec})\n")
+                w(f"      web (github.com/{user}/proyecto)\n")
+                w("    }\n")
+            for _ in range(cfg.meritos):
+                w("    meritos {\n")
+                w(f"      nombre ({self.text(3)})\n")
+                w(f"      descripcion ({self.text()})\n")
+                w("    }\n")
+            w("  }\n")
+
+        w("}\n")
+
+
+def write_cvs(cfg: GenConfig, out: TextIO) -> None:
+    gen = _Gen(cfg)
+    if cfg.gvar:
+        out.write('gvar {\n  "empresa" = Compramos tu coche;\n}\n')
+    for i in range(cfg.cvs):
+        gen.cv(i, out)
+
+
+def generate(cfg: GenConfig) -> str:
+    buf = StringIO()
+    write_cvs(cfg, buf)
+    return buf.getvalue()
+
+
+def add_config_args(ap: argparse.ArgumentParser) -> None:
+    for name, default in GenConfig().__dict__.items():
+        if isinstance(default, bool):
+            ap.add_argument(f"--{name}", action="store_true")
+        else:
+            ap.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=default)
+
+
+def config_from_args(args: argparse.Namespace) -> GenConfig:
+    return GenConfig(**{k: getattr(args, k) for k in GenConfig().__dict__})
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_config_args(ap)
+    ap.add_argument("-o", "--out", help="Archivo de salida (por defecto stdout)")
+    args = ap.parse_args(argv)
+    cfg = config_from_args(args)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            write_cvs(cfg, f)
+    else:
+        write_cvs(cfg, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Prueba de carga local de src/serve.py: N conexiones keep-alive en paralelo
+mandan --requests peticiones y se informa de latencias (p50/p90/p99/máx),
+rendimiento, códigos de estado y aciertos de la caché del servicio.
+
+    PYTHONPATH=src python bench/load_serve.py --engine rd --requests 2000 --concurrency 32
+    PYTHONPATH=src python bench/load_serve.py --url http://127.0.0.1:8080 --unique 0.5
+
+Sin --url arranca el servicio en un puerto libre y lo para al terminar.
+--unique es la fracción de peticiones con una fuente distinta (otro cv_id),
+que no pueden salir de la caché.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import os
+from pathlib import Path
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+_CV_ID = re.compile(r'cv\s+"([^"]*)"')
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def sources(text: str, n: int, unique: float) -> List[bytes]:
+    # Las únicas cambian el nombre del primer cv: "Antonio Lobato Numero 17"
+    every = round(1 / unique) if unique > 0 else 0
+    out = []
+    for i in range(n):
+        if every and i % every == 0:
+            out.append(_CV_ID.sub(lambda m: f'cv "{m.group(1)} Numero {i}"', text, count=1).encode("utf-8"))
+        else:
+            out.append(text.encode("utf-8"))
+    return out
+
+
+async def client(host: str, port: int, path: str, queue: "asyncio.Queue[bytes]", results: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            req = (
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+            t0 = time.perf_counter()
+            writer.write(req)
+            await writer.drain()
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            headers = {k.strip().lower(): v.strip() for k, _, v in (h.partition(":") for h in head[1:] if h)}
+            await reader.readexactly(int(headers.get("content-length", "0")))
+            results.append((int(head[0].split()[1]), time.perf_counter() - t0, headers.get("x-cache", "")))
+            if headers.get("connection") == "close":
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, path: str, bodies: List[bytes], concurrency: int) -> Tuple[list, float]:
+    queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+    for b in bodies:
+        queue.put_nowait(b)
+    results: List[Tuple[int, float, str]] = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(host, port, path, queue, results) for _ in range(concurrency)))
+    return results, time.perf_counter() - t0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(engine: str, jobs: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    cmd = [sys.executable, str(ROOT / "src" / "serve.py"), "--port", str(port), "--engine", engine]
+    if jobs:
+        cmd += ["--jobs", str(jobs)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, env=env)
+    line = proc.stdout.readline()  # "Sirviendo en ..." cuando los workers ya están calientes
+    if not line.startswith("Sirviendo"):
+        proc.kill()
+        sys.exit(f"[ERROR] el servicio no arrancó: {line.strip()}")
+    return proc
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="Servicio ya arrancado (por defecto se arranca uno)")
+    ap.add_argument("--engine", choices=["antlr", "rd"], default="antlr", help="Engine del servicio que se arranca")
+    ap.add_argument("--jobs", type=int, default=0, help="Workers del servicio que se arranca")
+    ap.add_argument("--input", default=str(ROOT / "entradas" / "entrada.txt"))
+    ap.add_argument("--template", default="plantilla1.html")
+    ap.add_argument("--parse", action="store_true", help="POST /parse en lugar de /render")
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--unique", type=float, default=0.1, help="Fracción de fuentes distintas (fallos de caché)")
+    args = ap.parse_args()
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        proc = spawn(args.engine, args.jobs, port)
+    path = "/parse" if args.parse else f"/render?template={args.template}"
+    bodies = sources(Path(args.input).read_text(encoding="utf-8"), args.requests, args.unique)
+
+    try:
+        results, secs = asyncio.run(run_load(host, port, path, bodies, args.concurrency))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    lat = [r[1] * 1000 for r in results]
+    status = Counter(r[0] for r in results)
+    cache = Counter(r[2] for r in results if r[2])
+    print(f"{len(results)} peticiones, {args.concurrency} conexiones, {secs:.2f} s -> {len(results) / secs:.1f} req/s")
+    print(
+        f"latencia ms: p50={percentile(lat, 50):.2f} p90={percentile(lat, 90):.2f} "
+        f"p99={percentile(lat, 99):.2f} máx={max(lat):.2f} media={statistics.fmean(lat):.2f}"
+    )
+    print("estados:", ", ".join(f"{k}={v}" for k, v in sorted(status.items())))
+    if cache:
+        print("caché:", ", ".join(f"{k}={v}" for k, v in sorted(cache.items())))
+
+
+if __name__ == "__main__":
+    main()
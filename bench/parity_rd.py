@@ -0,0 +1,226 @@
+"""
+Paridad entre el engine ANTLR y el escrito a mano (src/parsers/rd_engine.py).
+
+Para cada entrada se comparan los tokens (tipo y texto) y los CVObjects
+(to_dict() y cv_id) de los dos engines. Con entradas inválidas basta con
+que los dos las rechacen. Casos:
+
+  - entradas/*.txt
+  - corpus generados con gen_cv.py con configuraciones y semillas variadas
+  - casos a mano de la gramática que el generador no produce (lvar, grupo,
+    comentarios, IDENT, valores en varias líneas...)
+  - mutaciones aleatorias (borrar/insertar/duplicar trozos) de entradas
+    válidas: los dos engines tienen que aceptar o rechazar lo mismo
+
+    PYTHONPATH=src:<carpeta con CVLangLexer.py> python bench/parity_rd.py
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import sys
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+
+from CVLangLexer import CVLangLexer
+from CVLangParser import CVLangParser
+
+from cv_builder import BuildObjectsVisitor
+from gen_cv import GenConfig, generate
+from parsers.antlr_engine import parse_start
+from parsers import rd_engine
+
+_VALUE_TYPES = {"CONJPALYNUM", "IDENT", "RUTA", "MAIL", "TFNO", "NUM", "FECHA_NUM", "BOOL", "NVI", "NVH", "PAL"}
+
+
+class _Count(ErrorListener):
+    def __init__(self) -> None:
+        self.errors = 0
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors += 1
+
+
+def antlr_tokens(text: str) -> List[Tuple[str, str]]:
+    lexer = CVLangLexer(InputStream(text))
+    out = []
+    for t in lexer.getAllTokens():
+        name = CVLangLexer.symbolicNames[t.type]
+        if name not in _VALUE_TYPES:
+            name = CVLangLexer.literalNames[t.type].strip("'")  # palabra clave o símbolo
+        out.append((name, t.text))
+    return out
+
+
+def antlr_parse(text: str):
+    """(CVObjects, None) o (None, motivo del rechazo)."""
+    try:
+        lexer = CVLangLexer(InputStream(text))
+        lexer.removeErrorListeners()
+        tokens = CommonTokenStream(lexer)
+        parser = CVLangParser(tokens)
+        parser.removeErrorListeners()
+        errors = _Count()
+        parser.addErrorListener(errors)
+        tree = parse_start(parser, tokens)
+        if errors.errors:
+            return None, f"{errors.errors} error(es) sintáctico(s)"
+        return BuildObjectsVisitor().visit(tree), None
+    except Exception as e:
+        return None, str(e)
+
+
+def rd_parse(text: str):
+    try:
+        return rd_engine.parse_source(text), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def compare(name: str, text: str) -> Optional[str]:
+    """None si los dos engines coinciden; si no, la descripción de la diferencia."""
+    a, a_err = antlr_parse(text)
+    b, b_err = rd_parse(text)
+    if a is None and b is None:
+        return None
+    if a is None or b is None:
+        return f"{name}: ANTLR {'rechaza' if a is None else 'acepta'} ({a_err}), rd {'rechaza' if b is None else 'acepta'} ({b_err})"
+    ta = antlr_tokens(text)
+    tb = [(t[0], t[1]) for t in rd_engine.tokenize(text)[:-1]]
+    if ta != tb:
+        i = next((k for k, (x, y) in enumerate(zip(ta, tb)) if x != y), min(len(ta), len(tb)))
+        return f"{name}: tokens distintos en #{i}: {ta[i:i + 2]} vs {tb[i:i + 2]}"
+    da = [(o.cv_id, o.to_dict()) for o in a]
+    db = [(o.cv_id, o.to_dict()) for o in b]
+    if da != db:
+        return f"{name}: CVObjects distintos"
+    return None
+
+
+# Casos que gen_cv.py no genera
+_CV_MIN = """cv "Min" {
+  datospersonales {
+    nomyape (Ana)
+    fecha (01/01/2000)
+    contacto { email (a@b.es) telefono (600000000) redes { web (ana.dev) } }
+  }
+  formacion { oficial { titulo (Grado) expedidor ("Uni") fecha (01/01/2020) } }
+  %s
+}
+"""
+
+HAND_CASES = {
+    "minimo": _CV_MIN % "",
+    "lvar_gvar": 'gvar { "a" = uno; "b" = dos tres; }\n'
+    + _CV_MIN.replace('{\n  datospersonales', '{\n  lvar { "x" = y; }\n  datospersonales', 1) % "",
+    "comentarios": "/* cabecera { } */\n" + _CV_MIN % "/* vacío */",
+    "comentario_estrellas": "/* a **/ b */\n" + _CV_MIN % "",
+    "ident_y_multilinea": _CV_MIN.replace("nomyape (Ana)", 'nomyape ("Ana Maria")').replace(
+        "titulo (Grado)", "titulo (Grado en\n      Ingenieria, parte 2.)"
+    ) % "",
+    "acentos": _CV_MIN.replace("nomyape (Ana)", "nomyape (Ñandú Álvarez)") % "",
+    "solo_voluntariado": _CV_MIN
+    % "experiencia { voluntariado { puesto (Ayuda) descripcion (Comedor social) horas (3) organizacion (ONG) } }",
+    "solo_hard": _CV_MIN
+    % "habilidades { hard { categoria { nombre (Lenguajes) habilidad (Python) nvhab (alto), habilidad (C) nvhab (bajo) } } }",
+    "solo_meritos": _CV_MIN % "portafolio { meritos { nombre (Premio) descripcion (Primero) } }",
+    "grupo_y_comas": _CV_MIN
+    % """portafolio {
+    proyecto {
+      nombre (Web)
+      grupo { companero { nomyape (Luis) github (github.com/luis) } companero { nomyape (Eva) } }
+      descripcion (Una web)
+      tecnologias (Python, Jinja, Antlr)
+      web (github.com/web)
+    }
+  }""",
+    "complementaria_completa": _CV_MIN.replace(
+        "fecha (01/01/2020) } }",
+        "fecha (01/01/2020) } complementaria { titulo (Curso) certificado (No) expedidor (Academia) horas (20) fecha (02/02/2021) } }",
+    ) % "",
+    "redes_linkedin_github": _CV_MIN.replace("redes { web (ana.dev) }", "redes { linkedin (linkedin.com/in/ana) github (github.com/ana) }")
+    % "",
+    "palabras_clave_en_valor": _CV_MIN.replace("titulo (Grado)", "titulo (Grado en web y cv)") % "",
+    "numeros_en_valor": _CV_MIN.replace("titulo (Grado)", "titulo (Curso 2 de 10, nivel 0)") % "",
+    # inválidos: los dos deben rechazarlos
+    "mal_sin_fecha": _CV_MIN.replace("fecha (01/01/2000)", "") % "",
+    "mal_valor_una_palabra_clave": _CV_MIN.replace("nomyape (Ana)", "nomyape (web)") % "",
+    "mal_caracter": _CV_MIN.replace("Grado", "Grado #1") % "",
+    "mal_comentario_abierto": _CV_MIN % "/* sin cerrar",
+    "mal_comentario_no_abierto": _CV_MIN % "*/",
+    "mal_cero_delante": _CV_MIN.replace("titulo (Grado)", "titulo (Curso 05)") % "",
+    "mal_tfno_en_horas": _CV_MIN % "experiencia { laboral { puesto (Dev) horas (600000000) organizacion (X) } }",
+    "mal_vacio": "",
+    "mal_solo_gvar": 'gvar { "a" = b; }',
+}
+
+_MUTATION_CHARS = ['{', '}', '(', ')', ',', ';', '"', '/*', '*/', ' ', '\n', 'x', '1', '.', '@', '/', 'Si', 'web']
+
+
+def mutate(text: str, rnd: random.Random) -> str:
+    pos = rnd.randrange(len(text))
+    op = rnd.random()
+    if op < 0.4:
+        return text[:pos] + text[pos + rnd.randint(1, 8):]
+    if op < 0.8:
+        return text[:pos] + rnd.choice(_MUTATION_CHARS) + text[pos:]
+    end = min(len(text), pos + rnd.randint(1, 30))
+    return text[:end] + text[pos:end] + text[end:]
+
+
+def build_cases(seeds: int = 30, mutations: int = 300, seed: int = 0) -> List[Tuple[str, str]]:
+    """(nombre, texto) de todos los casos; también los usa tests/test_engines.py."""
+    rnd = random.Random(seed)
+    cases: List[Tuple[str, str]] = []
+    for p in sorted((ROOT / "entradas").glob("*.txt")):
+        cases.append((p.name, p.read_text(encoding="utf-8")))
+    for s in range(seeds):
+        cfg = GenConfig(
+            cvs=rnd.randint(1, 4),
+            laboral=rnd.randint(0, 3),
+            voluntariado=rnd.randint(0, 2),
+            categorias=rnd.randint(0, 3),
+            habilidades_por_categoria=rnd.randint(1, 4),
+            idiomas=rnd.randint(0, 3),
+            proyectos=rnd.randint(0, 3),
+            meritos=rnd.randint(0, 2),
+            palabras=rnd.randint(2, 12),
+            gvar=rnd.random() < 0.3,
+            seed=s,
+        )
+        cases.append((f"gen#{s}", generate(cfg)))
+    cases.extend(HAND_CASES.items())
+
+    valid = [text for _, text in cases if rd_parse(text)[0] is not None]
+    for k in range(mutations):
+        cases.append((f"mut#{k}", mutate(rnd.choice(valid), rnd)))
+    return cases
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seeds", type=int, default=30, help="corpus generados")
+    ap.add_argument("--mutations", type=int, default=300, help="mutaciones aleatorias")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    cases = build_cases(args.seeds, args.mutations, args.seed)
+    failures = [msg for name, text in cases if (msg := compare(name, text)) is not None]
+    accepted = sum(1 for _, text in cases if rd_parse(text)[0] is not None)
+    print(f"{len(cases)} casos ({accepted} válidos, {len(cases) - accepted} rechazados por los dos)")
+    for msg in failures:
+        print("DIFERENCIA", msg)
+    if failures:
+        sys.exit(1)
+    print("OK: los dos engines coinciden")
+
+
+if __name__ == "__main__":
+    main()
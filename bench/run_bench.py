@@ -0,0 +1,270 @@
+"""
+Suite de benchmarks: tiempos por fase (lexer, parser, visitor, render) para
+el engine ANTLR, el escrito a mano (rd) y el de Flex/CUP sobre entradas
+generadas con gen_cv.py.
+Los resultados se guardan en JSON para comparar entre commits.
+
+    PYTHONPATH=src:<carpeta con CVLangLexer.py> python bench/run_bench.py -o bench.json
+    ... (otro commit) ...
+    PYTHONPATH=... python bench/run_bench.py -o nuevo.json --compare bench.json
+
+El engine CUP necesita las clases compiladas como en el workflow
+(gramatica/flexcup/*.class y tools/java-cup.jar); si no están, se omite.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict
+import json
+import os
+import platform
+from pathlib import Path
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from gen_cv import GenConfig, add_config_args, config_from_args, generate
+
+# Tamaños por defecto: (nombre, nº de cvs)
+SIZES = [("s", 1), ("m", 20), ("l", 200)]
+
+
+def _stats(times: List[float]) -> Dict[str, float]:
+    return {
+        "min_ms": round(min(times) * 1000, 4),
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "runs": len(times),
+    }
+
+
+def _timeit(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()  # calentamiento
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return _stats(times)
+
+
+# ---------- ANTLR ----------
+def bench_antlr(source: str, template: Path, repeat: int) -> Dict[str, object]:
+    from antlr4 import InputStream, CommonTokenStream
+
+    from CVLangLexer import CVLangLexer
+    from CVLangParser import CVLangParser
+
+    from cv_builder import BuildObjectsVisitor
+    from parsers.antlr_engine import parse_start
+    from render_engine import get_renderer
+
+    def lex():
+        tokens = CommonTokenStream(CVLangLexer(InputStream(source)))
+        tokens.fill()
+        return tokens
+
+    tokens = lex()
+    n_tokens = len(tokens.tokens)
+
+    def parse():
+        tokens.seek(0)
+        parser = CVLangParser(tokens)
+        return parse_start(parser, tokens)
+
+    tree = parse()
+
+    def visit():
+        return BuildObjectsVisitor().visit(tree)
+
+    cvs = visit()
+    tpl = get_renderer().template(template)
+
+    def render():
+        return [tpl.render(**o.view()) for o in cvs]
+
+    return {
+        "tokens": n_tokens,
+        "phases": {
+            "lex": _timeit(lex, repeat),
+            "parse": _timeit(parse, repeat),
+            "visit": _timeit(visit, repeat),
+            "render": _timeit(render, repeat),
+        },
+    }
+
+
+# ---------- descendente recursivo ----------
+def bench_rd(source: str, template: Path, repeat: int) -> Dict[str, object]:
+    from parsers import rd_engine
+    from render_engine import get_renderer
+
+    tokens = rd_engine.tokenize(source)
+    cvs = rd_engine.parse_tokens(tokens)
+    tpl = get_renderer().template(template)
+
+    def render():
+        return [tpl.render(**o.view()) for o in cvs]
+
+    return {
+        "tokens": len(tokens),
+        "phases": {
+            "lex": _timeit(lambda: rd_engine.tokenize(source), repeat),
+            # parse construye los objetos directamente (equivale a parse + visit)
+            "parse": _timeit(lambda: rd_engine.parse_tokens(tokens), repeat),
+            "render": _timeit(render, repeat),
+        },
+    }
+
+
+# ---------- Flex/CUP ----------
+def _cup_classpath() -> Optional[str]:
+    cls = ROOT / "gramatica" / "flexcup" / "parser.class"
+    jar = ROOT / "tools" / "java-cup.jar"
+    if shutil.which("java") is None or not cls.exists() or not jar.exists():
+        return None
+    return os.pathsep.join([str(cls.parent), str(jar)])
+
+
+def bench_cup(path: Path, template: Path, repeat: int) -> Dict[str, object]:
+    from render_engine import get_renderer
+
+    cp = _cup_classpath()
+    if cp is None:
+        return {"skipped": "java o las clases de Flex/CUP no están disponibles"}
+
+    # Lexer y parser medidos dentro de la JVM (sin arranque)
+    proc = subprocess.run(
+        ["java", "-cp", cp, "parser", "--bench", str(path), str(repeat)],
+        capture_output=True, text=True, check=True,
+    )
+    inner = json.loads(proc.stdout)
+
+    # Proceso completo como lo usa el workflow (arranque de JVM incluido)
+    out = {}
+
+    def run_once():
+        out["stdout"] = subprocess.run(
+            ["java", "-cp", cp, "parser", str(path)], capture_output=True, text=True, check=True
+        ).stdout
+
+    process = _timeit(run_once, max(1, repeat // 2))
+    data = json.loads(out["stdout"])
+    tpl = get_renderer().template(template)
+
+    return {
+        "tokens": inner["tokens"],
+        "phases": {
+            "lex": {"min_ms": inner["lex_ms"], "runs": repeat},
+            # parse en CUP incluye las acciones semánticas (equivale a parse + visit)
+            "parse": {"min_ms": round(inner["parse_ms"] - inner["lex_ms"], 4), "runs": repeat},
+            "process": process,
+            "json_decode": _timeit(lambda: json.loads(out["stdout"]), repeat),
+            "render": _timeit(lambda: tpl.render(**data), repeat),
+        },
+    }
+
+
+# ---------- comparación ----------
+def compare(new: Dict, old: Dict, threshold: float) -> bool:
+    """Imprime la variación por fase; False si alguna empeora más de threshold %."""
+    ok = True
+    print(f"\n{'caso':<14} {'fase':<12} {'antes ms':>10} {'ahora ms':>10} {'cambio':>8}")
+    for case, engines in new["results"].items():
+        for engine, res in engines.items():
+            old_res = old.get("results", {}).get(case, {}).get(engine, {})
+            for phase, st in res.get("phases", {}).items():
+                prev = old_res.get("phases", {}).get(phase)
+                if not prev or not prev.get("min_ms"):
+                    continue
+                delta = (st["min_ms"] - prev["min_ms"]) / prev["min_ms"] * 100
+                flag = " !" if delta > threshold else ""
+                ok = ok and not flag
+                print(
+                    f"{case + '/' + engine:<14} {phase:<12} {prev['min_ms']:>10.3f} "
+                    f"{st['min_ms']:>10.3f} {delta:>+7.1f}%{flag}"
+                )
+    return ok
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_config_args(ap)
+    ap.add_argument("--sizes", default=",".join(f"{n}={c}" for n, c in SIZES), help="nombre=nºcvs,... (ej: s=1,l=500)")
+    ap.add_argument("--engines", default="antlr,rd,cup")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--template", default=str(ROOT / "templates" / "plantilla1.html"))
+    ap.add_argument("-o", "--out", default="bench_results.json", help="JSON de resultados")
+    ap.add_argument("--compare", help="JSON de una ejecución anterior para comparar")
+    ap.add_argument("--threshold", type=float, default=10.0, help="%% de empeoramiento que se considera regresión")
+    args = ap.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    base_cfg = config_from_args(args)
+    results: Dict[str, Dict] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for item in args.sizes.split(","):
+            name, n = item.split("=")
+            cfg = GenConfig(**{**asdict(base_cfg), "cvs": int(n)})
+            source = generate(cfg)
+            path = Path(tmp) / f"{name}.txt"
+            path.write_text(source, encoding="utf-8")
+
+            case = {}
+            if "antlr" in engines:
+                case["antlr"] = bench_antlr(source, Path(args.template), args.repeat)
+            if "rd" in engines:
+                case["rd"] = bench_rd(source, Path(args.template), args.repeat)
+            if "cup" in engines:
+                case["cup"] = bench_cup(path, Path(args.template), args.repeat)
+            for res in case.values():
+                res["bytes"] = len(source.encode("utf-8"))
+                res["cvs"] = cfg.cvs
+            results[name] = case
+
+            for engine, res in case.items():
+                if "skipped" in res:
+                    print(f"{name:<4} {engine:<6} omitido: {res['skipped']}")
+                    continue
+                phases = "  ".join(f"{p}={st['min_ms']:.2f}ms" for p, st in res["phases"].items())
+                print(f"{name:<4} {engine:<6} cvs={cfg.cvs:<5} tokens={res['tokens']:<7} {phases}")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "config": asdict(base_cfg),
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=1), encoding="utf-8")
+    print(f"\nResultados -> {args.out}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if not compare(report, old, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
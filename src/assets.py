@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+from dataclasses import is_dataclass, replace
+import hashlib
+import os
+from pathlib import Path
+import re
+import shutil
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from build_cache import PROJECT_ROOT, file_hash
+
+try:
+    from PIL import Image, ImageOps
+    from PIL import __version__ as PIL_VERSION
+except ImportError:  # sin Pillow las imágenes se copian tal cual (solo con huella)
+    Image = ImageOps = None
+    PIL_VERSION = "-"
+
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "build" / "assets"
+
+_VERSION = "1"  # cambia si cambia el procesado: invalida la caché y las claves de build
+_DENSITY = 2  # píxeles por px CSS (pantallas de alta densidad)
+_QUALITY = 82
+_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+_IMAGE_DIRS = ("imagenes", "img", "assets")  # las que copia el workflow de Pages
+_STYLES = "styles.css"
+
+
+# ---------- plantilla: tamaño de la foto y qué elementos usa ----------
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.I)
+_WIDTH = re.compile(r"\bwidth\s*=\s*[\"']?(\d+)", re.I)
+_HEIGHT = re.compile(r"\bheight\s*=\s*[\"']?(\d+)", re.I)
+_TAG_NAME = re.compile(r"<([a-zA-Z][a-zA-Z0-9-]*)")
+_CLASS_ATTR = re.compile(r"\bclass\s*=\s*[\"']([^\"']*)[\"']", re.I)
+_ID_ATTR = re.compile(r"\bid\s*=\s*[\"']([^\"']*)[\"']", re.I)
+_STYLES_LINK = re.compile(
+    r"<link\b(?=[^>]*\brel\s*=\s*[\"']?stylesheet)[^>]*\bhref\s*=\s*[\"']" + re.escape(_STYLES) + r"[\"'][^>]*>",
+    re.I,
+)
+
+
+def display_size(template_source: str, field: str = "datos.foto") -> Tuple[Optional[int], Optional[int]]:
+    """(ancho, alto) en px CSS del <img> de la plantilla que muestra `field`."""
+    for tag in _IMG_TAG.findall(template_source):
+        if field in tag:
+            w, h = _WIDTH.search(tag), _HEIGHT.search(tag)
+            return (int(w.group(1)) if w else None, int(h.group(1)) if h else None)
+    return None, None
+
+
+class PageFeatures:
+    """
+    Etiquetas, clases e ids que pueden aparecer en las páginas de una plantilla.
+    Si una clase o id sale de una expresión de Jinja no se puede saber cuál es:
+    entonces cualquier clase (o id) se considera posible.
+    """
+
+    def __init__(self, template_source: str) -> None:
+        self.tags: Set[str] = {t.lower() for t in _TAG_NAME.findall(template_source)} | {"html", "head", "body"}
+        self.classes: Set[str] = set()
+        self.ids: Set[str] = set()
+        self.any_class = self.any_id = False
+        for value in _CLASS_ATTR.findall(template_source):
+            self.any_class |= "{" in value
+            self.classes.update(value.split())
+        for value in _ID_ATTR.findall(template_source):
+            self.any_id |= "{" in value
+            self.ids.update(value.split())
+
+
+# ---------- CSS crítico ----------
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_PRELUDE_END = re.compile(r"[{;]")
+_COMBINATOR = re.compile(r"\s*[>+~]\s*|\s+")
+_PSEUDO = re.compile(r"::?[\w-]+(?:\([^)]*\))?")
+_ATTR_SEL = re.compile(r"\[[^\]]*\]")
+_SEL_TAG = re.compile(r"^(\*|[a-zA-Z][\w-]*)")
+_SEL_CLASS = re.compile(r"\.([\w-]+)")
+_SEL_ID = re.compile(r"#([\w-]+)")
+
+
+def _block_end(css: str, start: int) -> int:
+    # Índice de la } que cierra el bloque abierto justo antes de start
+    depth, i, quote = 1, start, None
+    while i < len(css):
+        c = css[i]
+        if quote:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css)
+
+
+def css_rules(css: str) -> List[Tuple[str, Optional[str]]]:
+    """(prelude, cuerpo) de cada regla de primer nivel; cuerpo None en @reglas sin bloque."""
+    css = _CSS_COMMENT.sub("", css)
+    out: List[Tuple[str, Optional[str]]] = []
+    i = 0
+    while True:
+        m = _PRELUDE_END.search(css, i)
+        if m is None:
+            break
+        prelude = css[i:m.start()].strip()
+        if m.group() == ";":
+            out.append((prelude, None))
+            i = m.end()
+            continue
+        end = _block_end(css, m.end())
+        out.append((prelude, css[m.end():end]))
+        i = end + 1
+    return out
+
+
+def _minify_block(body: str) -> str:
+    body = re.sub(r"\s+", " ", body)
+    body = re.sub(r"\s*([;{}:,])\s*", r"\1", body).strip()
+    return body.rstrip(";")
+
+
+def selector_may_match(selector: str, feats: PageFeatures) -> bool:
+    # Conservador: pseudo-clases y atributos no se evalúan (pueden cumplirse)
+    selector = _ATTR_SEL.sub("", _PSEUDO.sub("", selector))
+    for compound in _COMBINATOR.split(selector.strip()):
+        if not compound:
+            continue
+        tag = _SEL_TAG.match(compound)
+        if tag and tag.group(1) != "*" and tag.group(1).lower() not in feats.tags:
+            return False
+        if not feats.any_class and not set(_SEL_CLASS.findall(compound)) <= feats.classes:
+            return False
+        if not feats.any_id and not set(_SEL_ID.findall(compound)) <= feats.ids:
+            return False
+    return True
+
+
+def critical_css(css: str, feats: PageFeatures) -> str:
+    """
+    Las reglas de css que pueden aplicarse a algún elemento de la plantilla
+    (minificadas). El resto de la hoja no afecta al primer render y llega
+    después con la hoja completa.
+    """
+    out: List[str] = []
+    for prelude, body in css_rules(css):
+        if body is None:
+            continue  # @import/@charset: se quedan en la hoja completa
+        if prelude.startswith("@"):
+            at = prelude.split()[0].lower()
+            if at in ("@media", "@supports"):
+                inner = critical_css(body, feats)
+                if inner:
+                    out.append(f"{' '.join(prelude.split())}{{{inner}}}")
+            continue
+        selectors = [s.strip() for s in prelude.split(",") if s.strip() and selector_may_match(s, feats)]
+        if selectors:
+            out.append(f"{','.join(selectors)}{{{_minify_block(body)}}}")
+    return "".join(out)
+
+
+# ---------- pipeline ----------
+def _is_local(src: str) -> bool:
+    return bool(src) and "://" not in src and not src.startswith(("/", "data:", "//"))
+
+
+def _atomic_copy(src: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def _fingerprinted(rel: Path, digest: str) -> Path:
+    # imagenes/foto.jpg -> imagenes/foto.<hash>.jpg
+    return rel.with_name(f"{rel.stem}.{digest[:10]}{rel.suffix}")
+
+
+class AssetPipeline:
+    """
+    Etapa de assets de una build, sin red:
+
+      - la foto de cada CV (datos.foto) se redimensiona al tamaño con el que
+        la muestra la plantilla (x2 para pantallas de alta densidad) y se
+        recodifica; sin Pillow se copia tal cual
+      - styles.css y las imágenes se publican con el hash del contenido en el
+        nombre (styles.<hash>.css), que se puede cachear sin caducidad
+      - en el <head> el <link> a styles.css se sustituye por el CSS crítico
+        en línea más la hoja completa cargada sin bloquear el render
+
+    Las imágenes procesadas se guardan en cache_dir por contenido de origen y
+    parámetros: una foto que no cambió no se vuelve a procesar. El objeto se
+    prepara una vez por build y se pasa tal cual (pickle) a los workers.
+    """
+
+    def __init__(
+        self,
+        template_path: Path,
+        site_dir: Path,
+        root: Path = PROJECT_ROOT,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+    ) -> None:
+        self.site_dir = Path(site_dir)
+        self.root = Path(root).resolve()
+        self.cache_dir = Path(cache_dir)
+        source = Path(template_path).read_text(encoding="utf-8")
+        self.photo_size = display_size(source)
+        self._urls: Dict[str, str] = {}
+        self._warned: Set[str] = set()
+
+        self.styles_url: Optional[str] = None
+        self.head_html = ""
+        styles = self.root / _STYLES
+        if styles.is_file() and _STYLES_LINK.search(source):
+            css = styles.read_text(encoding="utf-8")
+            rel = _fingerprinted(Path(_STYLES), file_hash(styles))
+            if not (self.site_dir / rel).exists():
+                _atomic_copy(styles, self.site_dir / rel)
+            self.styles_url = rel.as_posix()
+            self.head_html = (
+                f"<style>{critical_css(css, PageFeatures(source))}</style>"
+                f'<link rel="preload" href="{self.styles_url}" as="style" '
+                f"onload=\"this.onload=null;this.rel='stylesheet'\">"
+                f'<noscript><link rel="stylesheet" href="{self.styles_url}"></noscript>'
+            )
+
+    def signature(self) -> str:
+        """
+        Parte de la clave de build: parámetros del procesado y estado de las
+        carpetas de imágenes (nombre, tamaño, mtime), para reconstruir si una
+        foto cambia aunque la entrada no.
+        """
+        h = hashlib.sha256(f"{_VERSION}|{PIL_VERSION}|{self.photo_size}|{self.styles_url}".encode())
+        for d in _IMAGE_DIRS:
+            base = self.root / d
+            if not base.is_dir():
+                continue
+            for dirpath, _, files in sorted(os.walk(base)):
+                for name in sorted(files):
+                    st = os.stat(os.path.join(dirpath, name))
+                    h.update(f"{dirpath}/{name}|{st.st_size}|{st.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    def _warn(self, msg: str) -> None:
+        if msg not in self._warned:
+            self._warned.add(msg)
+            print(f"[assets] {msg}", file=sys.stderr)
+
+    def _target(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        w, h = self.photo_size
+        if w:
+            tw = w * _DENSITY
+            return (tw, max(1, round(height * tw / width))) if width > tw else None
+        if h:
+            th = h * _DENSITY
+            return (max(1, round(width * th / height)), th) if height > th else None
+        return None
+
+    def _process(self, src: Path, dest: Path) -> None:
+        fmt = _FORMATS.get(src.suffix.lower())
+        if Image is None or fmt is None:
+            _atomic_copy(src, dest)
+            return
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        with Image.open(src) as im:
+            im = ImageOps.exif_transpose(im)
+            size = self._target(im.width, im.height)
+            if size is not None:
+                im = im.resize(size, Image.LANCZOS)
+            if fmt == "JPEG":
+                im.convert("RGB").save(tmp, fmt, quality=_QUALITY, optimize=True, progressive=True)
+            elif fmt == "PNG":
+                im.save(tmp, fmt, optimize=True)
+            else:
+                im.save(tmp, fmt, quality=_QUALITY)
+        # Sin redimensionar, recodificar puede salir más grande que el original
+        if size is None and tmp.stat().st_size >= src.stat().st_size:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+
+    def image_url(self, src: str) -> str:
+        """URL (relativa al sitio) de la versión procesada y con huella de src."""
+        url = self._urls.get(src)
+        if url is not None:
+            return url
+        url = src
+        path = (self.root / src).resolve() if _is_local(src) else None
+        if path is None:
+            pass  # URL externa o absoluta: se deja como está
+        elif not path.is_relative_to(self.root) or not path.is_file():
+            self._warn(f"la imagen {src} no existe dentro del proyecto (se deja el enlace tal cual)")
+        else:
+            key = hashlib.sha256(
+                f"{_VERSION}|{PIL_VERSION}|{self.photo_size}|{file_hash(path)}".encode()
+            ).hexdigest()
+            cached = self.cache_dir / "img" / key[:2] / f"{key}{path.suffix.lower()}"
+            if not cached.exists():
+                self._process(path, cached)
+            rel = _fingerprinted(Path(src), file_hash(cached)).with_suffix(path.suffix.lower())
+            dest = self.site_dir / rel
+            if not dest.exists():
+                _atomic_copy(cached, dest)
+            url = rel.as_posix()
+        self._urls[src] = url
+        return url
+
+    def page_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """El contexto de render con la foto apuntando a la imagen procesada."""
+        datos = context.get("datos")
+        foto = datos.get("foto") if isinstance(datos, dict) else getattr(datos, "foto", None)
+        if not foto:
+            return context
+        url = self.image_url(foto)
+        if url == foto:
+            return context
+        # Copia superficial: los CVObjects (y la caché de parseo) no se tocan
+        if isinstance(datos, dict):
+            datos = {**datos, "foto": url}
+        elif is_dataclass(datos):
+            datos = replace(datos, foto=url)
+        return {**context, "datos": datos}
+
+    def rewrite_page(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Sustituye el <link> a styles.css del <head>; el resto pasa sin tocar."""
+        it = iter(chunks)
+        if not self.head_html:
+            yield from it
+            return
+        head = self.head_html
+        for chunk in it:
+            new, n = _STYLES_LINK.subn(lambda _: head, chunk, count=1)
+            yield new
+            if n or "</head>" in chunk:
+                break
+        yield from it
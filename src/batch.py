@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import re
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from cv_model import CVObjects
+from build_cache import PROJECT_ROOT, BuildManifest, build_key, stage_signature
+from parse_cache import ParseCache, parse_key
+from render_engine import cv_context, get_renderer, write_chunks
+
+if TYPE_CHECKING:
+    from assets import AssetPipeline
+    from html_output import OutputStage
+
+
+# ---------- estado de cada proceso del pool ----------
+# Se crea una vez por worker (initializer) y se reutiliza entre archivos:
+# lexer/parser (y sus cachés DFA ya calientes) y la plantilla compilada.
+# El runtime de ANTLR solo se importa si el engine es antlr (el lexer/parser
+# del proceso es parsers/antlr_engine.shared_parser); con flexcup cada proceso
+# tiene su JVM con el parser de CUP (parsers/flexcup_pool.shared_pool).
+_TEMPLATE = None
+_PARSE_CACHE: Optional[ParseCache] = None
+_ENGINE = "antlr"
+_ASSETS: Optional[AssetPipeline] = None
+_OUTPUT: Optional[OutputStage] = None
+
+
+def _init_worker(
+    template_path: str,
+    parse_cache: Optional[ParseCache] = None,
+    engine: Optional[str] = None,
+    assets: Optional[AssetPipeline] = None,
+    output: Optional[OutputStage] = None,
+    restore_dfa: bool = False,
+) -> None:
+    # engine=None: el worker solo renderiza (render_all), no hace falta parser
+    global _TEMPLATE, _PARSE_CACHE, _ENGINE, _ASSETS, _OUTPUT
+    _TEMPLATE = get_renderer().template(template_path)
+    if engine == "antlr":
+        from parsers.antlr_engine import shared_parser
+
+        shared_parser()
+    if engine == "antlr" and restore_dfa:
+        from parsers.antlr_warmup import restore
+
+        # DFA guardadas con antlr_warmup.py --save, si las hay
+        restore()
+    if engine == "flexcup":
+        from parsers.flexcup_pool import shared_pool
+
+        shared_pool()
+    _PARSE_CACHE = parse_cache
+    _ENGINE = engine or "antlr"
+    _ASSETS = assets
+    _OUTPUT = output
+
+
+def _parse_file(input_path: str) -> List[CVObjects]:
+    # Misma entrada ya parseada (p. ej. otra plantilla): no hace falta el parser
+    key = None
+    if _PARSE_CACHE is not None:
+        key = parse_key(Path(input_path), _ENGINE)
+        cvs = _PARSE_CACHE.get(key)
+        if cvs is not None:
+            return cvs
+
+    if _ENGINE == "rd":
+        from parsers import rd_engine
+
+        cvs = rd_engine.parse_file(input_path)
+        if key is not None:
+            _PARSE_CACHE.put(key, cvs)
+        return cvs
+
+    if _ENGINE == "flexcup":
+        from parsers.flexcup_engine import parse_with_flexcup
+        from parsers.flexcup_pool import shared_pool
+
+        # El JSON de CUP ya es el contexto de la plantilla; un solo cv por archivo
+        cvs = [parse_with_flexcup(Path(input_path), PROJECT_ROOT, pool=shared_pool())]
+        if key is not None:
+            _PARSE_CACHE.put(key, cvs)
+        return cvs
+
+    from parsers.antlr_engine import parse_file
+
+    # El lexer/parser del worker: solo se cambia la entrada
+    cvs = parse_file(input_path)
+    if key is not None:
+        _PARSE_CACHE.put(key, cvs)
+    return cvs
+
+
+def _write(objs: CVObjects, out_path: Path) -> int:
+    # La página sale por trozos al archivo (escritura atómica), minificada y
+    # comprimida en el mismo pase si hay _OUTPUT; devuelve los bytes del .html
+    renderer = get_renderer()
+    if _ASSETS is None:
+        chunks = renderer.generate(_TEMPLATE, cv_context(objs))
+    else:
+        chunks = _ASSETS.rewrite_page(renderer.generate(_TEMPLATE, _ASSETS.page_context(cv_context(objs))))
+    written = write_chunks(chunks, out_path, output=_OUTPUT)
+    if written == 0:
+        raise ValueError(f"{out_path} está vacío")
+    return written
+
+
+# ---------- nombres de salida ----------
+def cv_filename(cv_id: str) -> str:
+    # "Antonio Lobato" -> "Antonio_Lobato.html"
+    slug = re.sub(r"[^\w.-]+", "_", cv_id.strip(), flags=re.UNICODE).strip("._")
+    return (slug or "cv") + ".html"
+
+
+def unique_names(names: List[str], used: Optional[Set[str]] = None) -> List[str]:
+    # Sufijo _2, _3... si dos cv comparten nombre de salida
+    out: List[str] = []
+    used = set() if used is None else used
+    for name in names:
+        stem, n = name[: -len(".html")], 2
+        while name in used:
+            name = f"{stem}_{n}.html"
+            n += 1
+        used.add(name)
+        out.append(name)
+    return out
+
+
+def file_output_names(input_path: str, cv_ids: List[str]) -> List[str]:
+    # Modo carpeta: un cv -> <stem>.html ; varios -> <stem>_<cv_id>.html
+    stem = Path(input_path).stem
+    if len(cv_ids) == 1:
+        return [stem + ".html"]
+    return unique_names([f"{stem}_{cv_filename(c)}" for c in cv_ids])
+
+
+# ---------- un archivo con varios cv ----------
+def _render_to_file(objs: CVObjects, out_path: str) -> Tuple[str, int]:
+    # Se ejecuta en un proceso del pool: objs llega serializado con pickle
+    return out_path, _write(objs, Path(out_path))
+
+
+def render_all(
+    cvs: Iterable[CVObjects],
+    template_path: str,
+    out_dir: Path,
+    jobs=None,
+    assets: Optional[AssetPipeline] = None,
+    output: Optional[OutputStage] = None,
+) -> List[Tuple[Path, int]]:
+    """
+    Renderiza cada CV en <out_dir>/<cv_id>.html repartiendo el trabajo en un pool de procesos.
+    `cvs` puede ser un generador (p. ej. cv_stream.iter_cvs): se consume a medida
+    que el pool tiene hueco, así que nunca hay más de unos pocos CVs en memoria.
+    Devuelve (ruta, bytes escritos) de cada salida.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    used: Set[str] = set()
+
+    def out_for(objs: CVObjects) -> str:
+        name = unique_names([cv_filename(objs.cv_id)], used)[0]
+        return str(out_dir / name)
+
+    if jobs == 1 or (isinstance(cvs, list) and len(cvs) <= 1):
+        _init_worker(template_path, assets=assets, output=output)
+        outs = [_render_to_file(o, out_for(o)) for o in cvs]
+        return [(Path(p), n) for p, n in outs]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    outs: List[Tuple[Path, int]] = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(template_path, None, None, assets, output)) as pool:
+        max_pending = 2 * (jobs or os.cpu_count() or 1)
+        pending = deque()
+        for objs in cvs:
+            pending.append(pool.submit(_render_to_file, objs, out_for(objs)))
+            if len(pending) >= max_pending:
+                p, n = pending.popleft().result()
+                outs.append((Path(p), n))
+        while pending:
+            p, n = pending.popleft().result()
+            outs.append((Path(p), n))
+    return outs
+
+
+# ---------- un CV en varias plantillas ----------
+def _render_target(template_path, out_path, context: Dict[str, Any], assets=None, output=None) -> int:
+    # Se ejecuta en un proceso del pool: el contexto llega serializado con pickle
+    return get_renderer().render_to_file(template_path, out_path, assets=assets, output=output, **context)
+
+
+def render_targets(targets: Sequence[Tuple[Any, Any, Dict[str, Any], Any, Any]], jobs=None) -> List[int]:
+    """
+    Varias salidas del mismo CV (main.py con varias plantillas). targets:
+    tuplas (plantilla, salida, contexto, assets, output) como las de
+    Renderer.render_to_file; el contexto ya construido se manda a cada
+    proceso del pool, que carga su plantilla y renderiza (Jinja no suelta el
+    GIL: con hilos no irían a la vez). Con un solo proceso se renderizan aquí,
+    una detrás de otra. Devuelve los bytes escritos, en el orden de targets.
+    """
+    workers = min(jobs or os.cpu_count() or 1, len(targets))
+    if workers <= 1:
+        return [_render_target(*t) for t in targets]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_target, *t) for t in targets]
+        return [f.result() for f in futures]
+
+
+# ---------- carpeta de entradas ----------
+@dataclass
+class FileResult:
+    input_path: str
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    cached: bool = False  # sin cambios desde la última build: no se reconstruyó
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def print_results(results: List[FileResult]) -> int:
+    """Una línea por archivo y el resumen (main.py --input-dir); devuelve cuántos fallaron."""
+    for r in results:
+        if r.cached:
+            print(f"=     {r.input_path} (sin cambios)")
+        elif r.ok:
+            print(f"OK    {r.input_path} -> {', '.join(r.outputs)}")
+        else:
+            print(f"FALLO {r.input_path}: {r.error}", file=sys.stderr)
+    fallos = sum(1 for r in results if not r.ok)
+    cacheados = sum(1 for r in results if r.cached)
+    print(
+        f"Resumen: {len(results) - fallos} OK ({cacheados} sin cambios), "
+        f"{fallos} fallido(s) de {len(results)} archivo(s)"
+    )
+    return fallos
+
+
+def _build_file(input_path: str, out_dir: str) -> FileResult:
+    res = FileResult(input_path=input_path)
+    try:
+        cvs = _parse_file(input_path)
+        # El dict de flexcup no tiene cv_id (ni hace falta: es un cv por archivo)
+        for objs, name in zip(cvs, file_output_names(input_path, [getattr(o, "cv_id", "") for o in cvs])):
+            out_path = Path(out_dir) / name
+            _write(objs, out_path)
+            res.outputs.append(str(out_path))
+            if _OUTPUT is not None:
+                res.outputs.extend(str(p) for p in _OUTPUT.siblings(out_path))
+    except Exception as e:  # el error de un archivo no para el lote
+        res.error = str(e) or e.__class__.__name__
+    return res
+
+
+def build_dir(
+    input_dir: Path,
+    template_path: str,
+    out_dir: Path,
+    jobs=None,
+    pattern: str = "*.txt",
+    force: bool = False,
+    parse_cache: Optional[ParseCache] = None,
+    engine: str = "antlr",
+    assets: Optional[AssetPipeline] = None,
+    output: Optional[OutputStage] = None,
+) -> List[FileResult]:
+    """
+    Construye todos los archivos de input_dir en out_dir.
+    Cada worker del pool mantiene su lexer/parser y la plantilla compilada
+    entre archivos, así que solo se paga el arranque una vez por proceso.
+    Los archivos cuya clave (build_key) no cambió se saltan salvo con force.
+    Con parse_cache, los que solo cambian de plantilla no se vuelven a parsear.
+    Con assets, las páginas pasan por el AssetPipeline (fotos, huellas, CSS crítico);
+    con output, se minifican y se escriben sus .gz/.br.
+    """
+    files = sorted(str(p) for p in input_dir.glob(pattern) if p.is_file())
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if not files:
+        return []
+
+    manifest = BuildManifest.for_dir(out_dir)
+    extra = stage_signature(assets, output)
+    keys = {f: build_key(Path(f), Path(template_path), extra=extra, engine=engine) for f in files}
+    results = {}
+    todo: List[str] = []
+    for f in files:
+        if not force and manifest.is_fresh(Path(f), keys[f]):
+            results[f] = FileResult(input_path=f, outputs=manifest.outputs(Path(f)), cached=True)
+        else:
+            todo.append(f)
+
+    if len(todo) <= 1 or jobs == 1:
+        if todo:
+            _init_worker(template_path, parse_cache, engine, assets, output)
+        built = [_build_file(f, str(out_dir)) for f in todo]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(template_path, parse_cache, engine, assets, output, True)) as pool:
+            built = list(pool.map(_build_file, todo, [str(out_dir)] * len(todo)))
+
+    for r in built:
+        results[r.input_path] = r
+        if r.ok:
+            manifest.record(Path(r.input_path), keys[r.input_path], r.outputs)
+        else:
+            manifest.forget(Path(r.input_path))
+    manifest.save()
+    return [results[f] for f in files]
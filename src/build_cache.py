@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MANIFEST_NAME = ".cvbuild.json"
+# 2: salidas relativas a la carpeta del manifiesto (en la 1, al directorio de trabajo)
+_MANIFEST_VERSION = 2
+
+# Archivos que definen cómo se interpreta una entrada: si cambian, hay que
+# reconstruir todo aunque la entrada y la plantilla sean las mismas.
+_VERSION_FILES = [
+    PROJECT_ROOT / "gramatica" / "antlr" / "CVLang.g4",
+    PROJECT_ROOT / "src" / "cv_builder.py",
+    PROJECT_ROOT / "src" / "cv_model.py",
+    PROJECT_ROOT / "src" / "datosPersonales.py",
+    PROJECT_ROOT / "src" / "formacion.py",
+    PROJECT_ROOT / "src" / "idiomas.py",
+    PROJECT_ROOT / "src" / "experiencia.py",
+    PROJECT_ROOT / "src" / "habilidades.py",
+    PROJECT_ROOT / "src" / "portafolio.py",
+]
+
+# Lo que define la salida de cada engine además de _VERSION_FILES
+ENGINE_FILES: Dict[str, List[Path]] = {
+    "antlr": [],  # gramática y modelo ya van en build_version()
+    "rd": [PROJECT_ROOT / "src" / "parsers" / "rd_engine.py"],
+    "flexcup": [
+        PROJECT_ROOT / "gramatica" / "flexcup" / "CV_Ascendente.flex",
+        PROJECT_ROOT / "gramatica" / "flexcup" / "CV_Ascendente.cup",
+    ],
+}
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def build_version() -> str:
+    """Hash de la gramática y del visitor/modelo de datos."""
+    h = hashlib.sha256()
+    for p in _VERSION_FILES:
+        if p.exists():
+            h.update(p.name.encode())
+            h.update(file_hash(p).encode())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def engine_version(engine: str) -> str:
+    """Nombre del engine + hash de sus archivos (ENGINE_FILES)."""
+    h = hashlib.sha256(engine.encode())
+    for p in ENGINE_FILES.get(engine, []):
+        if p.exists():
+            h.update(file_hash(p).encode())
+    return h.hexdigest()
+
+
+def _static_hash(path: str) -> str:
+    # Plantilla y styles.css: iguales para todo el lote, se hashean una vez
+    # mientras no cambien (main.py --watch y serve.py siguen en el mismo proceso)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return _stamped_hash(path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=256)
+def _stamped_hash(path: str, mtime_ns: int, size: int) -> str:
+    return file_hash(Path(path))
+
+
+def build_key(
+    input_path: Path,
+    template_path: Path,
+    styles_path: Optional[Path] = None,
+    extra: str = "",
+    engine: str = "antlr",
+) -> str:
+    """
+    Clave de contenido de una salida: entrada + plantilla + styles.css +
+    versión + engine que la parseó (otro engine, u otro rd_engine.py, puede
+    dar otra salida). extra: lo demás que cambia la salida (p. ej.
+    AssetPipeline.signature()).
+    """
+    styles_path = styles_path or PROJECT_ROOT / "styles.css"
+    h = hashlib.sha256()
+    for part in (
+        build_version(),
+        engine_version(engine),
+        file_hash(input_path),
+        _static_hash(str(Path(template_path).resolve())),
+        _static_hash(str(Path(styles_path).resolve())),
+    ):
+        h.update(part.encode())
+    if extra:
+        h.update(extra.encode())
+    return h.hexdigest()
+
+
+def stage_signature(*stages) -> str:
+    """extra de build_key para las etapas activas (AssetPipeline, OutputStage...); None se ignora."""
+    return ";".join(s.signature() for s in stages if s is not None)
+
+
+class BuildManifest:
+    """
+    Manifiesto JSON (<carpeta de salida>/.cvbuild.json) que recuerda, para
+    cada entrada, la clave con la que se generó y qué archivos produjo. Las
+    salidas se guardan relativas a la carpeta del manifiesto: sigue valiendo
+    desde otro directorio de trabajo o si se mueve la carpeta entera.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._entries: Dict[str, Dict] = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == _MANIFEST_VERSION:
+                self._entries = data.get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            self._entries = {}
+
+    @classmethod
+    def for_dir(cls, out_dir: Path) -> "BuildManifest":
+        return cls(Path(out_dir) / MANIFEST_NAME)
+
+    @staticmethod
+    def _id(input_path: Path) -> str:
+        return str(Path(input_path).resolve())
+
+    def _rel(self, output) -> str:
+        return Path(os.path.relpath(Path(output).resolve(), self.path.parent.resolve())).as_posix()
+
+    def is_fresh(self, input_path: Path, key: str, outputs: Optional[List[str]] = None) -> bool:
+        e = self._entries.get(self._id(input_path))
+        if not e or e.get("key") != key:
+            return False
+        if outputs is not None and sorted(e.get("outputs", [])) != sorted(self._rel(o) for o in outputs):
+            return False
+        return all((self.path.parent / o).exists() for o in e.get("outputs", []))
+
+    def outputs(self, input_path: Path) -> List[str]:
+        """Salidas de la entrada, con la carpeta del manifiesto delante (como se pasó a for_dir)."""
+        return [str(self.path.parent / o) for o in self._entries.get(self._id(input_path), {}).get("outputs", [])]
+
+    def record(self, input_path: Path, key: str, outputs: List[str]) -> None:
+        self._entries[self._id(input_path)] = {"key": key, "outputs": [self._rel(o) for o in outputs]}
+
+    def forget(self, input_path: Path) -> None:
+        self._entries.pop(self._id(input_path), None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": _MANIFEST_VERSION, "entries": self._entries}, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
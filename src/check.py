@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import sys
+from typing import TYPE_CHECKING, List, Optional, TextIO
+
+if TYPE_CHECKING:
+    from metrics import Metrics
+
+# Validación de entradas (main.py --check): solo lexer y parser, sin visitor,
+# render ni escritura, y sin parar en el primer error. Un archivo con errores
+# no para el lote: cada uno tiene su CheckResult.
+
+LEXICO, SINTACTICO = "lexico", "sintactico"
+
+
+@dataclass
+class Diagnostic:
+    kind: str  # LEXICO o SINTACTICO
+    line: int
+    column: int  # empieza en 1, como en los editores
+    message: str
+
+
+@dataclass
+class CheckResult:
+    input_path: str
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    error: Optional[str] = None  # no se pudo leer el archivo
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.diagnostics
+
+
+# ---------- antlr ----------
+# Lexer/parser del proceso, como en batch.py: se crean una vez y se
+# reutilizan entre archivos (con sus cachés DFA ya calientes).
+_ANTLR = None
+
+
+def _antlr_state():
+    global _ANTLR
+    if _ANTLR is not None:
+        return _ANTLR
+    from CVLangLexer import CVLangLexer
+    from parsers.antlr_engine import AntlrParser, ErrorCollector
+
+    class CheckingLexer(CVLangLexer):
+        """
+        Las acciones de ERROR y de los comentarios mal cerrados lanzan
+        Exception en CVLang.g4; aquí se apuntan y el token se descarta, para
+        seguir con el resto del archivo.
+        """
+
+        def __init__(self, input=None, output=sys.stdout) -> None:
+            super().__init__(input, output)
+            self.diagnostics: List[Diagnostic] = []
+
+        def _report(self, message: str) -> None:
+            self.diagnostics.append(Diagnostic(LEXICO, self._tokenStartLine, self._tokenStartColumn + 1, message))
+            self.skip()
+
+        def UNCLOSED_COMMENT_action(self, localctx, actionIndex: int) -> None:
+            self._report("Error lexico: comentario no cerrado antes del fin de archivo.")
+
+        def UNOPENED_COMMENT_action(self, localctx, actionIndex: int) -> None:
+            self._report("Error lexico: comentario no abierto.")
+
+        def ERROR_action(self, localctx, actionIndex: int) -> None:
+            # Mismo texto que la acción de la gramática (columna de después del carácter)
+            self._report(
+                f"Error lexico: caracter no reconocido '{self.text}' en linea {self.line}, columna {self.column}"
+            )
+
+    lexer_errors, parser_errors = ErrorCollector(), ErrorCollector()
+    antlr = AntlrParser(errors=parser_errors, lexer_errors=lexer_errors, lexer=CheckingLexer(None))
+    _ANTLR = (antlr, lexer_errors, parser_errors)
+    return _ANTLR
+
+
+def _check_antlr(input_path: str) -> List[Diagnostic]:
+    from antlr4 import FileStream
+
+    antlr, lexer_errors, parser_errors = _antlr_state()
+    antlr.lexer.diagnostics = []
+    lexer_errors.errors.clear()
+    parser_errors.errors.clear()
+
+    # SLL sin listeners primero (parse_start): un archivo válido no llega a la
+    # fase LL, que es la que se recupera de los errores y los informa todos
+    antlr.tree(antlr.tokens(FileStream(input_path, encoding="utf-8")))
+    diags = antlr.lexer.diagnostics
+    diags += [Diagnostic(LEXICO, line, col + 1, msg) for line, col, msg in lexer_errors.errors]
+    diags += [Diagnostic(SINTACTICO, line, col + 1, msg) for line, col, msg in parser_errors.errors]
+    return sorted(diags, key=lambda d: (d.line, d.column))
+
+
+# ---------- rd ----------
+def _check_rd(input_path: str) -> List[Diagnostic]:
+    from parsers import rd_engine
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    lex_errors, syntax_errors = rd_engine.check_source(text)
+    diags = [Diagnostic(LEXICO, e.line, e.column, str(e)) for e in lex_errors]
+    diags += [Diagnostic(SINTACTICO, e.line, e.column + 1, e.reason) for e in syntax_errors]
+    return sorted(diags, key=lambda d: (d.line, d.column))
+
+
+_ENGINE = "antlr"
+
+
+def _init_worker(engine: str, restore_dfa: bool = False) -> None:
+    global _ENGINE
+    _ENGINE = engine
+    if engine == "antlr" and restore_dfa:
+        from parsers.antlr_warmup import restore
+
+        restore()
+
+
+def check_file(input_path: str) -> CheckResult:
+    res = CheckResult(input_path=input_path)
+    try:
+        res.diagnostics = _check_rd(input_path) if _ENGINE == "rd" else _check_antlr(input_path)
+    except (OSError, UnicodeDecodeError) as e:
+        res.error = str(e) or e.__class__.__name__
+    return res
+
+
+def check_paths(paths: List[str], engine: str = "antlr", jobs=None) -> List[CheckResult]:
+    """
+    Valida cada archivo; con más de uno, en un pool de procesos. Los archivos
+    se reparten en lotes (chunksize) para que miles de entradas pequeñas no
+    paguen un viaje al pool cada una.
+    """
+    if len(paths) <= 1 or jobs == 1:
+        _init_worker(engine)
+        return [check_file(p) for p in paths]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine, True)) as pool:
+        return list(pool.map(check_file, paths, chunksize=chunksize))
+
+
+# ---------- informe ----------
+def report_json(results: List[CheckResult], engine: str, out: TextIO = sys.stdout) -> None:
+    invalid = [r for r in results if not r.ok]
+    json.dump(
+        {
+            "version": 1,
+            "engine": engine,
+            "files": len(results),
+            "invalid": len(invalid),
+            "errors": sum(len(r.diagnostics) + (r.error is not None) for r in results),
+            "results": [
+                {
+                    "input": r.input_path,
+                    "ok": r.ok,
+                    "error": r.error,
+                    "diagnostics": [asdict(d) for d in r.diagnostics],
+                }
+                for r in results
+            ],
+        },
+        out,
+        ensure_ascii=False,
+        indent=1,
+    )
+    out.write("\n")
+
+
+def report_text(results: List[CheckResult], out: TextIO = sys.stdout) -> None:
+    # archivo:línea:columna: tipo: mensaje (el formato de los compiladores, que entienden los editores y CI)
+    for r in results:
+        if r.error is not None:
+            out.write(f"{r.input_path}: error: {r.error}\n")
+        for d in r.diagnostics:
+            out.write(f"{r.input_path}:{d.line}:{d.column}: {d.kind}: {d.message}\n")
+    invalid = sum(1 for r in results if not r.ok)
+    print(f"Resumen: {len(results) - invalid} válido(s), {invalid} con errores de {len(results)} archivo(s)", file=sys.stderr)
+
+
+def check_and_report(paths: List[str], engine: str, jobs, fmt: str, metrics: Metrics) -> bool:
+    """main.py --check: valida, escribe el informe (json o text) por stdout y dice si todo es válido."""
+    with metrics.phase("check"):
+        results = check_paths(paths, engine=engine, jobs=jobs)
+    metrics.set("files", len(results))
+    metrics.set("errors", sum(len(r.diagnostics) for r in results))
+    if fmt == "json":
+        report_json(results, engine)
+    else:
+        report_text(results)
+    return all(r.ok for r in results)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
 
 from datosPersonales import DatosPersonales
@@ -9,66 +8,53 @@ from idiomas import Idiomas, Idioma
 from experiencia import Experiencia, ExperienciaItem
 from habilidades import Habilidades, Habilidad
 from portafolio import Portafolio, Proyecto, Merito
+from cv_model import CVObjects, split_tecnologias, unquote
 
 from CVLangVisitor import CVLangVisitor
 from CVLangParser import CVLangParser
 
 
-# ---------- helpers de texto ----------
-def _unquote(s: str) -> str:
-    s = s.strip()
-    if len(s) >= 2 and s[0] == '"' and s[-1] == '"':
-        return s[1:-1]
-    return s
+# Tipos de token que pueden ir como valor dentro de campo(...)
+_VALUE_TOKENS = frozenset({
+    CVLangParser.CONJPALYNUM,
+    CVLangParser.IDENT,
+    CVLangParser.RUTA,
+    CVLangParser.MAIL,
+    CVLangParser.TFNO,
+    CVLangParser.NUM,
+    CVLangParser.FECHA_NUM,
+    CVLangParser.BOOL,
+    CVLangParser.NVI,
+    CVLangParser.NVH,
+})
 
 
-def _inside_parens(s: str) -> str:
+def _ctx_value(ctx) -> str:
     """
-    Convierte:
-      'nomyape(Antonio Lobato)' -> 'Antonio Lobato'
-      '(Antonio Lobato)'       -> 'Antonio Lobato'
-    Si no hay paréntesis, devuelve el string original.
+    Valor de un campo `clave ( VALOR )` leído directamente del token, sin
+    reconstruir el texto del subárbol con getText(). En la gramática el
+    valor es siempre el tercer hijo; si el parser recuperó un error y no
+    está ahí, se busca el primer token de valor entre los hijos.
     """
-    s = s.strip()
-    if "(" in s and s.endswith(")"):
-        return s[s.find("(") + 1 : -1].strip()
-    if s.startswith("(") and s.endswith(")"):
-        return s[1:-1].strip()
-    return s
-
-
-def _ctx_text(ctx) -> str:
-    return ctx.getText().strip()
-
-
-def _ctx_value(ctx) -> str:
-    # Saca el texto del nodo y devuelve lo de dentro de (...)
-    return _unquote(_inside_parens(_ctx_text(ctx)))
-
-
-def _split_tecnologias(s: str) -> List[str]:
-    raw = s.strip()
-    if not raw:
-        return []
-    if "," in raw:
-        return [t.strip() for t in raw.split(",") if t.strip()]
-    return [t.strip() for t in raw.split() if t.strip()]
-
-
-@dataclass
-class CVObjects:
-    cv_id: str
-    datos: DatosPersonales
-    formacion: Formacion
-    idiomas: Optional[Idiomas]
-    experiencia: Optional[Experiencia]
-    habilidades: Optional[Habilidades]
-    portafolio: Optional[Portafolio]
+    children = ctx.children or []
+    if len(children) > 2:
+        tok = getattr(children[2], "symbol", None)
+        if tok is not None and tok.type in _VALUE_TOKENS:
+            return unquote(tok.text)
+    for ch in children:
+        tok = getattr(ch, "symbol", None)
+        if tok is not None and tok.type in _VALUE_TOKENS:
+            return unquote(tok.text)
+    return ""
 
 
 class BuildObjectsVisitor(CVLangVisitor):
     def __init__(self) -> None:
         super().__init__()
+        self._reset()
+
+    def _reset(self) -> None:
+        # Estado de un único cv; se limpia antes de visitar cada bloque
         self._cv_id: str = "CV"
         self._datos: Optional[DatosPersonales] = None
         self._form: Optional[Formacion] = None
@@ -93,32 +79,24 @@ class BuildObjectsVisitor(CVLangVisitor):
         )
 
     # ---------- ENTRY ----------
-    def visitStart(self, ctx: CVLangParser.StartContext):
+    def visitStart(self, ctx: CVLangParser.StartContext) -> List[CVObjects]:
         return self.visit(ctx.cvs())
 
-    def visitCvs(self, ctx: CVLangParser.CvsContext):
+    def visitCvs(self, ctx: CVLangParser.CvsContext) -> List[CVObjects]:
         cvs = ctx.cv()
         if not cvs:
             raise ValueError("No se encontró ningún bloque cv en el archivo.")
-        # Si hay varios cv, aquí podrías iterar. Por ahora, usamos el primero:
-        return self.visit(cvs[0])
+        # Un CVObjects por cada bloque cv, en orden de aparición
+        return [self.visit(c) for c in cvs]
 
     # ---------- CV ----------
     def visitCv(self, ctx: CVLangParser.CvContext):
-        # Dependiendo de tu gramática, el nombre puede ser IDENT o algo similar.
-        # Lo más robusto: usa getText() y extrae lo que haya tras 'cv'.
-        # Si tu cv es: cv "Antonio Lobato" { ... }
-        # suele existir IDENT() en el contexto.
-        if hasattr(ctx, "IDENT") and ctx.IDENT():
-            self._cv_id = _unquote(ctx.IDENT().getText())
-        else:
-            # fallback: intenta capturar el "nombre" desde el texto completo
-            full = _ctx_text(ctx)
-            # full empieza por "cv..." -> toma hasta la primera '{'
-            head = full.split("{", 1)[0].strip()
-            # quita el 'cv'
-            head = head[2:].strip() if head.lower().startswith("cv") else head
-            self._cv_id = _unquote(head) if head else "CV"
+        self._reset()
+
+        # cv "Antonio Lobato" { ... } -> el nombre es el token IDENT
+        ident = ctx.IDENT()
+        if ident is not None:
+            self._cv_id = unquote(ident.symbol.text) or "CV"
 
         self.visit(ctx.datospersonales())
         self.visit(ctx.formacion())
@@ -211,17 +189,11 @@ class BuildObjectsVisitor(CVLangVisitor):
     def visitIdiomas(self, ctx: CVLangParser.IdiomasContext):
         lst: List[Idioma] = []
         for it in ctx.idioma():
-            # En muchas gramáticas: idioma( Inglés nivel(B2) expedidor(...) )
-            # Como no usamos value(), cogemos texto y buscamos sub-nodos:
-            nombre = ""
-            if hasattr(it, "CONJPALYNUM") and it.CONJPALYNUM():
-                nombre = it.CONJPALYNUM().getText()
-            else:
-                nombre = _ctx_text(it).strip("()").strip()
-
-            niv = _ctx_value(it.nivel()) if hasattr(it, "nivel") and it.nivel() else ""
-            exp = _ctx_value(it.expedidor()) if hasattr(it, "expedidor") and it.expedidor() else None
-            lst.append(Idioma(nombre=_unquote(nombre), nivel=niv, expedidor=exp))
+            # idioma { nombre(Inglés) nivel(B2) expedidor(...)? }
+            nombre = _ctx_value(it.nombre()) if it.nombre() else ""
+            niv = _ctx_value(it.nvi()) if it.nvi() else ""
+            exp = _ctx_value(it.expedidor()) if it.expedidor() else None
+            lst.append(Idioma(nombre=nombre, nivel=niv, expedidor=exp))
 
         self._idiomas = Idiomas(idiomas=lst)
         return None
@@ -294,38 +266,17 @@ class BuildObjectsVisitor(CVLangVisitor):
         # hard? -> ctx.hard() es None o HardContext (NO lista)
         hd = ctx.hard()
         if hd:
-            # Si tu hard usa categoria{...} como en tu ejemplo:
-            if hasattr(hd, "categoria") and hd.categoria():
-                for cat in hd.categoria():
-                    txt = _ctx_text(cat)
-                    cat_nombre = self._extract_field(txt, "nombre")
-                    hab_nombre = self._extract_field(txt, "habilidad")
-                    nivel = self._extract_field(txt, "nvhab")
+            # categoria { nombre(...) habilidad(...) nvhab(...) (, habilidad(...) nvhab(...))* }
+            for cat in hd.categoria():
+                cat_nombre = _ctx_value(cat.nombre()) if cat.nombre() else ""
+                for h, nv in zip(cat.habilidad(), cat.nvh()):
+                    hab_nombre = _ctx_value(h)
                     if hab_nombre:
-                        hs.append(Habilidad(nombre=hab_nombre, tipo="hard", categoria=cat_nombre, nivel=nivel))
-            else:
-                # fallback si tu gramática hard es la antigua (habilidad/categoria/nvhab sueltos)
-                # (deja esto si no aplica; no hace daño)
-                pass
+                        hs.append(Habilidad(nombre=hab_nombre, tipo="hard", categoria=cat_nombre, nivel=_ctx_value(nv)))
 
         self._skills = Habilidades(habilidades=hs)
         return None
 
-
-    def _extract_field(self, block_text: str, field: str) -> str:
-        """
-        Extrae field(...) de un texto como:
-          categoria{nombre(Venta)habilidad(Vender coches)nvhab(alto)}
-        """
-        key = field + "("
-        i = block_text.find(key)
-        if i == -1:
-            return ""
-        j = block_text.find(")", i)
-        if j == -1:
-            return ""
-        return _unquote(block_text[i + len(key) : j].strip())
-
     # ---------- PORTAFOLIO ----------
     def visitPortafolio(self, ctx: CVLangParser.PortafolioContext):
         proyectos: List[Proyecto] = []
@@ -335,12 +286,12 @@ class BuildObjectsVisitor(CVLangVisitor):
             for p in ctx.proyecto():
                 nombre = _ctx_value(p.nombre()) if hasattr(p, "nombre") and p.nombre() else ""
                 desc = _ctx_value(p.descripcion()) if hasattr(p, "descripcion") and p.descripcion() else ""
-                tec = _split_tecnologias(_ctx_value(p.tecnologias())) if hasattr(p, "tecnologias") and p.tecnologias() else []
+                tec = split_tecnologias(_ctx_value(p.tecnologias())) if hasattr(p, "tecnologias") and p.tecnologias() else []
                 proyectos.append(Proyecto(nombre=nombre, descripcion=desc, categoria=None, tecnologias=tec))
 
-        # Si en tu gramática existen meritos(), también podrías leerlos:
-        if hasattr(ctx, "meritos") and ctx.meritos():
-            for m in ctx.meritos():
+        # merito: meritos { nombre(...) descripcion(...) }
+        if hasattr(ctx, "merito") and ctx.merito():
+            for m in ctx.merito():
                 n = _ctx_value(m.nombre()) if hasattr(m, "nombre") and m.nombre() else ""
                 d = _ctx_value(m.descripcion()) if hasattr(m, "descripcion") and m.descripcion() else ""
                 meritos.append(Merito(nombre=n, descripcion=d))
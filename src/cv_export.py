@@ -0,0 +1,298 @@
+"""
+Exportación de CVs parseados a un esquema JSON canónico y versionado, igual
+venga de ANTLR, del parser rd (CVObjects) o del JSON raíz que imprime el
+parser de CUP. No importa Jinja ni el runtime de ANTLR.
+
+Un registro por cv:
+
+    {"schema": "cvlang.cv", "version": 1, "engine": "rd",
+     "source": "entradas/entrada.txt", "index": 0, "cv_id": "Antonio Lobato",
+     "datos": {"nombre": ..., "foto": ..., "fecha_nacimiento": ..., "bio": ...,
+               "email": ..., "telefono": ..., "linkedin": ..., "github": ..., "web": ...},
+     "formacion": [...], "idiomas": [...], "experiencia": [...],
+     "habilidades": [...], "proyectos": [...], "meritos": [...]}
+
+Las listas siempre están (vacías si la sección no existe), cada elemento
+tiene siempre las mismas claves (FIELDS) y lo que falta es null, nunca "".
+Si cambian las claves o su significado, sube SCHEMA_VERSION. "engine" es el
+de main.py --engine: antlr, rd o flexcup (el JSON de CUP, también el de aquí).
+
+main.py --emit json|ndjson escribe estos registros; para un JSON de CUP ya generado:
+
+    python src/cv_export.py cv.json --emit ndjson
+"""
+from __future__ import annotations
+
+import argparse
+from collections import deque
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA = "cvlang.cv"
+SCHEMA_VERSION = 1
+# Archivos por tarea del pool en export_paths
+EXPORT_CHUNK = 64
+
+# Claves de cada sección, en orden; las de OPTIONAL valen null si faltan o están vacías
+FIELDS: Dict[str, tuple] = {
+    "datos": ("nombre", "foto", "fecha_nacimiento", "bio", "email", "telefono", "linkedin", "github", "web"),
+    "formacion": ("titulo", "institucion", "tipo", "descripcion", "logros", "fecha", "en_curso"),
+    "idiomas": ("nombre", "nivel", "expedidor"),
+    "experiencia": ("tipo", "organizacion", "puesto", "descripcion", "horas"),
+    "habilidades": ("nombre", "tipo", "categoria", "nivel"),
+    "proyectos": ("nombre", "descripcion", "categoria", "tecnologias", "web", "grupo"),
+    "meritos": ("nombre", "descripcion"),
+}
+OPTIONAL: Dict[str, frozenset] = {
+    "datos": frozenset(FIELDS["datos"][1:]),
+    "formacion": frozenset({"tipo", "descripcion", "logros", "fecha"}),
+    "idiomas": frozenset({"expedidor"}),
+    "experiencia": frozenset({"descripcion", "horas"}),
+    "habilidades": frozenset({"categoria", "nivel"}),
+    "proyectos": frozenset({"web", "grupo"}),
+    "meritos": frozenset(),
+}
+_LISTS = ("formacion", "idiomas", "experiencia", "habilidades", "proyectos", "meritos")
+
+
+def _item(section: str, item) -> Dict[str, Any]:
+    # item: objeto del modelo (atributos) o dict de CUP (claves)
+    out = {}
+    optional = OPTIONAL[section]
+    is_dict = isinstance(item, dict)
+    for name in FIELDS[section]:
+        value = item.get(name) if is_dict else getattr(item, name, None)
+        if name in optional and (value == "" or value == []):
+            value = None
+        elif isinstance(value, list):
+            value = list(value)
+        out[name] = value
+    if section == "formacion":
+        out["en_curso"] = bool(out["en_curso"])
+    elif section == "experiencia" and isinstance(out["horas"], str):
+        # CUP lo imprime como texto
+        out["horas"] = int(out["horas"]) if out["horas"].strip().isdigit() else None
+    return out
+
+
+def _sections_from_objects(objs) -> Dict[str, list]:
+    # CVObjects de ANTLR o rd
+    return {
+        "formacion": objs.formacion.items if objs.formacion else [],
+        "idiomas": objs.idiomas.idiomas if objs.idiomas else [],
+        "experiencia": objs.experiencia.experiencias if objs.experiencia else [],
+        "habilidades": objs.habilidades.habilidades if objs.habilidades else [],
+        "proyectos": objs.portafolio.proyectos if objs.portafolio else [],
+        "meritos": objs.portafolio.meritos if objs.portafolio else [],
+    }
+
+
+def _sections_from_cup(root: Dict[str, Any]) -> Dict[str, list]:
+    # Raíz de CUP: {"formacion": {"formacion": [...]}, "portafolio": {"proyectos": [...], ...}, ...}
+    def nested(key: str, inner: str) -> list:
+        return (root.get(key) or {}).get(inner) or []
+
+    return {
+        "formacion": nested("formacion", "formacion"),
+        "idiomas": nested("idiomas", "idiomas"),
+        "experiencia": nested("experiencia", "experiencia"),
+        "habilidades": nested("habilidades", "habilidades"),
+        "proyectos": nested("portafolio", "proyectos"),
+        "meritos": nested("portafolio", "meritos"),
+    }
+
+
+def canonical(cv, engine: str, source: Optional[str] = None, index: int = 0) -> Dict[str, Any]:
+    """Registro canónico de un cv: CVObjects (antlr/rd) o el dict raíz de CUP."""
+    if isinstance(cv, dict):
+        datos, sections, cv_id = cv.get("datos") or {}, _sections_from_cup(cv), cv.get("cv_id") or None
+    else:
+        datos, sections, cv_id = cv.datos, _sections_from_objects(cv), cv.cv_id
+
+    record: Dict[str, Any] = {
+        "schema": SCHEMA,
+        "version": SCHEMA_VERSION,
+        "engine": engine,
+        "source": source,
+        "index": index,
+        "cv_id": cv_id,
+        "datos": _item("datos", datos),
+    }
+    for name in _LISTS:
+        record[name] = [_item(name, it) for it in sections[name]]
+    return record
+
+
+def dumps(record: Dict[str, Any]) -> str:
+    # Una línea, UTF-8 sin escapar: lo que espera NDJSON
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_lines(records: Iterable[Dict[str, Any]], fmt: str) -> Iterator[str]:
+    """
+    Trozos de texto de la salida, registro a registro (nunca el corpus entero):
+    ndjson = una línea por cv; json = {"schema", "version", "cvs": [...]}.
+    """
+    if fmt == "ndjson":
+        for r in records:
+            yield dumps(r) + "\n"
+        return
+    yield f'{{"schema":"{SCHEMA}","version":{SCHEMA_VERSION},"cvs":['
+    first = True
+    for r in records:
+        yield ("\n" if first else ",\n") + dumps(r)
+        first = False
+    yield "\n]}\n"
+
+
+def write_lines(chunks: Iterable[str], out: Optional[str] = None) -> int:
+    """
+    Escribe a stdout o, con out, a un temporal que se renombra al terminar
+    (como render_engine.write_chunks, sin importar Jinja). Devuelve los bytes.
+    """
+    written = 0
+    if out is None:
+        try:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+                written += len(chunk.encode("utf-8"))
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # Quien lee cerró la tubería (p. ej. `--emit ndjson | head`): se deja de
+            # producir sin traza y stdout pasa a /dev/null para que no falle el flush al salir
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            if hasattr(chunks, "close"):
+                chunks.close()
+        return written
+    out_path = Path(out)
+    tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            for chunk in chunks:
+                written += f.write(chunk)
+        os.replace(tmp, out_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return written
+
+
+# ---------- carpetas (en el pool) ----------
+_ENGINE = "antlr"
+
+
+def _init_worker(engine: str, restore_dfa: bool = False) -> None:
+    global _ENGINE
+    _ENGINE = engine
+    if engine == "antlr" and restore_dfa:
+        from parsers.antlr_warmup import restore
+
+        restore()
+    if engine == "flexcup":
+        from parsers.flexcup_pool import shared_pool
+
+        shared_pool()
+
+
+def export_file(input_path: str) -> tuple:
+    """(input_path, [registros], error) de un archivo; se ejecuta en el pool."""
+    if _ENGINE == "rd":
+        from parsers.rd_engine import parse_file
+    elif _ENGINE == "flexcup":
+        parse_file = _parse_flexcup
+    else:
+        from parsers.antlr_engine import parse_file
+    try:
+        cvs = parse_file(input_path)
+    except Exception as e:  # el error de un archivo no para la exportación
+        return input_path, [], str(e) or e.__class__.__name__
+    return input_path, [canonical(o, _ENGINE, input_path, i) for i, o in enumerate(cvs)], None
+
+
+def _parse_flexcup(input_path: str) -> List[dict]:
+    # La JVM del proceso (como batch.py); CUP da el dict raíz de un solo cv
+    from build_cache import PROJECT_ROOT
+    from parsers.flexcup_engine import parse_with_flexcup
+    from parsers.flexcup_pool import shared_pool
+
+    return [parse_with_flexcup(Path(input_path), PROJECT_ROOT, pool=shared_pool())]
+
+
+def _export_chunk(paths: List[str]) -> List[tuple]:
+    return [export_file(p) for p in paths]
+
+
+def export_paths(paths: List[str], engine: str = "antlr", jobs=None) -> Iterator[tuple]:
+    """
+    Resultados de export_file en el orden de paths, a medida que el pool los
+    termina. Los archivos van al pool en lotes (miles de entradas pequeñas no
+    pagan un viaje cada una) y, como en batch.render_all, con pocos lotes en
+    vuelo: ni las tareas ni los registros de todo el corpus se acumulan si
+    quien lee va más despacio (o deja de leer).
+    """
+    if len(paths) <= 1 or jobs == 1:
+        _init_worker(engine)
+        for p in paths:
+            yield export_file(p)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, min(EXPORT_CHUNK, len(paths) // (8 * workers)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine, True)) as pool:
+        max_pending = 2 * workers
+        pending = deque()
+        try:
+            for i in range(0, len(paths), chunksize):
+                pending.append(pool.submit(_export_chunk, paths[i:i + chunksize]))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Si se deja de leer a medias, lo que no empezó no se ejecuta
+            for f in pending:
+                f.cancel()
+
+
+# ---------- main.py --emit ----------
+def emit_paths(paths: List[str], engine: str, fmt: str, out: Optional[str] = None, jobs=None) -> Tuple[int, List[str]]:
+    """
+    Registros de varios archivos, archivo a archivo según los termina el pool
+    (nunca está todo el corpus en memoria). Devuelve (bytes, archivos que fallaron).
+    """
+    fallos: List[str] = []
+
+    def records():
+        for path, recs, error in export_paths(paths, engine=engine, jobs=jobs):
+            if error is not None:
+                fallos.append(path)
+                print(f"FALLO {path}: {error}", file=sys.stderr)
+            yield from recs
+
+    return write_lines(iter_lines(records(), fmt), out), fallos
+
+
+def emit_cvs(cvs: Iterable, engine: str, source: str, fmt: str, out: Optional[str] = None) -> int:
+    """Registros de los cvs de un archivo ya parseado (o de cv_stream.iter_cvs); devuelve los bytes."""
+    return write_lines(iter_lines((canonical(o, engine, source, i) for i, o in enumerate(cvs)), fmt), out)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("cup_json", help="JSON raíz que imprime el parser de CUP (ej: cv.json)")
+    ap.add_argument("--emit", choices=["json", "ndjson"], default="json")
+    ap.add_argument("--out", help="Archivo de salida (por defecto stdout)")
+    args = ap.parse_args()
+
+    with open(args.cup_json, "r", encoding="utf-8") as f:
+        root = json.load(f)
+    write_lines(iter_lines([canonical(root, "flexcup", args.cup_json)], args.emit), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Índice invertido del corpus de CVs: qué CVs tienen cada habilidad,
+tecnología, idioma, organización... para consultarlo sin volver a parsear.
+
+    python src/cv_index.py build --input-dir entradas/ --engine rd
+    python src/cv_index.py query 'idioma:ingles@c1 AND (tecnologia:python OR habilidad:docker@alto)'
+    python src/cv_index.py terms tecnologia
+
+Campos (un documento por bloque cv):
+
+    cv            cv_id
+    habilidad     nombre de la habilidad; habilidad:<nombre>@<nvhab> con su nivel
+    categoria     categoría de la habilidad
+    nvhab         nivel de alguna habilidad (bajo, medio, alto)
+    tecnologia    tecnologías de los proyectos
+    idioma        idioma; idioma:<nombre>@<nivel> con su nivel
+    nivel         nivel de algún idioma (A1..C2, nativo)
+    organizacion  organización de la experiencia (laboral o voluntariado)
+    expedidor     institución de la formación
+
+Los valores se comparan sin mayúsculas ni tildes ("Inglés" = ingles). La
+consulta admite AND (o nada entre términos), OR, NOT y paréntesis; los
+valores con espacios van entre comillas: organizacion:"compramos tu coche".
+
+El índice es incremental: build solo vuelve a parsear los archivos cuyo
+contenido cambió (mtime/tamaño y, si difieren, hash) y quita los que ya no
+están. Los parseos pasan por la caché de build/parse, así que lo ya
+construido con main.py tampoco se vuelve a parsear.
+"""
+from __future__ import annotations
+
+import argparse
+from array import array
+from dataclasses import dataclass, field
+from itertools import accumulate
+import json
+import os
+from pathlib import Path
+import pickle
+import re
+import struct
+import sys
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import zlib
+
+from build_cache import PROJECT_ROOT, build_version
+from cv_model import CVObjects
+from parse_cache import DEFAULT_MAX_BYTES, ParseCache, parse_key
+
+DEFAULT_INDEX_PATH = PROJECT_ROOT / "build" / "index" / "cvindex.bin"
+
+FIELDS = ("cv", "habilidad", "categoria", "nvhab", "tecnologia", "idioma", "nivel", "organizacion", "expedidor")
+
+# Cambia si cambian los campos o cómo se extraen: el índice viejo se descarta
+_FORMAT = 1
+_MAGIC = b"CVX1"
+_HEADER = struct.Struct("<4sI")  # magic, bytes de la sección de consulta
+
+
+# ---------- términos ----------
+_SPACES = re.compile(r"\s+")
+
+
+def norm(value: str) -> str:
+    """Minúsculas, sin tildes y con los espacios juntados: "  Inglés " -> "ingles"."""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return _SPACES.sub(" ", value).strip().casefold()
+
+
+def cv_terms(objs: CVObjects) -> List[str]:
+    """Términos campo:valor de un cv, ordenados y sin repetir."""
+    terms: Set[str] = set()
+
+    def add(name: str, value: Optional[str], level: Optional[str] = None) -> None:
+        if value and norm(value):
+            terms.add(f"{name}:{norm(value)}")
+            if level:
+                terms.add(f"{name}:{norm(value)}@{norm(level)}")
+
+    add("cv", objs.cv_id)
+    if objs.habilidades:
+        for h in objs.habilidades.habilidades:
+            add("habilidad", h.nombre, h.nivel)
+            add("categoria", h.categoria)
+            add("nvhab", h.nivel)
+    if objs.portafolio:
+        for p in objs.portafolio.proyectos:
+            for t in p.tecnologias:
+                add("tecnologia", t)
+    if objs.idiomas:
+        for i in objs.idiomas.idiomas:
+            add("idioma", i.nombre, i.nivel)
+            add("nivel", i.nivel)
+    if objs.experiencia:
+        for e in objs.experiencia.experiencias:
+            add("organizacion", e.organizacion)
+    if objs.formacion:
+        for f in objs.formacion.items:
+            add("expedidor", f.institucion)
+    return sorted(terms)
+
+
+# ---------- parseo (en el pool) ----------
+_ENGINE = "antlr"
+_PARSE_CACHE: Optional[ParseCache] = None
+
+
+def _init_worker(engine: str, parse_cache: Optional[ParseCache]) -> None:
+    global _ENGINE, _PARSE_CACHE
+    _ENGINE = engine
+    _PARSE_CACHE = parse_cache
+
+
+def _parse_terms(input_path: str) -> Tuple[str, List[Tuple[str, List[str]]], Optional[str]]:
+    # Del pool solo vuelven los términos de cada cv, no los CVObjects
+    if _ENGINE == "rd":
+        from parsers.rd_engine import parse_file
+    else:
+        from parsers.antlr_engine import parse_file
+    try:
+        if _PARSE_CACHE is not None:
+            cvs = _PARSE_CACHE.load_or_parse(Path(input_path), parse_file, engine=_ENGINE)
+        else:
+            cvs = parse_file(input_path)
+    except Exception as e:  # el error de un archivo no para el índice
+        return input_path, [], str(e) or e.__class__.__name__
+    return input_path, [(o.cv_id, cv_terms(o)) for o in cvs], None
+
+
+# ---------- índice ----------
+@dataclass
+class FileEntry:
+    stamp: Tuple[int, int, str]  # mtime_ns, tamaño, parse_key
+    cvs: List[Tuple[str, List[str]]] = field(default_factory=list)  # (cv_id, términos)
+    error: Optional[str] = None
+
+
+def _encode(doc_ids: List[int]) -> bytes:
+    # Ids ordenados guardados como diferencias: números pequeños que zlib comprime bien
+    return array("I", (b - a for a, b in zip([0] + doc_ids, doc_ids))).tobytes()
+
+
+def _decode(data: bytes) -> List[int]:
+    return list(accumulate(array("I", data)))
+
+
+class CVIndex:
+    """
+    Índice en un solo archivo con dos secciones comprimidas (zlib + pickle):
+
+      - consulta: documentos [(archivo, cv_id)] y, por término, la lista de
+        documentos (ids ordenados, en diferencias). Es lo único que lee query.
+      - archivos: por cada entrada, su sello y los términos de cada cv (el
+        índice directo), para actualizar sin reparsear lo que no cambió.
+
+    El archivo es local al proyecto, como la caché de parseo: no se cargan
+    índices de fuera.
+    """
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self.docs: List[Tuple[str, str]] = []
+        self.postings: Dict[str, bytes] = {}
+        self._files: Optional[Dict[str, FileEntry]] = None
+        self._meta: Tuple = ()
+
+    # --- lectura ---
+    @classmethod
+    def load(cls, path: Path = DEFAULT_INDEX_PATH, with_files: bool = False) -> "CVIndex":
+        idx = cls(path)
+        data = idx.path.read_bytes()
+        magic, query_len = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"{idx.path} no es un índice de CVs")
+        query_end = _HEADER.size + query_len
+        idx._meta, idx.docs, idx.postings = pickle.loads(zlib.decompress(data[_HEADER.size:query_end]))
+        if with_files:
+            idx._files = pickle.loads(zlib.decompress(data[query_end:]))
+        return idx
+
+    def lookup(self, term: str) -> Set[int]:
+        data = self.postings.get(term)
+        return set(_decode(data)) if data else set()
+
+    def terms(self, name: str) -> List[Tuple[str, int]]:
+        """(valor, nº de CVs) de un campo, de más a menos frecuente."""
+        prefix = f"{name}:"
+        item = array("I").itemsize
+        out = [(t[len(prefix):], len(d) // item) for t, d in self.postings.items() if t.startswith(prefix) and "@" not in t]
+        return sorted(out, key=lambda x: (-x[1], x[0]))
+
+    # --- actualización ---
+    def update(
+        self,
+        paths: Iterable[Path],
+        engine: str = "antlr",
+        parse_cache: Optional[ParseCache] = None,
+        jobs=None,
+        force: bool = False,
+    ) -> Tuple[int, int, int, List[Tuple[str, str]]]:
+        """
+        Deja el índice con exactamente estos archivos. Devuelve (reparseados,
+        sin cambios, quitados, [(archivo, error)]).
+        """
+        meta = (_FORMAT, engine, build_version())
+        old: Dict[str, FileEntry] = {}
+        if not force and self.path.exists():
+            try:
+                prev = CVIndex.load(self.path, with_files=True)
+                if prev._meta == meta:
+                    old = prev._files or {}
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError, zlib.error):
+                old = {}
+
+        files: Dict[str, FileEntry] = {}
+        todo: List[str] = []
+        for p in sorted(str(Path(p).resolve()) for p in paths):
+            st = os.stat(p)
+            prev_entry = old.get(p)
+            if prev_entry is not None and prev_entry.stamp[:2] == (st.st_mtime_ns, st.st_size):
+                files[p] = prev_entry
+                continue
+            key = parse_key(Path(p), engine)
+            if prev_entry is not None and prev_entry.stamp[2] == key:
+                # tocado pero con el mismo contenido: solo se renueva el sello
+                files[p] = FileEntry((st.st_mtime_ns, st.st_size, key), prev_entry.cvs, prev_entry.error)
+                continue
+            files[p] = FileEntry((st.st_mtime_ns, st.st_size, key))
+            todo.append(p)
+
+        for p, cvs, error in self._parse_all(todo, engine, parse_cache, jobs):
+            files[p].cvs, files[p].error = cvs, error
+
+        self._files = files
+        self._meta = meta
+        self._rebuild()
+        removed = len(set(old) - set(files))
+        errors = [(p, e.error) for p, e in files.items() if e.error is not None]
+        return len(todo), len(files) - len(todo), removed, errors
+
+    @staticmethod
+    def _parse_all(todo: List[str], engine: str, parse_cache: Optional[ParseCache], jobs):
+        if len(todo) <= 1 or jobs == 1:
+            _init_worker(engine, parse_cache)
+            return [_parse_terms(p) for p in todo]
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(todo) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine, parse_cache)) as pool:
+            return list(pool.map(_parse_terms, todo, chunksize=chunksize))
+
+    def _rebuild(self) -> None:
+        # Ids de documento en orden de archivo: las listas salen ya ordenadas
+        docs: List[Tuple[str, str]] = []
+        postings: Dict[str, List[int]] = {}
+        for p, entry in sorted(self._files.items()):
+            for cv_id, terms in entry.cvs:
+                doc = len(docs)
+                docs.append((p, cv_id))
+                for t in terms:
+                    postings.setdefault(t, []).append(doc)
+        self.docs = docs
+        self.postings = {t: _encode(ids) for t, ids in postings.items()}
+
+    def save(self) -> None:
+        query = zlib.compress(pickle.dumps((self._meta, self.docs, self.postings), protocol=pickle.HIGHEST_PROTOCOL))
+        files = zlib.compress(pickle.dumps(self._files or {}, protocol=pickle.HIGHEST_PROTOCOL))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(_HEADER.pack(_MAGIC, len(query)) + query + files)
+        os.replace(tmp, self.path)
+
+
+# ---------- consultas ----------
+_QUERY_TOKEN = re.compile(r'\s*(\(|\)|[^\s()":]+:"[^"]*"(?:@[^\s()]+)?|[^\s()]+)')
+_OPERATORS = ("AND", "OR", "NOT")
+
+
+def _tokenize_query(query: str) -> List[str]:
+    tokens, pos = [], 0
+    query = query.rstrip()
+    while pos < len(query):
+        m = _QUERY_TOKEN.match(query, pos)
+        if m is None:
+            raise ValueError(f"consulta mal formada cerca de: {query[pos:]!r}")
+        tokens.append(m.group(1))
+        pos = m.end()
+    return tokens
+
+
+class _Query:
+    """
+    or  := and ("OR" and)*
+    and := not (["AND"] not)*
+    not := "NOT" not | "(" or ")" | campo:valor
+    """
+
+    def __init__(self, index: CVIndex, tokens: List[str]) -> None:
+        self.index = index
+        self.toks = tokens
+        self.i = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.toks[self.i] if self.i < len(self.toks) else None
+
+    def run(self) -> Set[int]:
+        result = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"sobra {self._peek()!r} en la consulta")
+        return result
+
+    def _or(self) -> Set[int]:
+        result = self._and()
+        while self._peek() == "OR":
+            self.i += 1
+            result = result | self._and()
+        return result
+
+    def _and(self) -> Set[int]:
+        result = self._not()
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.i += 1
+            result = result & self._not()
+        return result
+
+    def _not(self) -> Set[int]:
+        tok = self._peek()
+        if tok is None:
+            raise ValueError("la consulta termina antes de tiempo")
+        self.i += 1
+        if tok == "NOT":
+            return set(range(len(self.index.docs))) - self._not()
+        if tok == "(":
+            result = self._or()
+            if self._peek() != ")":
+                raise ValueError("falta ')' en la consulta")
+            self.i += 1
+            return result
+        if tok in _OPERATORS or tok == ")":
+            raise ValueError(f"no se esperaba {tok!r} en la consulta")
+        name, sep, value = tok.partition(":")
+        if not sep or name not in FIELDS:
+            raise ValueError(f"término sin campo válido: {tok!r} (campos: {', '.join(FIELDS)})")
+        value, at, level = value.replace('"', "").partition("@")
+        value, level = norm(value), norm(level)
+        # "habilidad:", 'idioma:""@c1' o "idioma:ingles@" no buscarían nada que se pueda indexar
+        if not value or (at and not level):
+            raise ValueError(f"término sin valor: {tok!r}")
+        term = f"{name}:{value}" + (f"@{level}" if level else "")
+        return self.index.lookup(term)
+
+
+def query(index: CVIndex, text: str) -> List[Tuple[str, str]]:
+    """(archivo, cv_id) de los CVs que cumplen la consulta, en orden de archivo."""
+    return [index.docs[d] for d in sorted(_Query(index, _tokenize_query(text)).run())]
+
+
+# ---------- CLI ----------
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="Archivo del índice")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Crea o actualiza el índice (solo reparsea lo que cambió)")
+    b.add_argument("--input-dir", required=True, help="Carpeta con los .txt (ej: entradas/)")
+    b.add_argument("--pattern", default="*.txt")
+    b.add_argument("--engine", choices=["antlr", "rd"], default="antlr")
+    b.add_argument("--jobs", type=int, default=None, help="Procesos para parsear (por defecto: nº de CPUs)")
+    b.add_argument("--force", action="store_true", help="Reparsea todo aunque no haya cambiado")
+    b.add_argument("--no-parse-cache", action="store_true", help="No usa la caché de parseo (build/parse)")
+
+    q = sub.add_parser("query", help="CVs que cumplen una consulta booleana")
+    q.add_argument("query", help="Ej: 'idioma:ingles@c1 AND NOT organizacion:acme'")
+    q.add_argument("--json", action="store_true", help="Resultado en JSON")
+    q.add_argument("--count", action="store_true", help="Solo el número de CVs")
+
+    t = sub.add_parser("terms", help="Valores indexados de un campo, con su nº de CVs")
+    t.add_argument("field", choices=FIELDS)
+
+    args = ap.parse_args()
+    index_path = Path(args.index)
+
+    if args.cmd == "build":
+        input_dir = Path(args.input_dir)
+        if not input_dir.is_dir():
+            print(f"[ERROR] No existe la carpeta: {input_dir}", file=sys.stderr)
+            sys.exit(2)
+        cache = None if args.no_parse_cache else ParseCache(max_bytes=DEFAULT_MAX_BYTES)
+        idx = CVIndex(index_path)
+        paths = [p for p in input_dir.glob(args.pattern) if p.is_file()]
+        parsed, fresh, removed, errors = idx.update(paths, args.engine, cache, jobs=args.jobs, force=args.force)
+        idx.save()
+        for p, e in errors:
+            print(f"FALLO {p}: {e}", file=sys.stderr)
+        print(
+            f"OK -> {index_path}: {len(idx.docs)} CV(s), {len(idx.postings)} término(s); "
+            f"{parsed} archivo(s) parseado(s), {fresh} sin cambios, {removed} quitado(s), {len(errors)} con errores"
+        )
+        return
+
+    try:
+        idx = CVIndex.load(index_path)
+    except OSError:
+        print(f"[ERROR] No existe el índice {index_path} (créalo con: cv_index.py build)", file=sys.stderr)
+        sys.exit(2)
+
+    if args.cmd == "terms":
+        for value, n in idx.terms(args.field):
+            print(f"{n:>6}  {value}")
+        return
+
+    try:
+        hits = query(idx, args.query)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(2)
+    if args.count:
+        print(len(hits))
+    elif args.json:
+        json.dump([{"input": p, "cv_id": c} for p, c in hits], sys.stdout, ensure_ascii=False, indent=1)
+        print()
+    else:
+        for p, c in hits:
+            print(f"{p}\t{c}")
+
+
+if __name__ == "__main__":
+    main()
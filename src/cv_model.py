@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from datosPersonales import DatosPersonales
+from formacion import Formacion
+from idiomas import Idiomas
+from experiencia import Experiencia
+from habilidades import Habilidades
+from portafolio import Portafolio
+
+# Modelo de un cv y helpers de texto compartidos por todos los engines.
+# No depende del runtime de ANTLR: lo usan también parsers/rd_engine.py y la
+# caché de parseo.
+
+
+# ---------- helpers de texto ----------
+def unquote(s: str) -> str:
+    s = s.strip()
+    if len(s) >= 2 and s[0] == '"' and s[-1] == '"':
+        return s[1:-1]
+    return s
+
+
+def split_tecnologias(s: str) -> List[str]:
+    raw = s.strip()
+    if not raw:
+        return []
+    if "," in raw:
+        return [t.strip() for t in raw.split(",") if t.strip()]
+    return [t.strip() for t in raw.split() if t.strip()]
+
+
+@dataclass(slots=True)
+class CVObjects:
+    cv_id: str
+    datos: DatosPersonales
+    formacion: Formacion
+    idiomas: Optional[Idiomas]
+    experiencia: Optional[Experiencia]
+    habilidades: Optional[Habilidades]
+    portafolio: Optional[Portafolio]
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Copia completa en dicts/listas: para serializar (JSON, etc.)
+        return {
+            "datos": self.datos.to_dict(),
+            "formacion": self.formacion.to_dict(),
+            "idiomas": self.idiomas.to_dict() if self.idiomas else {"idiomas": []},
+            # FIX: la clave debe ser "experiencia" (no "experiencias")
+            "experiencia": self.experiencia.to_dict() if self.experiencia else {"experiencia": []},
+            "habilidades": self.habilidades.to_dict() if self.habilidades else {"habilidades": []},
+            "portafolio": self.portafolio.to_dict() if self.portafolio else {"proyectos": [], "meritos": []},
+        }
+
+    def view(self) -> Dict[str, Any]:
+        # Contexto para Jinja: una clave por sección de la plantilla. Los
+        # objetos del modelo se pasan tal cual (Jinja lee sus atributos), así
+        # que renderizar no copia nada del CV.
+        return {
+            "datos": self.datos.view(),
+            "formacion": self.formacion.view(),
+            "idiomas": self.idiomas.view() if self.idiomas else {"idiomas": ()},
+            "experiencia": self.experiencia.view() if self.experiencia else {"experiencia": ()},
+            "habilidades": self.habilidades.view() if self.habilidades else {"habilidades": ()},
+            "portafolio": self.portafolio.view() if self.portafolio else {"proyectos": (), "meritos": ()},
+        }
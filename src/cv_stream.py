@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Iterator, Optional, TextIO, Tuple
+
+from antlr4 import InputStream
+
+from cv_model import CVObjects
+from parsers.antlr_engine import AntlrParser
+
+# Lo único que cambia la profundidad de llaves: comentarios, cadenas y { }
+_SCAN = re.compile(r'/\*|\*/|[{}"]')
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_GVAR = re.compile(r"\s*(?:/\*.*?\*/\s*)*gvar\b", re.S)
+
+_NORMAL, _IN_COMMENT, _IN_STRING = 0, 1, 2
+
+
+def split_top_level_blocks(fh: TextIO) -> Iterator[Tuple[int, str]]:
+    """
+    Trocea la entrada en bloques de primer nivel (`gvar { }` y cada `cv ... { }`)
+    leyendo línea a línea, sin cargar el archivo entero. Devuelve
+    (línea donde empieza el trozo, texto). Las llaves dentro de comentarios
+    o de "cadenas" no cuentan. Si queda texto sin cerrar al final, se devuelve
+    tal cual para que el parser informe del error.
+    """
+    state = _NORMAL
+    depth = 0
+    buf = []
+    start_line = 1
+
+    for lineno, line in enumerate(fh, start=1):
+        pos = 0
+        for m in _SCAN.finditer(line):
+            tok = m.group()
+            if state == _IN_COMMENT:
+                if tok == "*/":
+                    state = _NORMAL
+                continue
+            if state == _IN_STRING:
+                if tok == '"':
+                    state = _NORMAL
+                continue
+            if tok == "/*":
+                state = _IN_COMMENT
+            elif tok == '"':
+                state = _IN_STRING
+            elif tok == "{":
+                depth += 1
+            elif tok == "}":
+                depth -= 1
+                if depth <= 0:
+                    buf.append(line[pos : m.end()])
+                    yield start_line, "".join(buf)
+                    buf = []
+                    pos = m.end()
+                    start_line = lineno
+                    depth = 0
+        buf.append(line[pos:])
+
+    rest = "".join(buf)
+    if state != _NORMAL or _COMMENT.sub("", rest).strip():
+        yield start_line, rest
+
+
+def iter_cv_sources(fh: TextIO) -> Iterator[Tuple[int, str]]:
+    """
+    (línea, texto listo para parsear) por cada cv del archivo. Si hay un
+    bloque `gvar`, va delante de cada cv y la línea se compensa para que los
+    errores apunten al archivo original. Sin ningún cv se devuelve lo que
+    haya, para que el parser dé el error de siempre.
+    """
+    gvar: Optional[str] = None
+    gvar_line = 1
+    seen_cv = False
+    for first_line, text in split_top_level_blocks(fh):
+        if gvar is None and not seen_cv and _GVAR.match(text):
+            gvar, gvar_line = text, first_line
+            continue
+        seen_cv = True
+        if gvar is None:
+            yield first_line, text
+        else:
+            yield first_line - gvar.count("\n"), gvar + text
+    if not seen_cv:
+        yield gvar_line, gvar or ""
+
+
+class CVStreamParser:
+    """
+    Parsea un archivo cv a cv: cada bloque se lexea, parsea y visita por
+    separado y se descarta antes de pasar al siguiente, así que la memoria
+    máxima depende del cv más grande y no del tamaño del archivo. Si hay un
+    bloque `gvar`, se antepone a cada cv para que se parsee igual que en el
+    archivo completo.
+    """
+
+    def __init__(self) -> None:
+        self._antlr = AntlrParser()
+
+    def parse_block(self, text: str, first_line: int) -> CVObjects:
+        # Números de línea del archivo original
+        try:
+            return self._antlr.parse(InputStream(text), first_line)[0]
+        except ValueError as e:
+            raise ValueError(f"{e} en el cv que empieza en la línea {first_line}") from None
+
+    def iter_file(self, fh: TextIO) -> Iterator[CVObjects]:
+        for first_line, text in iter_cv_sources(fh):
+            yield self.parse_block(text, first_line)
+
+    def iter_path(self, input_path) -> Iterator[CVObjects]:
+        with open(input_path, "r", encoding="utf-8") as fh:
+            yield from self.iter_file(fh)
+
+
+def iter_cvs(input_path) -> Iterator[CVObjects]:
+    """Generador de CVObjects, uno por bloque cv, con memoria acotada."""
+    return CVStreamParser().iter_path(Path(input_path))
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, asdict
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class DatosPersonales:
     nombre: str
     foto: Optional[str] = None
@@ -14,4 +14,8 @@ class DatosPersonales:
     web: Optional[str] = None
 
     def to_dict(self):
-        return asdict(self)
\ No newline at end of file
+        return asdict(self)
+
+    def view(self):
+        # La plantilla lee los atributos directamente, sin copiar a un dict
+        return self
\ No newline at end of file
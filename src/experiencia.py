@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field, asdict
+from interning import intern_opt
 from typing import List, Optional, Literal
 
 ############### si usamos enums es mejor pero se complica bastante ####################
@@ -8,7 +9,7 @@ from typing import List, Optional, Literal
 #     LABORAL = "laboral"
 #     VOLUNTARIADO = "voluntariado"
 
-@dataclass
+@dataclass(slots=True)
 class ExperienciaItem:
     # tipo: TipoExperiencia
     tipo: Literal["laboral", "voluntariado"]
@@ -17,9 +18,15 @@ class ExperienciaItem:
     descripcion: Optional[str] = None
     horas: Optional[int] = None
 
-@dataclass
+    def __post_init__(self):
+        self.organizacion = intern_opt(self.organizacion)
+
+@dataclass(slots=True)
 class Experiencia:
     experiencias: List[ExperienciaItem] = field(default_factory=list)
 
     def to_dict(self):
-        return {"experiencia": [asdict(e) for e in self.experiencias]}
\ No newline at end of file
+        return {"experiencia": [asdict(e) for e in self.experiencias]}
+
+    def view(self):
+        return {"experiencia": self.experiencias}
\ No newline at end of file
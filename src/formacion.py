@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field, asdict
+from interning import intern_opt
 from typing import List, Optional, Literal
 
 ############### si usamos enums es mejor pero se complica bastante ####################
@@ -8,7 +9,7 @@ from typing import List, Optional, Literal
 #     OFICIAL = "oficial"
 #     COMPLEMENTARIA = "complementaria"
 
-@dataclass
+@dataclass(slots=True)
 class FormacionItem:
     titulo: str
     institucion: str
@@ -19,9 +20,15 @@ class FormacionItem:
     en_curso: bool = False
     # tipo: TipoFormacion
 
-@dataclass
+    def __post_init__(self):
+        self.institucion = intern_opt(self.institucion)
+
+@dataclass(slots=True)
 class Formacion:
     items: List[FormacionItem] = field(default_factory=list)
 
     def to_dict(self):
-        return {"formacion": [asdict(i) for i in self.items]}
\ No newline at end of file
+        return {"formacion": [asdict(i) for i in self.items]}
+
+    def view(self):
+        return {"formacion": self.items}
\ No newline at end of file
@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field, asdict
+from interning import intern_opt
 from typing import List, Optional, Literal
 
 ############### si usamos enums es mejor pero se complica bastante ####################
@@ -8,7 +9,7 @@ from typing import List, Optional, Literal
 #     SOFT = "soft"
 #     HARD = "hard"
 
-@dataclass
+@dataclass(slots=True)
 class Habilidad:
     nombre: str
     # tipo: TipoHabilidad
@@ -16,9 +17,17 @@ class Habilidad:
     categoria: Optional[str] = None
     nivel: Optional[str] = None
 
-@dataclass
+    def __post_init__(self):
+        self.nombre = intern_opt(self.nombre)
+        self.categoria = intern_opt(self.categoria)
+        self.nivel = intern_opt(self.nivel)
+
+@dataclass(slots=True)
 class Habilidades:
     habilidades: List[Habilidad] = field(default_factory=list)
 
     def to_dict(self):
-        return {"habilidades": [asdict(h) for h in self.habilidades]}
\ No newline at end of file
+        return {"habilidades": [asdict(h) for h in self.habilidades]}
+
+    def view(self):
+        return {"habilidades": self.habilidades}
\ No newline at end of file
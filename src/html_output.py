@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+import re
+import sys
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+import zlib
+
+try:
+    import brotli
+except ImportError:  # sin brotli solo se genera el .gz
+    brotli = None
+
+# Formatos de compresión: nombre en --compress -> sufijo del archivo hermano
+SUFFIXES = {"gz": ".gz", "br": ".br"}
+# Sube si cambia lo que produce el minificador: va en la clave de build (signature)
+_MINIFY_VERSION = 2
+
+# Elementos de bloque (y del <head>): el espacio en blanco junto a ellos no se ve
+_BLOCK = frozenset(
+    """html head body title meta link base style script noscript div p ul ol li dl dt dd
+    h1 h2 h3 h4 h5 h6 section header footer nav main article aside figure figcaption
+    blockquote pre table thead tbody tfoot tr td th caption form fieldset legend hr br
+    details summary address option select""".split()
+)
+_RAW = ("pre", "textarea", "script", "style")  # contenido que no se toca (style se minifica como CSS)
+
+_RAW_OPEN = re.compile(r"<(pre|textarea|script|style)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>", re.I)
+_RAW_CLOSE = {name: re.compile(rf"</{name}\s*>", re.I) for name in _RAW}
+_TAG = re.compile(r"<(?:[^>\"']|\"[^\"]*\"|'[^']*')*>")
+_TAG_NAME = re.compile(r"</?([a-zA-Z][\w-]*)")
+_WS = re.compile(r"\s+")
+
+_CSS_STRING = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON = re.compile(r":\s+")
+# "color :red" dentro de un bloque; "a :hover{" es un selector (el espacio cuenta) y no entra
+_CSS_DECL_COLON = re.compile(r"([{;][\w-]+)\s+:(?=[^{};]*(?:[;}]|$))")
+
+
+def minify_css(css: str) -> str:
+    """Comentarios y espacios sobrantes fuera de las cadenas; no cambia selectores ni valores."""
+    parts = _CSS_STRING.split(css)
+    for i in range(0, len(parts), 2):  # las impares son cadenas
+        p = _CSS_COMMENT.sub("", parts[i])
+        p = _WS.sub(" ", p)
+        p = _CSS_DECL_COLON.sub(r"\1:", _CSS_PUNCT.sub(r"\1", p))
+        p = _CSS_COLON.sub(":", p)
+        parts[i] = p.replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def _is_block(tag: Optional[str]) -> bool:
+    # None: <!DOCTYPE>, principio o final del documento
+    return tag is None or tag in _BLOCK
+
+
+class HtmlMinifier:
+    """
+    Minificador de HTML por trozos (feed/close) para la salida de Template.generate():
+
+      - quita comentarios (salvo los condicionales <!--[if ...]>)
+      - junta cada tramo de espacios del texto en uno y quita los que van
+        pegados a un elemento de bloque, donde el navegador tampoco los pinta
+      - minifica el CSS de <style>; <pre>, <textarea> y <script> quedan igual
+      - las etiquetas (y sus atributos) se copian tal cual
+
+    Solo se guarda entre trozos lo que aún no se puede decidir (una etiqueta o
+    un texto a medias, o un <style>/<pre> sin cerrar).
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._prev: Optional[str] = None  # última etiqueta emitida
+        self._space = False  # lo último emitido es texto que acaba en espacio
+
+    def feed(self, text: str) -> str:
+        self._buf += text
+        return self._run(final=False)
+
+    def close(self) -> str:
+        return self._run(final=True)
+
+    def _text(self, text: str, next_tag: Optional[str]) -> str:
+        if not text.strip():
+            return "" if _is_block(self._prev) or _is_block(next_tag) else " "
+        out = _WS.sub(" ", text)
+        if _is_block(self._prev):
+            out = out.lstrip()
+        if _is_block(next_tag):
+            out = out.rstrip()
+        return out
+
+    def _emit_text(self, out: List[str], text: str, next_tag: Optional[str]) -> None:
+        # Con un comentario en medio, "a <!-- x --> b" son dos textos: el
+        # espacio que ya salió con el primero no se repite en el segundo
+        text = self._text(text, next_tag)
+        if self._space:
+            text = text.lstrip(" ")
+        if text:
+            out.append(text)
+            self._space = text.endswith(" ")
+
+    def _run(self, final: bool) -> str:
+        buf, out, i, n = self._buf, [], 0, len(self._buf)
+        while i < n:
+            if buf[i] != "<":
+                j = buf.find("<", i)
+                if j < 0:
+                    if not final:
+                        break  # el texto puede seguir en el siguiente trozo
+                    self._emit_text(out, buf[i:], None)
+                    i = n
+                    break
+                m = _TAG_NAME.match(buf, j)
+                if (m is None or m.end() == n) and n - j < 64 and not final:
+                    break  # todavía no se sabe qué etiqueta viene
+                if m is not None:
+                    next_tag = m.group(1).lower()
+                else:
+                    # un comentario desaparece: el espacio de alrededor sí cuenta
+                    next_tag = "#comment" if buf.startswith("<!--", j) else None
+                self._emit_text(out, buf[i:j], next_tag)
+                i = j
+                continue
+
+            if buf.startswith("<!--", i):
+                end = buf.find("-->", i + 4)
+                if end < 0 and not final:
+                    break
+                end = n if end < 0 else end + 3
+                if buf.startswith("<!--[if", i):
+                    out.append(buf[i:end])
+                    self._space = False
+                i = end
+                continue
+
+            m = _RAW_OPEN.match(buf, i)
+            if m:
+                name = m.group(1).lower()
+                close = _RAW_CLOSE[name].search(buf, m.end())
+                if close is None and not final:
+                    break
+                body_end = close.start() if close else n
+                body = buf[m.end():body_end]
+                if name == "style":
+                    body = minify_css(body)
+                out.append(m.group(0) + body + (close.group(0) if close else ""))
+                i = close.end() if close else n
+                self._prev = name
+                self._space = False
+                continue
+
+            m = _TAG.match(buf, i)
+            if m is None:
+                if not final:
+                    break  # etiqueta a medias
+                out.append(buf[i:])
+                i = n
+                break
+            out.append(m.group(0))
+            self._space = False
+            name = _TAG_NAME.match(m.group(0))
+            self._prev = name.group(1).lower() if name else None
+            i = m.end()
+
+        self._buf = buf[i:]
+        return "".join(out)
+
+
+def minify_html(chunks: Iterable[str], batch: int = 256) -> Iterator[str]:
+    # generate() da trozos muy pequeños: se juntan de batch en batch para que
+    # cada pasada del minificador trabaje sobre un bloque de texto razonable
+    m = HtmlMinifier()
+    it = iter(chunks)
+    while True:
+        block = list(islice(it, batch))
+        if not block:
+            break
+        out = m.feed("".join(block))
+        if out:
+            yield out
+    yield m.close()
+
+
+# ---------- compresión ----------
+class _Gzip:
+    suffix = ".gz"
+
+    def __init__(self) -> None:
+        # wbits=31: formato gzip, con mtime 0 en la cabecera (salida reproducible)
+        self._c = zlib.compressobj(9, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _Brotli:
+    suffix = ".br"
+
+    def __init__(self) -> None:
+        self._c = brotli.Compressor(mode=brotli.MODE_TEXT, quality=11)
+
+    def process(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+@dataclass(frozen=True)
+class OutputStage:
+    """
+    Etapa final de cada página: minificado y archivos hermanos comprimidos
+    (index.html.gz, index.html.br) para servirlos tal cual desde un servidor
+    estático. Se aplica mientras se escribe (render_engine.write_chunks).
+    """
+
+    minify: bool = False
+    compress: Tuple[str, ...] = ()
+
+    def signature(self) -> str:
+        return f"minify={_MINIFY_VERSION if self.minify else 0};compress={','.join(self.compress)}"
+
+    def apply(self, chunks: Iterable[str]) -> Iterable[str]:
+        return minify_html(chunks) if self.minify else chunks
+
+    def compressors(self) -> List:
+        return [_Gzip() if fmt == "gz" else _Brotli() for fmt in self.compress]
+
+    def siblings(self, out_path: Path) -> List[Path]:
+        return [Path(f"{out_path}{SUFFIXES[fmt]}") for fmt in self.compress]
+
+
+def output_stage(minify: bool = False, compress: Sequence[str] = ()) -> Optional[OutputStage]:
+    """OutputStage de las opciones del CLI; None si no hay nada que hacer."""
+    formats = []
+    for fmt in compress:
+        if fmt not in SUFFIXES:
+            raise ValueError(f"formato de compresión desconocido: {fmt} (usa {', '.join(SUFFIXES)})")
+        if fmt == "br" and brotli is None:
+            print("[aviso] sin el paquete brotli: no se generan los .br", file=sys.stderr)
+            continue
+        if fmt not in formats:
+            formats.append(fmt)
+    if not minify and not formats:
+        return None
+    return OutputStage(minify=minify, compress=tuple(formats))
@@ -1,15 +1,24 @@
 from dataclasses import dataclass, field, asdict
+from interning import intern_opt
 from typing import List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class Idioma:
     nombre: str
     nivel: str
     expedidor: Optional[str] = None
 
-@dataclass
+    def __post_init__(self):
+        self.nombre = intern_opt(self.nombre)
+        self.nivel = intern_opt(self.nivel)
+        self.expedidor = intern_opt(self.expedidor)
+
+@dataclass(slots=True)
 class Idiomas:
     idiomas: List[Idioma] = field(default_factory=list)
 
     def to_dict(self):
-        return {"idiomas": [asdict(i) for i in self.idiomas]}
\ No newline at end of file
+        return {"idiomas": [asdict(i) for i in self.idiomas]}
+
+    def view(self):
+        return {"idiomas": self.idiomas}
\ No newline at end of file
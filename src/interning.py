@@ -0,0 +1,12 @@
+import sys
+from typing import List, Optional
+
+
+def intern_opt(s: Optional[str]) -> Optional[str]:
+    # Valores que se repiten mucho entre CVs (organizaciones, niveles,
+    # tecnologías...): una sola copia en memoria para todo el corpus
+    return sys.intern(s) if s else s
+
+
+def intern_list(values: List[str]) -> List[str]:
+    return [sys.intern(v) for v in values]
@@ -1,77 +1,517 @@
 import argparse
 from pathlib import Path
 import sys
+from typing import List, Optional
 
-from antlr4 import FileStream, CommonTokenStream
-from jinja2 import Environment, FileSystemLoader
+# Solo lo que necesita cualquier ejecución. El runtime de ANTLR, Jinja, el pool
+# de procesos, el servidor de --watch... se importan en la rama que los usa:
+# con un solo CV el arranque pesa más que el parseo (ver bench/check_startup.py).
+from cv_model import CVObjects
+from build_cache import BuildManifest, build_key, stage_signature
+from metrics import Metrics, count_tree_nodes
+from parse_cache import DEFAULT_MAX_BYTES, ParseCache, parse_key
 
-from CVLangLexer import CVLangLexer
-from CVLangParser import CVLangParser
+# Lo que --template recoge de una carpeta; las html además pasan por --minify y --assets
+HTML_SUFFIXES = (".html", ".htm")
+TEMPLATE_SUFFIXES = HTML_SUFFIXES + (".md", ".txt")
 
-from cv_builder import BuildObjectsVisitor
 
+def parse_cvs(
+    input_path: str,
+    metrics: Optional[Metrics] = None,
+    cache: Optional[ParseCache] = None,
+    engine: str = "antlr",
+) -> List[CVObjects]:
+    """
+    Parsea el archivo una sola vez y devuelve un CVObjects por cada bloque cv.
+    Con cache, si la misma entrada ya se parseó (con la misma gramática) se
+    cargan los CVObjects guardados sin pasar por lexer/parser/visitor.
+    engine="rd" usa el parser escrito a mano (parsers/rd_engine.py).
+    """
+    m = metrics or Metrics(enabled=False)
 
-def parse_cv(input_path: str):
-    stream = FileStream(input_path, encoding="utf-8")
-    lexer = CVLangLexer(stream)
-    tokens = CommonTokenStream(lexer)
-    parser = CVLangParser(tokens)
+    key = None
+    if cache is not None:
+        with m.phase("cache_load"):
+            key = parse_key(Path(input_path), engine)
+            cvs = cache.get(key)
+        if cvs is not None:
+            m.count("parse_cache_hits")
+            m.count("cvs", len(cvs))
+            return cvs
 
-    # Regla raíz: start
-    tree = parser.start()
+    if engine == "rd":
+        with m.phase("imports"):
+            from parsers import rd_engine
 
-    visitor = BuildObjectsVisitor()
-    objs = visitor.visit(tree)
-    return objs
+        with m.phase("read"):
+            with open(input_path, "r", encoding="utf-8") as f:
+                text = f.read()
+        with m.phase("lex"):
+            tokens = rd_engine.tokenize(text)
+        with m.phase("parse"):
+            cvs = rd_engine.parse_tokens(tokens)
+        if key is not None:
+            with m.phase("cache_store"):
+                cache.put(key, cvs)
+        if m.enabled:
+            m.count("input_bytes", len(text.encode("utf-8")))
+            m.count("tokens", len(tokens))
+            m.count("cvs", len(cvs))
+        return cvs
+
+    with m.phase("imports"):
+        from antlr4 import FileStream
+
+        from cv_builder import BuildObjectsVisitor
+        from parsers.antlr_engine import shared_parser
+
+        antlr = shared_parser()
+
+    with m.phase("read"):
+        stream = FileStream(input_path, encoding="utf-8")
+    with m.phase("lex"):
+        tokens = antlr.tokens(stream)
+        tokens.fill()
+    with m.phase("parse"):
+        # Regla raíz: start (SLL rápido y LL completo solo si hace falta)
+        tree = antlr.tree(tokens)
+    with m.phase("visit"):
+        cvs = BuildObjectsVisitor().visit(tree)
+
+    # Solo se guarda lo que parseó sin errores (los errores salen por stderr, como siempre)
+    if key is not None and antlr.syntax_errors == 0:
+        with m.phase("cache_store"):
+            cache.put(key, cvs)
+
+    if m.enabled:
+        m.count("input_bytes", len(stream.strdata.encode("utf-8")))
+        m.count("tokens", len(tokens.tokens))
+        m.count("tree_nodes", count_tree_nodes(tree))
+        m.count("cvs", len(cvs))
+    return cvs
+
+
+def parse_cv(input_path: str) -> CVObjects:
+    # Compatibilidad: solo el primer cv del archivo
+    return parse_cvs(input_path)[0]
 
 
 def render_html(objs, template_path: str) -> str:
-    template_path = Path(template_path)
-    env = Environment(loader=FileSystemLoader(str(template_path.parent)))
-    template = env.get_template(template_path.name)
-
-    html = template.render(
-        datos=objs.datos.to_dict(),
-        formacion=objs.formacion.to_dict(),
-        idiomas=objs.idiomas.to_dict() if objs.idiomas else {"idiomas": []},
-        # FIX: la clave debe ser "experiencia" (no "experiencias")
-        experiencia=objs.experiencia.to_dict() if objs.experiencia else {"experiencia": []},
-        habilidades=objs.habilidades.to_dict() if objs.habilidades else {"habilidades": []},
-        portafolio=objs.portafolio.to_dict() if objs.portafolio else {"proyectos": [], "meritos": []},
-    )
-    return html
+    from render_engine import get_renderer
+
+    # El Renderer compartido compila cada plantilla una sola vez por proceso
+    return get_renderer().render_cv(objs, template_path)
 
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--input", required=True, help="Ruta al .txt (ej: entradas/entrada.txt)")
-    ap.add_argument("--template", required=True, help="Ruta al .html (ej: templates/plantilla_cv.html)")
-    ap.add_argument("--out", required=True, help="Ruta de salida (ej: index.html)")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--input", help="Ruta al .txt (ej: entradas/entrada.txt)")
+    src.add_argument("--input-dir", help="Carpeta con varios .txt (ej: entradas/); requiere --out-dir o --check")
+    ap.add_argument(
+        "--template",
+        nargs="+",
+        help="Plantilla .html/.htm/.md/.txt (ej: templates/plantilla1.html); con varias plantillas o una carpeta, "
+        "--out es la carpeta de salida y cada plantilla da un archivo con su nombre",
+    )
+    out = ap.add_mutually_exclusive_group()
+    out.add_argument("--out", help="Ruta de salida (ej: index.html); solo se renderiza el primer cv")
+    out.add_argument("--out-dir", help="Carpeta de salida: un .html por cada cv (ej: site/)")
+    ap.add_argument("--jobs", type=int, default=None, help="Procesos para renderizar con --out-dir o varias plantillas, o validar con --check (por defecto: nº de CPUs)")
+    ap.add_argument("--force", action="store_true", help="Ignora la caché de build y regenera todas las salidas")
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Con --input y --out-dir: parsea cv a cv con memoria acotada (archivos muy grandes)",
+    )
+    ap.add_argument(
+        "--watch",
+        action="store_true",
+        help="Con --out-dir: reconstruye al cambiar entradas/plantilla/styles.css y sirve una vista previa",
+    )
+    ap.add_argument("--port", type=int, default=8000, help="Puerto de la vista previa de --watch (0 = sin servidor)")
+    ap.add_argument(
+        "--metrics",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="Tiempos por fase y contadores (tokens, nodos, bytes, memoria) por stderr",
+    )
+    ap.add_argument(
+        "--engine",
+        choices=["antlr", "rd", "flexcup"],
+        default="antlr",
+        help="Parser: antlr (generado) o rd (escrito a mano, sin runtime de ANTLR); --stream y --watch usan antlr. "
+        "flexcup (el parser de CUP en una JVM por proceso, ver parsers/flexcup_pool.py) solo con --emit "
+        "o con --input-dir y --out-dir",
+    )
+    ap.add_argument(
+        "--restore-dfa",
+        action="store_true",
+        help="Con antlr: carga antes las DFA guardadas con src/parsers/antlr_warmup.py --save "
+        "(los procesos del pool de --input-dir, --check y --emit ya las cargan)",
+    )
+    ap.add_argument("--no-parse-cache", action="store_true", help="No usa la caché de parseo (build/parse)")
+    ap.add_argument(
+        "--parse-cache-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Tamaño máximo de la caché de parseo; se borran las entradas menos usadas",
+    )
+    ap.add_argument(
+        "--assets",
+        action="store_true",
+        help="Fotos al tamaño de la plantilla, nombres con hash (styles.<hash>.css) y CSS crítico en línea",
+    )
+    ap.add_argument("--minify", action="store_true", help="Minifica el HTML y el CSS de <style> al escribir")
+    ap.add_argument(
+        "--compress",
+        nargs="?",
+        const="gz,br",
+        metavar="gz,br",
+        help="Escribe también <salida>.gz y/o <salida>.br junto a cada .html (por defecto los dos)",
+    )
+    ap.add_argument(
+        "--check",
+        action="store_true",
+        help="Solo valida (lexer y parser): informa de todos los errores con línea y columna, sin renderizar",
+    )
+    ap.add_argument(
+        "--check-format",
+        choices=["json", "text"],
+        default="json",
+        help="Informe de --check por stdout: json o texto archivo:línea:columna: mensaje",
+    )
+    ap.add_argument(
+        "--emit",
+        choices=["json", "ndjson"],
+        help="Sin renderizar: CVs en el esquema canónico de cv_export.py (ndjson = un cv por línea) a --out o stdout",
+    )
+    ap.add_argument("--profile", metavar="ARCHIVO", help="Guarda un volcado de cProfile de la ejecución (ej: build.prof)")
     args = ap.parse_args()
+    if not (args.check or args.emit) and not args.template:
+        ap.error("falta --template")
+    if not (args.check or args.emit) and not (args.out or args.out_dir):
+        ap.error("falta --out o --out-dir")
+    if args.emit and args.out_dir:
+        ap.error("--emit escribe un solo archivo: usa --out (o nada para stdout)")
+    if args.engine == "flexcup" and (
+        not (args.emit or (args.input_dir and args.out_dir)) or args.check or args.stream or args.watch
+    ):
+        ap.error("--engine flexcup solo con --emit o con --input-dir y --out-dir (sin --check, --stream ni --watch)")
 
-    input_path = Path(args.input)
-    template_path = Path(args.template)
-    out_path = Path(args.out)
+    metrics = Metrics(enabled=bool(args.metrics))
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(args, metrics)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Perfil -> {args.profile}", file=sys.stderr)
+        if args.metrics:
+            metrics.report(args.metrics)
+
+
+def resolve_templates(specs: List[str]) -> List[Path]:
+    # Las carpetas se expanden a sus plantillas, en orden
+    paths: List[Path] = []
+    for spec in specs:
+        p = Path(spec)
+        if p.is_dir():
+            paths.extend(sorted(q for q in p.iterdir() if q.is_file() and q.suffix in TEMPLATE_SUFFIXES))
+        else:
+            paths.append(p)
+    return paths
 
+
+def _siblings(output, paths) -> List[str]:
+    # .gz/.br de cada salida: también van al manifiesto (si falta uno, se regenera)
+    if output is None:
+        return []
+    return [str(s) for p in paths for s in output.siblings(Path(p))]
+
+
+def _fail(message: str, code: int = 2) -> None:
+    print(f"[ERROR] {message}", file=sys.stderr)
+    sys.exit(code)
+
+
+def _input_dir(args) -> Path:
+    input_dir = Path(args.input_dir)
+    if not input_dir.is_dir():
+        _fail(f"No existe la carpeta: {input_dir}")
+    return input_dir
+
+
+def _input_path(args) -> Path:
+    input_path = Path(args.input)
     if not input_path.exists():
-        print(f"[ERROR] No existe input: {input_path}", file=sys.stderr)
-        sys.exit(2)
+        _fail(f"No existe input: {input_path}")
+    return input_path
+
 
-    if not template_path.exists():
-        print(f"[ERROR] No existe template: {template_path}", file=sys.stderr)
-        sys.exit(2)
+def _parse_cache(args) -> Optional[ParseCache]:
+    return None if args.no_parse_cache else ParseCache(max_bytes=args.parse_cache_mb * 1024 * 1024)
 
-    objs = parse_cv(str(input_path))
-    html = render_html(objs, str(template_path))
 
-    out_path.write_text(html, encoding="utf-8")
+def run_check(args, metrics: Metrics) -> None:
+    from check import check_and_report
 
-    if not out_path.exists() or out_path.stat().st_size == 0:
-        print("[ERROR] index.html no se generó o está vacío", file=sys.stderr)
-        sys.exit(3)
+    # Con --input no se mira antes si existe: el informe lo da como error del archivo
+    paths = sorted(str(p) for p in _input_dir(args).glob("*.txt") if p.is_file()) if args.input_dir else [args.input]
+    if not check_and_report(paths, args.engine, args.jobs, args.check_format, metrics):
+        sys.exit(1)
 
+
+def run_emit(args, metrics: Metrics) -> None:
+    from cv_export import emit_cvs, emit_paths
+
+    fallos = []
+    if args.input_dir:
+        paths = sorted(str(p) for p in _input_dir(args).glob("*.txt") if p.is_file())
+        with metrics.phase("emit"):
+            written, fallos = emit_paths(paths, args.engine, args.emit, args.out, jobs=args.jobs)
+    elif args.engine == "flexcup":
+        # Un archivo con flexcup: el mismo camino (y la misma JVM por proceso) que una carpeta
+        with metrics.phase("emit"):
+            written, fallos = emit_paths([str(_input_path(args))], "flexcup", args.emit, args.out)
+    else:
+        input_path = _input_path(args)
+        if args.stream:
+            from cv_stream import iter_cvs
+
+            # El parseo ocurre dentro de la fase emit, cv a cv
+            cvs, engine = iter_cvs(input_path), "antlr"
+        else:
+            cvs, engine = parse_cvs(str(input_path), metrics, _parse_cache(args), args.engine), args.engine
+        with metrics.phase("emit"):
+            written = emit_cvs(cvs, engine, str(input_path), args.emit, args.out)
+    metrics.set("output_bytes", written)
+    if args.out:
+        print(f"OK -> {args.out} generado", file=sys.stderr)
+    if fallos:
+        sys.exit(1)
+
+
+def _output_stage(args, html: bool = True):
+    if not (args.minify and html) and not args.compress:
+        return None
+    from html_output import output_stage
+
+    try:
+        return output_stage(args.minify and html, args.compress.split(",") if args.compress else ())
+    except ValueError as e:
+        _fail(str(e))
+
+
+def _assets(args, metrics: Metrics, template_path: Path, out_dir: Path):
+    if not args.assets:
+        return None
+    from assets import AssetPipeline
+
+    with metrics.phase("assets"):
+        return AssetPipeline(template_path, out_dir)
+
+
+def _check_written(path, size: int) -> None:
+    if size == 0:
+        _fail(f"{path} no se generó o está vacío", 3)
+
+
+def run_many(args, metrics: Metrics, templates: List[Path], cache: Optional[ParseCache]) -> None:
+    """
+    Un CV en varias plantillas: se parsea y se construye el contexto una sola
+    vez y las salidas (una por plantilla, con su nombre, en la carpeta --out)
+    se renderizan a la vez en un pool de procesos (batch.render_targets).
+    """
+    if args.input_dir or args.out_dir or args.watch:
+        _fail("Varias plantillas solo con --input y --out (carpeta de salida)")
+    names = [t.name for t in templates]
+    dup = sorted({n for n in names if names.count(n) > 1})
+    if dup:
+        _fail(f"Plantillas con el mismo nombre de salida: {', '.join(dup)}")
+    input_path = _input_path(args)
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Minificado, CSS crítico y fotos solo tienen sentido en las plantillas html
+    targets = []
+    for template_path in templates:
+        html = template_path.suffix in HTML_SUFFIXES
+        assets = _assets(args, metrics, template_path, out_dir) if html else None
+        targets.append((template_path, out_dir / template_path.name, assets, _output_stage(args, html)))
+
+    # Una sola entrada de manifiesto para el conjunto: cambia si cambia cualquier plantilla
+    key = ",".join(build_key(input_path, t, extra=stage_signature(a, o), engine=args.engine) for t, _, a, o in targets)
+    outputs = [str(p) for _, p, _, _ in targets]
+    for _, p, _, o in targets:
+        outputs += _siblings(o, [p])
+    manifest = BuildManifest.for_dir(out_dir)
+    if not args.force and manifest.is_fresh(input_path, key, outputs):
+        print(f"OK -> {out_dir} sin cambios (usa --force para regenerar)")
+        return
+
+    objs = parse_cvs(str(input_path), metrics, cache, args.engine)[0]
+    with metrics.phase("context"):
+        context = objs.view()
+    pages = []
+    for template_path, out_path, assets, output in targets:
+        page = context
+        if assets is not None:
+            with metrics.phase("assets"):
+                page = assets.page_context(context)
+        pages.append((template_path, out_path, page, assets, output))
+    with metrics.phase("imports"):
+        from batch import render_targets
+    with metrics.phase("render"):
+        sizes = render_targets(pages, jobs=args.jobs)
+    metrics.set("outputs", len(sizes))
+    metrics.set("output_bytes", sum(sizes))
+
+    for (_, out_path, _, _, _), size in zip(pages, sizes):
+        _check_written(out_path, size)
+    manifest.record(input_path, key, outputs)
+    manifest.save()
+    for _, out_path, _, _, _ in pages:
+        print(f"OK -> {out_path} generado")
+
+
+def run_input_dir(args, metrics: Metrics, template_path: Path, cache: Optional[ParseCache], assets, output) -> None:
+    input_dir = _input_dir(args)
+    if not args.out_dir:
+        _fail("--input-dir requiere --out-dir")
+    from batch import build_dir, print_results
+
+    with metrics.phase("build_dir"):
+        results = build_dir(
+            input_dir,
+            str(template_path),
+            Path(args.out_dir),
+            jobs=args.jobs,
+            force=args.force,
+            parse_cache=cache,
+            engine=args.engine,
+            assets=assets,
+            output=output,
+        )
+    metrics.set("files", len(results))
+    metrics.set("outputs", sum(len(r.outputs) for r in results if r.ok and not r.cached))
+    if print_results(results):
+        sys.exit(1)
+
+
+def run_out_dir(args, metrics: Metrics, template_path: Path, cache: Optional[ParseCache], assets, output) -> None:
+    # Un archivo, un .html por cada cv
+    input_path = _input_path(args)
+    # --stream parsea siempre con antlr (cv_stream)
+    engine = "antlr" if args.stream else args.engine
+    key = build_key(input_path, template_path, extra=stage_signature(assets, output), engine=engine)
+    manifest = BuildManifest.for_dir(Path(args.out_dir))
+    if not args.force and manifest.is_fresh(input_path, key):
+        print(f"OK -> {args.out_dir} sin cambios (usa --force para regenerar)")
+        return
+
+    from batch import render_all
+
+    # --stream no pasa por la caché: guardaría el archivo entero de una vez
+    if args.stream:
+        from cv_stream import iter_cvs
+
+        cvs = iter_cvs(input_path)
+    else:
+        cvs = parse_cvs(str(input_path), metrics, cache, args.engine)
+    # Con --stream el parseo ocurre dentro de esta fase (se intercala con el render)
+    with metrics.phase("render_all"):
+        outs = render_all(cvs, str(template_path), Path(args.out_dir), jobs=args.jobs, assets=assets, output=output)
+    # Los bytes se cuentan al escribir: no hace falta volver a mirar los archivos
+    for p, size in outs:
+        _check_written(p, size)
+    metrics.set("outputs", len(outs))
+    metrics.set("output_bytes", sum(size for _, size in outs))
+    manifest.record(input_path, key, [str(p) for p, _ in outs] + _siblings(output, [p for p, _ in outs]))
+    manifest.save()
+    print(f"OK -> {len(outs)} CV(s) generados en {args.out_dir}")
+
+
+def run_out(args, metrics: Metrics, template_path: Path, cache: Optional[ParseCache], assets, output) -> None:
+    # Un archivo, solo el primer cv
+    input_path = _input_path(args)
+    out_path = Path(args.out)
+    key = build_key(input_path, template_path, extra=stage_signature(assets, output), engine=args.engine)
+    manifest = BuildManifest.for_dir(out_path.parent)
+    if not args.force and manifest.is_fresh(input_path, key, [str(out_path)] + _siblings(output, [out_path])):
+        print(f"OK -> {out_path} sin cambios (usa --force para regenerar)")
+        return
+
+    objs = parse_cvs(str(input_path), metrics, cache, args.engine)[0]
+    with metrics.phase("context"):
+        context = objs.view()
+    if assets is not None:
+        with metrics.phase("assets"):
+            context = assets.page_context(context)
+    with metrics.phase("imports"):
+        from render_engine import get_renderer
+    # Render y escritura van juntos: la página sale por trozos al archivo
+    with metrics.phase("render"):
+        written = get_renderer().render_to_file(template_path, out_path, assets=assets, output=output, **context)
+    metrics.set("output_bytes", written)
+    _check_written(out_path, written)
+    manifest.record(input_path, key, [str(out_path)] + _siblings(output, [out_path]))
+    manifest.save()
     print(f"OK -> {out_path} generado")
 
 
+def run(args, metrics: Metrics) -> None:
+    if args.restore_dfa and (args.engine == "antlr" or args.stream or args.watch):
+        with metrics.phase("imports"):
+            from parsers.antlr_warmup import restore
+        with metrics.phase("dfa_restore"):
+            restore()
+    if args.check:
+        return run_check(args, metrics)
+    if args.emit:
+        return run_emit(args, metrics)
+
+    templates = resolve_templates(args.template)
+    if not templates:
+        _fail(f"No hay plantillas en: {', '.join(args.template)}")
+    for template_path in templates:
+        if not template_path.exists():
+            _fail(f"No existe template: {template_path}")
+    cache = _parse_cache(args)
+    if len(args.template) > 1 or Path(args.template[0]).is_dir():
+        return run_many(args, metrics, templates, cache)
+    template_path = templates[0]
+
+    if args.watch:
+        if not args.out_dir:
+            _fail("--watch requiere --out-dir")
+        from watch import watch
+
+        return watch(
+            template_path,
+            Path(args.out_dir),
+            input_path=Path(args.input) if args.input else None,
+            input_dir=Path(args.input_dir) if args.input_dir else None,
+            port=args.port,
+        )
+
+    assets = _assets(args, metrics, template_path, Path(args.out_dir) if args.out_dir else Path(args.out).parent)
+    output = _output_stage(args)
+    if args.input_dir:
+        run_input_dir(args, metrics, template_path, cache, assets, output)
+    elif args.out_dir:
+        run_out_dir(args, metrics, template_path, cache, assets, output)
+    else:
+        run_out(args, metrics, template_path, cache, assets, output)
+
+
 if __name__ == "__main__":
     main()
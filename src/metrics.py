@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import json
+import sys
+import time
+from typing import Any, Dict, Iterator, TextIO
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Metrics:
+    """
+    Tiempos por fase y contadores de una ejecución.
+
+        m = Metrics()
+        with m.phase("parse"):
+            ...
+        m.count("tokens", n)
+        m.report("text")
+
+    Si una fase se repite (p. ej. render de varios CVs) los tiempos se suman.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, Any] = {}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, value: Any) -> None:
+        self.counters[name] = value
+
+    @staticmethod
+    def peak_rss_kb() -> int:
+        if resource is None:
+            return 0
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == "darwin" else rss  # macOS da bytes
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "phases_ms": {k: round(v * 1000, 3) for k, v in self.phases.items()},
+            "total_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "counters": dict(self.counters),
+            "peak_rss_kb": self.peak_rss_kb(),
+        }
+
+    def report(self, fmt: str = "text", file: TextIO = sys.stderr) -> None:
+        d = self.as_dict()
+        if fmt == "json":
+            print(json.dumps(d, ensure_ascii=False), file=file)
+            return
+        total = d["total_ms"] or 1.0
+        print("== métricas ==", file=file)
+        for name, ms in d["phases_ms"].items():
+            print(f"  {name:<14} {ms:>10.2f} ms  {ms / total * 100:5.1f}%", file=file)
+        print(f"  {'total':<14} {d['total_ms']:>10.2f} ms", file=file)
+        for name, value in d["counters"].items():
+            print(f"  {name:<14} {value}", file=file)
+        print(f"  {'peak_rss':<14} {d['peak_rss_kb']} KB", file=file)
+
+
+def count_tree_nodes(tree) -> int:
+    # Recorrido iterativo: los árboles grandes no agotan la pila de recursión
+    n = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        n += 1
+        children = getattr(node, "children", None)
+        if children:
+            stack.extend(children)
+    return n
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+import pickle
+from typing import Any, Callable, List, Optional, Tuple
+
+from build_cache import PROJECT_ROOT, build_version, engine_version, file_hash
+
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "build" / "parse"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_MAGIC = b"CVP1"
+
+
+def parse_key(input_path: Path, engine: str = "antlr") -> str:
+    """Clave de un resultado de parseo: versión de gramática/modelo + engine + hash de la entrada."""
+    h = hashlib.sha256()
+    h.update(build_version().encode())
+    # engine_version ya incluye el nombre del engine
+    h.update(engine_version(engine).encode())
+    h.update(file_hash(Path(input_path)).encode())
+    return h.hexdigest()
+
+
+class ParseCache:
+    """
+    Resultados de parseo (List[CVObjects] o el dict de Flex/CUP) serializados
+    con pickle en cache_dir/<xx>/<clave>.pkl. Cada acierto actualiza el mtime
+    del archivo; al pasar de max_bytes se borran los menos usados (LRU).
+    La carpeta es local al proyecto: no se cargan archivos de fuera.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._total: Optional[int] = None  # tamaño conocido; se calcula la primera vez que hace falta
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        if not data.startswith(_MAGIC):
+            self._drop(path, len(data))
+            return None
+        try:
+            value = pickle.loads(data[len(_MAGIC):])
+        except Exception:  # entrada corrupta o de un modelo que ya no existe
+            self._drop(path, len(data))
+            return None
+        try:
+            os.utime(path)  # más reciente para el LRU
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        data = _MAGIC + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            old = path.stat().st_size  # se sobrescribe: ese tamaño deja de contar
+        except OSError:
+            old = 0
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        if self._total is None:
+            self._total = self._scan_size()
+        else:
+            self._total += len(data) - old
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def _drop(self, path: Path, size: int) -> None:
+        path.unlink(missing_ok=True)
+        if self._total is not None:
+            self._total -= size
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        out = []
+        for p in self.cache_dir.glob("*/*.pkl"):
+            try:
+                out.append((p, p.stat()))
+            except OSError:
+                pass
+        return out
+
+    def _scan_size(self) -> int:
+        return sum(st.st_size for _, st in self._entries())
+
+    def evict(self, target: Optional[int] = None) -> int:
+        """Borra los menos usados hasta quedar en target bytes (por defecto 90% del máximo)."""
+        target = int(self.max_bytes * 0.9) if target is None else target
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime_ns)
+        total = sum(st.st_size for _, st in entries)
+        removed = 0
+        for p, st in entries:
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= st.st_size
+            removed += 1
+        self._total = total
+        return removed
+
+    def clear(self) -> None:
+        self.evict(target=0)
+
+    def load_or_parse(self, input_path: Path, parse: Callable[[Path], Any], engine: str = "antlr") -> Any:
+        key = parse_key(input_path, engine)
+        value = self.get(key)
+        if value is None:
+            value = parse(input_path)
+            self.put(key, value)
+        return value
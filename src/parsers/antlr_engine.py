@@ -1,20 +1,154 @@
 from __future__ import annotations
 from pathlib import Path
-from antlr4 import FileStream, CommonTokenStream
+from typing import List, Optional, Tuple
+from antlr4 import FileStream, CommonTokenStream, InputStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 
 from CVLangLexer import CVLangLexer
 from CVLangParser import CVLangParser
 from cv_builder import BuildObjectsVisitor
+from cv_model import CVObjects
+from parse_cache import ParseCache, parse_key
 
-def parse_with_antlr(input_path: Path) -> dict:
-    stream = FileStream(str(input_path), encoding="utf-8")
-    lexer = CVLangLexer(stream)
-    tokens = CommonTokenStream(lexer)
-    parser = CVLangParser(tokens)
+def parse_start(parser: CVLangParser, tokens: CommonTokenStream):
+    """
+    Parseo en dos fases de la regla raíz `start`:
+      1) predicción SLL + BailErrorStrategy: rápido, aborta al primer error
+      2) solo si falla, se rebobina y se repite en LL completo con la
+         estrategia y los listeners normales (mensajes de error de siempre)
+    Para entradas válidas la fase 2 no se ejecuta nunca.
+    Las DFA guardadas con antlr_warmup.py --save no se cargan aquí: lo hacen
+    los initializers de los pools, serve.py y main.py --restore-dfa.
+    """
+    listeners = list(parser._listeners)
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+    try:
+        return parser.start()
+    except ParseCancellationException:
+        pass
+    finally:
+        parser._listeners = listeners
 
-    tree = parser.start()  # tu regla raíz
-    visitor = BuildObjectsVisitor()
-    objs = visitor.visit(tree)
+    tokens.seek(0)
+    parser.reset()
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    return parser.start()
+
+
+class ErrorCollector(ErrorListener):
+    """Guarda los errores (línea, columna desde 0, mensaje) en lugar de imprimirlos por stderr."""
+
+    def __init__(self) -> None:
+        self.errors: List[Tuple[int, int, str]] = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e) -> None:
+        self.errors.append((line, column, msg))
+
+
+class AntlrParser:
+    """
+    Lexer y parser de CVLang creados una vez y reutilizados: cada entrada
+    solo cambia el stream. Todo lo que parsea con antlr (main.py, batch.py,
+    serve.py, check.py, cv_stream.py...) pasa por aquí.
+
+    errors / lexer_errors: listeners (p. ej. ErrorCollector) en lugar de los
+    de consola. lexer: otro lexer de CVLang (check.py apunta los errores
+    léxicos en vez de lanzar la excepción de la gramática).
+    """
+
+    def __init__(
+        self,
+        errors: Optional[ErrorListener] = None,
+        lexer_errors: Optional[ErrorListener] = None,
+        lexer: Optional[CVLangLexer] = None,
+    ) -> None:
+        self.lexer = lexer if lexer is not None else CVLangLexer(None)
+        self.parser = CVLangParser(None)
+        self.errors = errors
+        if lexer_errors is not None:
+            self.lexer.removeErrorListeners()
+            self.lexer.addErrorListener(lexer_errors)
+        if errors is not None:
+            self.parser.removeErrorListeners()
+            self.parser.addErrorListener(errors)
+
+    def tokens(self, stream: InputStream, first_line: int = 1) -> CommonTokenStream:
+        self.lexer.inputStream = stream
+        self.lexer.line = first_line  # un trozo del archivo (cv_stream) cuenta desde su línea
+        return CommonTokenStream(self.lexer)
+
+    def tree(self, tokens: CommonTokenStream):
+        self.parser.setTokenStream(tokens)
+        return parse_start(self.parser, tokens)
+
+    @property
+    def syntax_errors(self) -> int:
+        return self.parser.getNumberOfSyntaxErrors()
+
+    def parse(self, stream: InputStream, first_line: int = 1) -> List[CVObjects]:
+        """Un CVObjects por cada bloque cv. ValueError si hay errores de sintaxis."""
+        tree = self.tree(self.tokens(stream, first_line))
+        if self.syntax_errors > 0:
+            if isinstance(self.errors, ErrorCollector) and self.errors.errors:
+                raise ValueError("; ".join(f"line {line}:{col} {msg}" for line, col, msg in self.errors.errors))
+            raise ValueError(f"{self.syntax_errors} error(es) sintáctico(s)")
+        return BuildObjectsVisitor().visit(tree)
+
+
+_SHARED: Optional[AntlrParser] = None
+
+
+def shared_parser() -> AntlrParser:
+    """El AntlrParser del proceso, con los listeners de consola (como un lexer/parser recién creado)."""
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = AntlrParser()
+    return _SHARED
+
+
+def _parser_for(errors: Optional[ErrorCollector]) -> AntlrParser:
+    # Con errors, uno nuevo: el compartido no se queda con el listener de otro
+    return shared_parser() if errors is None else AntlrParser(errors)
+
+
+def parse_file(input_path, errors: Optional[ErrorCollector] = None) -> List[CVObjects]:
+    """
+    Un CVObjects por cada bloque cv del archivo (como rd_engine.parse_file).
+    ValueError si hay errores; con errors, los errores de sintaxis se guardan
+    ahí (y van en el mensaje) en vez de salir por stderr.
+    """
+    return _parser_for(errors).parse(FileStream(str(input_path), encoding="utf-8"))
+
+
+def parse_source(source: str, errors: Optional[ErrorCollector] = None) -> List[CVObjects]:
+    """Como parse_file, con el texto ya leído (serve.py)."""
+    return _parser_for(errors).parse(InputStream(source))
+
+
+def parse_with_antlr(input_path: Path, cache: Optional[ParseCache] = None) -> dict:
+    """
+    Con cache, los CVObjects de la entrada se guardan en disco (la misma
+    entrada que usan main.py y batch.py) y la próxima vez se cargan sin
+    volver a parsear.
+    """
+    key = parse_key(Path(input_path)) if cache is not None else None
+    cvs = cache.get(key) if key is not None else None
+
+    if cvs is None:
+        antlr = shared_parser()
+        tree = antlr.tree(antlr.tokens(FileStream(str(input_path), encoding="utf-8")))
+        cvs = BuildObjectsVisitor().visit(tree)
+        if key is not None and antlr.syntax_errors == 0:
+            cache.put(key, cvs)
+
+    # El visitor devuelve un CVObjects por cada cv; este engine usa el primero
+    objs = cvs[0]
 
     # Unifica salida a dict para Jinja
     # Si tu visitor devuelve dataclass CVObjects, conviértelo:
@@ -0,0 +1,521 @@
+"""
+Cachés DFA de CVLangLexer/CVLangParser calientes desde el arranque.
+
+El runtime de ANTLR construye sus DFA (una por decisión, compartidas por
+todas las instancias de la clase) a medida que ve entradas nuevas, así que
+los primeros CVs de cada proceso se parsean mucho más despacio que los
+siguientes. Aquí:
+
+  - warm_up(): pasa lexer y parser por WARMUP_CORPUS, que recorre todas las
+    reglas y alternativas de CVLang.g4 (y las entradas que se le den).
+  - save_dfa() / load_dfa(): guardan y recuperan esas DFA en
+    build/antlr/dfa.pkl. El archivo lleva un sello con la versión del
+    runtime y el ATN generado: tras regenerar la gramática se ignora.
+  - restore(): load_dfa() una vez por proceso. Lo llaman los workers de los
+    pools (batch.py, check.py, cv_export.py) y main.py con --restore-dfa;
+    nunca parse_start(), así que un parseo suelto no depende de lo guardado:
+
+        python src/parsers/antlr_warmup.py --save [--input-dir entradas]
+
+  - prewarm(): restore() o, si no hay nada guardado, warm_up(). Lo llaman
+    los procesos padre antes de crear un pool (los workers heredan las DFA
+    al hacer fork) y los workers de serve.py.
+
+Benchmark del primer parseo en frío / caliente / restaurado:
+bench/bench_warmup.py.
+"""
+from __future__ import annotations
+
+import argparse
+from functools import lru_cache
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import sys
+from typing import Iterable
+
+import antlr4
+from antlr4 import InputStream
+from antlr4.PredictionContext import PredictionContext
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.SemanticContext import SemanticContext
+
+from CVLangLexer import CVLangLexer
+from CVLangParser import CVLangParser
+
+from build_cache import PROJECT_ROOT, file_hash
+
+DEFAULT_DFA_PATH = PROJECT_ROOT / "build" / "antlr" / "dfa.pkl"
+_RUNTIME = Path(antlr4.__file__).parent
+# Las clases del runtime que acaban en el pickle
+_RUNTIME_FILES = [
+    _RUNTIME / "PredictionContext.py",
+    _RUNTIME / "atn" / "ATNConfig.py",
+    _RUNTIME / "atn" / "ATNConfigSet.py",
+    _RUNTIME / "atn" / "LexerActionExecutor.py",
+    _RUNTIME / "atn" / "SemanticContext.py",
+    _RUNTIME / "dfa" / "DFA.py",
+    _RUNTIME / "dfa" / "DFAState.py",
+]
+
+_MAGIC = b"CVD1"
+# Las DFA enlazan estados entre sí: pickle recorre esas cadenas recursivamente
+_RECURSION_LIMIT = 20000
+
+# Todas las reglas de CVLang.g4 y cada alternativa (opcionales presentes y
+# ausentes, CONJPALYNUM e IDENT, las tres formas de redes, experiencia,
+# habilidades y portafolio...). Tiene que ser válido: los errores no calientan
+# la fase SLL, que es la que usan las entradas correctas.
+WARMUP_CORPUS = """\
+/* Corpus de calentamiento de antlr_warmup.py */
+gvar {
+  "empresa" = Compraventa de coches ;
+  "ciudad" = Madrid ;
+}
+cv "Ana Garcia" {
+  lvar {
+    "rol" = Desarrolladora backend ;
+  }
+  datospersonales {
+    nomyape (Ana Garcia Lopez)
+    foto (imagenes/ana.jpg)
+    fecha (01/02/1990)
+    bio ("Ingeniera de software, con experiencia en servicios y datos.")
+    contacto {
+      email (ana.garcia@correo.es)
+      telefono (612345678)
+      redes {
+        linkedin (linkedin.com/in/ana)
+        github (github.com/ana)
+        web (ana.dev)
+      }
+    }
+  }
+  formacion {
+    oficial {
+      titulo (Grado en Informatica)
+      expedidor ("Universidad de Sevilla")
+      descripcion (Rama de computacion)
+      logros ("Matricula de honor")
+      fecha (30/06/2012)
+    }
+    oficial {
+      titulo ("Master en Datos")
+      expedidor (Universidad de Granada)
+      fecha (15/07/2014)
+    }
+    complementaria {
+      titulo (Curso de Python)
+      certificado (Si)
+      expedidor ("Academia Python")
+      horas (40)
+      fecha (10/03/2015)
+    }
+    complementaria {
+      titulo (Taller de Git)
+      certificado (No)
+      expedidor (Comunidad local)
+      fecha (11/11/2016)
+    }
+  }
+  idiomas {
+    idioma {
+      nombre (Ingles)
+      nivel (C1)
+      expedidor ("Cambridge")
+    }
+    idioma {
+      nombre ("Espanol")
+      nivel (nativo)
+    }
+  }
+  experiencia {
+    laboral {
+      puesto (Desarrolladora backend)
+      horas (40)
+      organizacion ("Empresa Uno")
+      responsabilidades (Diseno de servicios, pruebas y despliegue)
+    }
+    laboral {
+      puesto ("Analista")
+      horas (20)
+      organizacion (Empresa Dos)
+      responsabilidades ("Informes 2 veces al mes")
+    }
+    voluntariado {
+      puesto (Mentora)
+      descripcion ("Clases de programacion")
+      horas (4)
+      organizacion (Asociacion Tres)
+    }
+  }
+  habilidades {
+    soft {
+      habilidad (Trabajo en equipo), habilidad ("Comunicacion")
+    }
+    hard {
+      categoria {
+        nombre (Lenguajes)
+        habilidad (Python)
+        nvhab (alto),
+        habilidad ("Java")
+        nvhab (medio)
+      }
+      categoria {
+        nombre ("Bases de datos")
+        habilidad (PostgreSQL)
+        nvhab (bajo)
+      }
+    }
+  }
+  portafolio {
+    proyecto {
+      nombre (Tienda online)
+      grupo {
+        companero {
+          nomyape (Luis Perez)
+          github (github.com/luis)
+        }
+        companero {
+          nomyape ("Marta Ruiz")
+        }
+      }
+      descripcion (Comercio electronico con pagos)
+      tecnologias (Python, Django, PostgreSQL)
+      web (tienda.dev)
+    }
+    proyecto {
+      nombre ("Bot")
+      descripcion ("Asistente de chat")
+      tecnologias ("Python")
+    }
+    meritos {
+      nombre (Premio de innovacion)
+      descripcion ("Primer puesto en un hackathon")
+    }
+  }
+}
+cv "Bruno Diaz" {
+  datospersonales {
+    nomyape ("Bruno Diaz")
+    fecha (29/12/1985)
+    contacto {
+      email (bruno@correo.com)
+      telefono (912345678)
+      redes {
+        github (github.com/bruno)
+        web (bruno.es)
+      }
+    }
+  }
+  formacion {
+    oficial {
+      titulo (Ciclo de grado superior)
+      expedidor (Instituto Norte)
+      logros (Mejor expediente)
+      fecha (20/06/2005)
+    }
+  }
+  experiencia {
+    voluntariado {
+      puesto (Monitor)
+      descripcion (Campamentos de verano)
+      horas (10)
+      organizacion ("Club Sur")
+    }
+  }
+  habilidades {
+    hard {
+      categoria {
+        nombre (Redes)
+        habilidad (Cisco)
+        nvhab (alto)
+      }
+    }
+  }
+  portafolio {
+    meritos {
+      nombre ("Medalla")
+      descripcion (Mejor monitor del ano)
+    }
+  }
+}
+cv "Carla Soto" {
+  datospersonales {
+    nomyape (Carla Soto)
+    fecha (05/05/2000)
+    bio (Disenadora grafica.)
+    contacto {
+      email (carla.soto@mail.org)
+      telefono (712345678)
+      redes {
+        web (carla.art)
+      }
+    }
+  }
+  formacion {
+    oficial {
+      titulo (Bellas Artes)
+      expedidor ("Universidad de Salamanca")
+      descripcion ("Especialidad en ilustracion")
+      fecha (01/09/2022)
+    }
+  }
+  habilidades {
+    soft {
+      habilidad (Creatividad)
+    }
+  }
+}
+cv "Dario Gil" {
+  datospersonales {
+    nomyape (Dario Gil)
+    foto (fotos/dario.png)
+    fecha (31/10/1999)
+    contacto {
+      email (dario@gil.net)
+      telefono (812345678)
+      redes {
+        linkedin (linkedin.com/in/dario)
+        web (dario.io)
+      }
+    }
+  }
+  formacion {
+    oficial {
+      titulo (Bachillerato)
+      expedidor (Instituto Este)
+      fecha (25/06/2017)
+    }
+    complementaria {
+      titulo ("Primeros auxilios")
+      expedidor (Cruz Roja)
+      horas (8)
+      fecha (02/02/2018)
+    }
+  }
+  idiomas {
+    idioma {
+      nombre (Frances)
+      nivel (B2)
+    }
+  }
+  experiencia {
+    laboral {
+      puesto (Repartidor)
+      horas (30)
+      organizacion (Mensajeria Oeste)
+    }
+    voluntariado {
+      puesto ("Guia")
+      descripcion (Rutas por el monte)
+      horas (6)
+      organizacion (Club de montana)
+    }
+  }
+  portafolio {
+    proyecto {
+      nombre (Mapa de rutas)
+      grupo {
+        companero {
+          nomyape (Eva Gil)
+        }
+      }
+      descripcion (Web con las rutas del club)
+      tecnologias (JavaScript)
+    }
+  }
+}
+"""
+
+_WARM = False  # DFA de este proceso ya cargadas o calentadas
+
+
+def _parse(source: str) -> int:
+    # Igual que el resto (AntlrParser), con los errores recogidos: aquí no se informa de nada
+    from parsers.antlr_engine import AntlrParser, ErrorCollector
+
+    antlr = AntlrParser(errors=ErrorCollector(), lexer_errors=ErrorCollector())
+    antlr.tree(antlr.tokens(InputStream(source)))
+    return antlr.syntax_errors
+
+
+def warm_up(sources: Iterable[str] = (WARMUP_CORPUS,)) -> int:
+    """Parsea cada fuente (las que fallan no paran el resto); devuelve los estados DFA resultantes."""
+    global _WARM
+    for source in sources:
+        try:
+            _parse(source)
+        except Exception:  # p. ej. un error léxico: lo ya visto sí queda en las DFA
+            pass
+    _WARM = True
+    return dfa_states()
+
+
+def dfa_states() -> int:
+    return sum(len(d._states) for d in CVLangLexer.decisionsToDFA) + sum(
+        len(d._states) for d in CVLangParser.decisionsToDFA
+    )
+
+
+@lru_cache(maxsize=None)
+def dfa_stamp() -> str:
+    """Python + runtime de ANTLR (las clases que se guardan) + ATN generado del lexer y del parser."""
+    h = hashlib.sha256()
+    h.update(f"{sys.version_info[:2]}\0".encode())
+    for p in _RUNTIME_FILES:
+        h.update(file_hash(p).encode())
+    for cls in (CVLangLexer, CVLangParser):
+        h.update(repr(sys.modules[cls.__module__].serializedATN()).encode())
+    return h.hexdigest()
+
+
+# ---------- persistencia ----------
+# Lo que no se guarda sino que se enlaza al cargar: los estados del ATN (de
+# la clase generada, por número) y los singletons que el runtime compara con
+# `is` (ERROR, SemanticContext.NONE, PredictionContext.EMPTY).
+def _singletons() -> dict:
+    return {
+        "error": ATNSimulator.ERROR,
+        "lexer_error": LexerATNSimulator.ERROR,
+        "none": SemanticContext.NONE,
+        "empty": PredictionContext.EMPTY,
+    }
+
+
+class _DFAPickler(pickle.Pickler):
+    def __init__(self, f) -> None:
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._lexer_states = {id(s) for s in CVLangLexer.atn.states}
+        self._singletons = {id(v): k for k, v in _singletons().items()}
+        self._actions = {id(a): i for i, a in enumerate(CVLangLexer.atn.lexerActions or ())}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, ATNState):
+            return ("L" if id(obj) in self._lexer_states else "P", obj.stateNumber)
+        key = self._singletons.get(id(obj))
+        if key is not None:
+            return ("S", key)
+        i = self._actions.get(id(obj))
+        if i is not None:
+            return ("A", i)
+        return None
+
+
+class _DFAUnpickler(pickle.Unpickler):
+    def __init__(self, f) -> None:
+        super().__init__(f)
+        self._singletons = _singletons()
+
+    def persistent_load(self, pid):
+        kind, value = pid
+        if kind == "L":
+            return CVLangLexer.atn.states[value]
+        if kind == "P":
+            return CVLangParser.atn.states[value]
+        if kind == "S":
+            return self._singletons[value]
+        if kind == "A":
+            return CVLangLexer.atn.lexerActions[value]
+        raise pickle.UnpicklingError(f"referencia desconocida: {pid!r}")
+
+
+def save_dfa(path: Path = DEFAULT_DFA_PATH) -> Path:
+    """Guarda las DFA actuales de lexer y parser (escritura atómica)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    state = (
+        CVLangLexer.decisionsToDFA,
+        CVLangParser.decisionsToDFA,
+        CVLangParser.sharedContextCache.cache,
+    )
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, _RECURSION_LIMIT))
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC + dfa_stamp().encode() + b"\n")
+            _DFAPickler(f).dump(state)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        sys.setrecursionlimit(limit)
+    return path
+
+
+def load_dfa(path: Path = DEFAULT_DFA_PATH) -> bool:
+    """
+    Sustituye las DFA de CVLangLexer/CVLangParser por las guardadas. False
+    (sin tocar nada) si no hay archivo o es de otra gramática o runtime.
+    """
+    global _WARM
+    try:
+        with open(path, "rb") as f:
+            header = f.readline()
+            if header.rstrip(b"\n") != _MAGIC + dfa_stamp().encode():
+                return False
+            limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(max(limit, _RECURSION_LIMIT))
+            try:
+                lexer_dfa, parser_dfa, contexts = _DFAUnpickler(f).load()
+            finally:
+                sys.setrecursionlimit(limit)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, IndexError, ValueError, RecursionError):
+        return False
+    if len(lexer_dfa) != len(CVLangLexer.decisionsToDFA) or len(parser_dfa) != len(CVLangParser.decisionsToDFA):
+        return False
+    # En el sitio: los simuladores de las instancias ya creadas apuntan a estas listas
+    CVLangLexer.decisionsToDFA[:] = lexer_dfa
+    CVLangParser.decisionsToDFA[:] = parser_dfa
+    CVLangParser.sharedContextCache.cache.update(contexts)
+    _WARM = True
+    return True
+
+
+def restore(path: Path = DEFAULT_DFA_PATH) -> bool:
+    """load_dfa() la primera vez que se llama en el proceso; luego no hace nada."""
+    global _WARM
+    if _WARM:
+        return False
+    loaded = load_dfa(path)
+    _WARM = True  # sin archivo tampoco se vuelve a intentar
+    return loaded
+
+
+def prewarm(path: Path = DEFAULT_DFA_PATH) -> None:
+    """DFA calientes ya: las guardadas o, si no hay, las de warm_up()."""
+    if _WARM:
+        return
+    if not load_dfa(path):
+        warm_up()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--save", action="store_true", help=f"Calienta y guarda las DFA en {DEFAULT_DFA_PATH}")
+    ap.add_argument("--input-dir", help="Con --save: calienta también con los .txt de esta carpeta")
+    ap.add_argument("--clear", action="store_true", help="Borra las DFA guardadas")
+    args = ap.parse_args()
+
+    if args.clear:
+        DEFAULT_DFA_PATH.unlink(missing_ok=True)
+        print(f"OK -> {DEFAULT_DFA_PATH} borrado")
+        return
+    if not args.save:
+        ap.error("usa --save o --clear")
+
+    sources = [WARMUP_CORPUS]
+    if args.input_dir:
+        sources += [p.read_text(encoding="utf-8") for p in sorted(Path(args.input_dir).glob("*.txt")) if p.is_file()]
+    states = warm_up(sources)
+    path = save_dfa()
+    print(f"OK -> {path} ({states} estados DFA, {path.stat().st_size // 1024} KiB)")
+
+
+if __name__ == "__main__":
+    main()
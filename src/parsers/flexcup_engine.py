@@ -2,34 +2,55 @@ from __future__ import annotations
 from pathlib import Path
 import json
 import subprocess
+import time
+from typing import TYPE_CHECKING, Optional
 
-def parse_with_flexcup(input_path: Path, project_root: Path) -> dict:
-    """
-    Espera que exista un runner Java que:
-      - lea el input
-      - parsee con CUP
-      - imprima un JSON por stdout
-    """
+from parsers.flexcup_pool import default_classpath
+
+if TYPE_CHECKING:
+    from metrics import Metrics
+    from parse_cache import ParseCache
+    from parsers.flexcup_pool import FlexCupPool
 
-    # Ruta donde generas/compilas el Java (puedes elegir build/java o similar)
-    build_dir = project_root / "build" / "flexcup"
-    build_dir.mkdir(parents=True, exist_ok=True)
 
-    # IMPORTANTE:
-    # Aquí tienes dos opciones:
-    # A) si ya subes los .java generados/compilados al repo, solo ejecutas.
-    # B) si quieres generar/compilar en CI, haces aquí (o en workflow) los pasos con jflex + cup + javac.
+def parse_with_flexcup(
+    input_path: Path,
+    project_root: Path,
+    pool: Optional[FlexCupPool] = None,
+    metrics: Optional[Metrics] = None,
+    cache: Optional[ParseCache] = None,
+) -> dict:
+    """
+    Lanza el parser de CUP compilado en gramatica/flexcup (ver el paso
+    "Build with Flex/CUP" del workflow), que imprime el JSON por stdout.
+    Si se pasa un FlexCupPool (parsers/flexcup_pool.py), se usa una JVM ya
+    arrancada en vez de lanzar `java` para cada entrada.
+    Con metrics (src/metrics.py) se separa el tiempo del proceso Java
+    (arranque de la JVM + lexer + parser) del de decodificar el JSON.
+    Con cache (parse_cache.ParseCache) el dict se guarda en disco y la
+    próxima vez se carga sin lanzar Java.
+    """
+    if cache is not None:
+        return cache.load_or_parse(
+            Path(input_path),
+            lambda p: parse_with_flexcup(p, project_root, pool=pool, metrics=metrics),
+            engine="flexcup",
+        )
+    if pool is not None:
+        if metrics is None:
+            return pool.parse_path(input_path)
+        with metrics.phase("flexcup"):
+            return pool.parse_path(input_path)
 
-    # Este comando es un placeholder. Ajusta Main class y classpath a lo que tú tengas.
-    cmd = [
-        "java",
-        "-cp",
-        str(build_dir),  # y/o jars necesarios
-        "Main",
-        str(input_path)
-    ]
+    # Sin pool: una JVM para esta entrada, con la misma clase (`parser`, la que
+    # genera CUP) y el mismo classpath que los workers de FlexCupPool
+    cmd = ["java", "-cp", default_classpath(project_root), "parser", str(input_path)]
 
+    t0 = time.perf_counter()
     proc = subprocess.run(cmd, capture_output=True, text=True)
+    if metrics is not None:
+        metrics.add_time("subprocess", time.perf_counter() - t0)
+        metrics.set("json_bytes", len(proc.stdout))
     if proc.returncode != 0:
         raise RuntimeError(
             "Flex/CUP fallo.\n"
@@ -37,6 +58,7 @@ def parse_with_flexcup(input_path: Path, project_root: Path) -> dict:
             f"STDERR:\n{proc.stderr}\n"
         )
 
+    t0 = time.perf_counter()
     try:
         return json.loads(proc.stdout)
     except json.JSONDecodeError as e:
@@ -45,3 +67,6 @@ def parse_with_flexcup(input_path: Path, project_root: Path) -> dict:
             f"STDOUT:\n{proc.stdout}\n"
             f"STDERR:\n{proc.stderr}\n"
         ) from e
+    finally:
+        if metrics is not None:
+            metrics.add_time("json_decode", time.perf_counter() - t0)
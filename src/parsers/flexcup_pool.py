@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import atexit
+from collections import deque
+import json
+import os
+from pathlib import Path
+import queue
+import subprocess
+import threading
+from typing import List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def default_classpath(project_root: Path = PROJECT_ROOT) -> str:
+    # Mismo classpath que el paso "Build with Flex/CUP" del workflow (clase `parser`)
+    return os.pathsep.join([
+        str(project_root / "gramatica" / "flexcup"),
+        str(project_root / "tools" / "java-cup.jar"),
+    ])
+
+
+class FlexCupError(RuntimeError):
+    pass
+
+
+class _Worker:
+    """
+    Un proceso `java parser --worker` vivo. Protocolo (ver CV_Ascendente.cup):
+      petición  "PATH <n>\\n" | "SRC <n>\\n"  + n bytes UTF-8
+      respuesta "OK <n>\\n"   | "ERR <n>\\n"  + n bytes UTF-8
+    Un hilo lee las respuestas de stdout a una cola (así se puede esperar con
+    timeout) y otro drena stderr para que el proceso nunca se bloquee.
+    """
+
+    def __init__(self, cmd: List[str]) -> None:
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._responses: "queue.Queue" = queue.Queue()
+        self._stderr: deque = deque(maxlen=50)
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_stdout(self) -> None:
+        out = self.proc.stdout
+        try:
+            while True:
+                header = out.readline()
+                if not header:
+                    break
+                kind, n = header.decode("ascii").split()
+                body = out.read(int(n))
+                self._responses.put((kind, body.decode("utf-8")))
+        except (ValueError, OSError) as e:
+            self._responses.put(("DEAD", f"respuesta mal formada: {e}"))
+            return
+        self._responses.put(("DEAD", "el proceso Java terminó"))
+
+    def _read_stderr(self) -> None:
+        for line in self.proc.stderr:
+            self._stderr.append(line.decode("utf-8", "replace").rstrip())
+
+    def stderr_tail(self) -> str:
+        return "\n".join(self._stderr)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def request(self, kind: str, payload: str, timeout: Optional[float]):
+        data = payload.encode("utf-8")
+        self.proc.stdin.write(f"{kind} {len(data)}\n".encode("ascii") + data)
+        self.proc.stdin.flush()
+        return self._responses.get(timeout=timeout)
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+        for f in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                f.close()
+            except OSError:
+                pass
+
+
+class FlexCupPool:
+    """
+    Pool de JVMs con el parser de CUP cargado, para no pagar arranque de la
+    JVM y carga de clases en cada CV. Es seguro usarlo desde varios hilos:
+    cada petición toma un worker libre. Si un worker muere (p. ej. el lexer
+    hace System.exit ante un error léxico) o excede el timeout, se mata y
+    se arranca otro en su lugar.
+
+        with FlexCupPool(size=4) as pool:
+            data = pool.parse_path(Path("entradas/entrada.txt"))
+    """
+
+    def __init__(
+        self,
+        classpath: Optional[str] = None,
+        size: int = 2,
+        timeout: Optional[float] = 10.0,
+        java: str = "java",
+    ) -> None:
+        self.cmd = [java, "-cp", classpath or default_classpath(), "parser", "--worker"]
+        self.timeout = timeout
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        w = _Worker(self.cmd)
+        with self._lock:
+            self._all.append(w)
+        return w
+
+    def _replace(self, w: _Worker) -> _Worker:
+        w.kill()
+        with self._lock:
+            if w in self._all:
+                self._all.remove(w)
+        return self._spawn()
+
+    def _call(self, kind: str, payload: str) -> dict:
+        if self._closed:
+            raise FlexCupError("el pool está cerrado")
+        w = self._idle.get()
+        try:
+            if not w.alive():
+                w = self._replace(w)
+            try:
+                resp_kind, body = w.request(kind, payload, self.timeout)
+            except queue.Empty:
+                w = self._replace(w)
+                raise TimeoutError(f"Flex/CUP no respondió en {self.timeout}s")
+            except (BrokenPipeError, OSError) as e:
+                stderr = w.stderr_tail()
+                w = self._replace(w)
+                raise FlexCupError(f"Flex/CUP worker caído: {e}\nSTDERR:\n{stderr}") from e
+
+            if resp_kind == "DEAD":
+                w.proc.wait()
+                stderr = w.stderr_tail()
+                w = self._replace(w)
+                raise FlexCupError(f"Flex/CUP fallo ({body}).\nSTDERR:\n{stderr}")
+            if resp_kind == "ERR":
+                raise FlexCupError(f"Flex/CUP fallo.\n{body}\nSTDERR:\n{w.stderr_tail()}")
+
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError as e:
+                raise FlexCupError(f"Flex/CUP no devolvió JSON válido.\nSTDOUT:\n{body}") from e
+        finally:
+            self._idle.put(w)
+
+    def parse_path(self, input_path: Path) -> dict:
+        return self._call("PATH", str(Path(input_path).resolve()))
+
+    def parse_source(self, source: str) -> dict:
+        return self._call("SRC", source)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers, self._all = self._all, []
+        for w in workers:
+            try:
+                w.proc.stdin.close()  # EOF: el worker sale del bucle
+                w.proc.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            w.kill()
+
+    def __enter__(self) -> "FlexCupPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_SHARED: Optional[FlexCupPool] = None
+
+
+def shared_pool(size: int = 1) -> FlexCupPool:
+    """
+    El pool del proceso (engine flexcup de batch.py y serve.py): se arranca la
+    primera vez y se cierra al salir. Si el proceso muere sin pasar por atexit
+    (workers de un ProcessPoolExecutor), las JVMs ven EOF en stdin y terminan.
+    """
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = FlexCupPool(size=size)
+        atexit.register(_SHARED.close)
+    return _SHARED
@@ -0,0 +1,847 @@
+from __future__ import annotations
+
+from pathlib import Path
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from cv_model import CVObjects, split_tecnologias, unquote
+from datosPersonales import DatosPersonales
+from formacion import Formacion, FormacionItem
+from idiomas import Idiomas, Idioma
+from experiencia import Experiencia, ExperienciaItem
+from habilidades import Habilidades, Habilidad
+from portafolio import Portafolio, Proyecto, Merito
+
+if TYPE_CHECKING:
+    from parse_cache import ParseCache
+
+# Engine escrito a mano (rd = recursive descent) para la gramática de
+# gramatica/antlr/CVLang.g4: tokenizer con expresiones regulares y un parser
+# descendente con un token de anticipación. Devuelve los mismos CVObjects que
+# BuildObjectsVisitor sin código generado, sin JVM y sin el runtime de ANTLR.
+# Si cambia la gramática, hay que cambiar también este archivo
+# (bench/parity_rd.py compara los dos engines). Los diagnósticos de --check
+# (_Checker) se aproximan a los de ANTLR pero no son siempre los mismos.
+
+# (tipo, texto, línea, columna); el tipo de palabras clave y símbolos es su propio texto
+Token = Tuple[str, str, int, int]
+
+
+class CVLexError(ValueError):
+    # column empieza en 1 (la del mensaje de ANTLR); 0 si el error no tiene posición
+    def __init__(self, msg: str, line: int = 0, column: int = 0) -> None:
+        super().__init__(msg)
+        self.line = line
+        self.column = column
+
+
+class CVSyntaxError(ValueError):
+    # Mismo texto que el ConsoleErrorListener de ANTLR: "line 3:4 mismatched input ..."
+    def __init__(self, reason: str, line: int, column: int) -> None:
+        super().__init__(f"line {line}:{column} {reason}")
+        self.reason = reason
+        self.line = line
+        self.column = column
+
+
+# ---------- lexer ----------
+_KEYWORDS = (
+    "cv gvar lvar datospersonales nomyape foto fecha bio contacto email telefono redes linkedin github web "
+    "formacion oficial titulo expedidor descripcion logros complementaria certificado horas idiomas idioma "
+    "nivel experiencia laboral puesto responsabilidades voluntariado organizacion habilidades soft hard "
+    "habilidad nvhab categoria portafolio proyecto nombre grupo companero tecnologias meritos"
+).split()
+# Alternativas de más larga a más corta: "idiomas" antes que "idioma"
+_KW = re.compile("|".join(sorted(_KEYWORDS, key=len, reverse=True)))
+
+_LETTER = "A-Za-zÁÉÍÓÚáéíóúÑñ"
+_PAL = f"[{_LETTER}]+"
+_NUM = "(?:0|[1-9][0-9]*)"
+_WS = r"[ \t\r\n]+"
+
+# Mismo orden que en la gramática: a igual longitud gana la regla anterior
+_TFNO = ("TFNO", re.compile(r"[5-9][0-9]{8}").match)
+_MAIL = ("MAIL", re.compile(r"[A-Za-z0-9]+(?:\.[A-Za-z0-9]+)*@[A-Za-z0-9]+(?:\.[A-Za-z0-9]+)*").match)
+_RUTA = ("RUTA", re.compile(r"[A-Za-z]+(?:[./\-:]+[A-Za-z]+)+").match)
+_FECHA = ("FECHA_NUM", re.compile(r"(?:0[1-9]|[12][0-9]|30|31)/(?:0[1-9]|1[0-2])/[12][0-9]{3}").match)
+_BOOL = ("BOOL", re.compile(r"Si|No").match)
+_NVI = ("NVI", re.compile(r"[ABC][12]|nativo").match)
+_NVH = ("NVH", re.compile(r"bajo|medio|alto").match)
+_CONJ = ("CONJPALYNUM", re.compile(rf"{_PAL}(?:,?{_WS}(?:{_PAL}|{_NUM})\.?)*").match)
+_NUMBER = ("NUM", re.compile(_NUM).match)
+_IDENT = re.compile(rf'"{_PAL}(?:,?{_WS}(?:{_PAL}|{_NUM})\.?)*"').match
+
+# Reglas candidatas según el primer carácter
+_ASCII_LETTER_RULES = (_MAIL, _RUTA, _BOOL, _NVI, _NVH, _CONJ)
+_ASCII_WORD = re.compile(r"[A-Za-z]+").match
+# Palabras exactas que ganan a CONJPALYNUM cuando miden lo mismo
+_WORD_TYPES = {
+    **{k: k for k in _KEYWORDS},
+    "Si": "BOOL", "No": "BOOL", "nativo": "NVI", "bajo": "NVH", "medio": "NVH", "alto": "NVH",
+}
+# Tras una palabra, solo estos caracteres pueden alargar un MAIL, RUTA o NVI
+_MAIL_RUTA_NEXT = frozenset("@./-:0123456789")
+_DIGIT_RULES = (_TFNO, _MAIL, _FECHA, _NUMBER)
+
+_SKIP_WS = re.compile(_WS).match
+_COMMENT = re.compile(r"/\*(?:[^*]|\*[^/])*\*/").match
+_SYMBOLS = frozenset("{}()=;,")
+
+
+def tokenize(text: str, first_line: int = 1, errors: Optional[List[CVLexError]] = None) -> List[Token]:
+    """
+    Tokens de la entrada con las mismas reglas que el lexer de ANTLR:
+    coincidencia más larga y, a igual longitud, la regla que va antes en la
+    gramática (palabras clave, luego TFNO, MAIL, RUTA, ...). Los errores
+    léxicos tienen el mismo texto que las acciones de CVLang.g4.
+    Con errors (--check) no se para en el primero: se apuntan ahí y el
+    carácter (o el */) se salta; un comentario sin cerrar llega hasta el final.
+    """
+    tokens: List[Token] = []
+    append = tokens.append
+    pos = 0
+    n = len(text)
+    line = first_line
+    line_start = 0  # posición donde empieza la línea actual
+
+    while pos < n:
+        c = text[pos]
+
+        if c in " \t\r\n":
+            end = _SKIP_WS(text, pos).end()
+            nl = text.count("\n", pos, end)
+            if nl:
+                line += nl
+                line_start = text.rindex("\n", pos, end) + 1
+            pos = end
+            continue
+
+        if c in _SYMBOLS:
+            append((c, c, line, pos - line_start))
+            pos += 1
+            continue
+
+        if c == "/" and text.startswith("/*", pos):
+            m = _COMMENT(text, pos)
+            if m is None:
+                err = CVLexError("Error lexico: comentario no cerrado antes del fin de archivo.", line, pos - line_start + 1)
+                if errors is None:
+                    raise err
+                errors.append(err)
+                # El EOF va al final del texto, como en ANTLR
+                line += text.count("\n", pos)
+                if "\n" in text[pos:]:
+                    line_start = text.rindex("\n", pos) + 1
+                pos = n
+                break
+            end = m.end()
+            nl = text.count("\n", pos, end)
+            if nl:
+                line += nl
+                line_start = text.rindex("\n", pos, end) + 1
+            pos = end
+            continue
+        if c == "*" and text.startswith("*/", pos):
+            err = CVLexError("Error lexico: comentario no abierto.", line, pos - line_start + 1)
+            if errors is None:
+                raise err
+            errors.append(err)
+            pos += 2
+            continue
+
+        if c == '"':
+            m = _IDENT(text, pos)
+            ttype, end = ("IDENT", m.end()) if m else (None, pos)
+        elif ("a" <= c <= "z" or "A" <= c <= "Z") and (
+            (e := _ASCII_WORD(text, pos).end()) >= n or text[e] not in _MAIL_RUTA_NEXT
+        ):
+            # Caso común (palabra clave o texto): solo compiten CONJPALYNUM y las palabras exactas
+            end = _CONJ[1](text, pos).end()
+            ttype = _WORD_TYPES.get(text[pos:end], "CONJPALYNUM") if end == e else "CONJPALYNUM"
+        elif "a" <= c <= "z" or "A" <= c <= "Z":
+            m = _KW.match(text, pos)
+            ttype, end = (None, pos) if m is None else (m.group(), m.end())
+            for name, rx in _ASCII_LETTER_RULES:
+                m = rx(text, pos)
+                if m is not None and m.end() > end:
+                    ttype, end = name, m.end()
+        elif "0" <= c <= "9":
+            ttype, end = None, pos
+            for name, rx in _DIGIT_RULES:
+                m = rx(text, pos)
+                if m is not None and m.end() > end:
+                    ttype, end = name, m.end()
+        elif c in "ÁÉÍÓÚáéíóúÑñ":
+            ttype, end = _CONJ[0], _CONJ[1](text, pos).end()
+        else:
+            ttype, end = None, pos
+
+        if ttype is None:
+            # Como en la acción de ANTLR: la columna es la de después del carácter
+            col = pos - line_start + 1
+            err = CVLexError(f"Error lexico: caracter no reconocido '{c}' en linea {line}, columna {col}", line, col)
+            if errors is None:
+                raise err
+            errors.append(err)
+            pos += 1
+            continue
+
+        value = text[pos:end]
+        append((ttype, value, line, pos - line_start))
+        if ttype == "CONJPALYNUM" or ttype == "IDENT":  # pueden ocupar varias líneas
+            nl = value.count("\n")
+            if nl:
+                line += nl
+                line_start = text.rindex("\n", pos, end) + 1
+        pos = end
+
+    append(("EOF", "<EOF>", line, pos - line_start))
+    return tokens
+
+
+# ---------- parser ----------
+_TEXT = ("CONJPALYNUM", "IDENT")
+_VALUE_TYPES = frozenset(("TFNO", "MAIL", "RUTA", "FECHA_NUM", "BOOL", "NVI", "NVH", "IDENT", "CONJPALYNUM", "NUM"))
+# Orden de los tipos de token en CVLangParser: así salen los conjuntos en los mensajes de ANTLR
+_TYPE_ORDER = {
+    t: n
+    for n, t in enumerate(
+        ["EOF", *_KEYWORDS, "{", "}", "(", ")", "=", ";", ",",
+         "TFNO", "MAIL", "RUTA", "FECHA_NUM", "BOOL", "NVI", "NVH", "IDENT", "CONJPALYNUM", "NUM"]
+    )
+}
+
+
+def _display(ttype: str) -> str:
+    if ttype == "EOF":
+        return "<EOF>"
+    return ttype if ttype.isupper() else f"'{ttype}'"
+
+
+def _display_set(types) -> str:
+    exp = [_display(t) for t in sorted(set(types), key=_TYPE_ORDER.__getitem__)]
+    return exp[0] if len(exp) == 1 else "{" + ", ".join(exp) + "}"
+
+
+def _display_token(tok: Token) -> str:
+    text = tok[1].replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+    return f"'{text}'"
+
+
+class _Parser:
+    """Una función por regla de CVLang.g4; construye el modelo directamente."""
+
+    def __init__(self, tokens: List[Token]) -> None:
+        self.toks = tokens
+        self.i = 0
+
+    # --- utilidades ---
+    def _peek(self) -> str:
+        return self.toks[self.i][0]
+
+    def _at(self, ttype: str) -> bool:
+        return self.toks[self.i][0] == ttype
+
+    def _alt(self, *types: str) -> bool:
+        return self.toks[self.i][0] in types
+
+    # Decisiones de un elemento opcional (x?) y vuelta de un bucle (x*, x+): en
+    # _Checker se resincroniza ahí, como el sync() de ANTLR
+    _opt = _loop = _at
+
+    def _error(self, expected: Sequence[str]) -> CVSyntaxError:
+        tok = self.toks[self.i]
+        return CVSyntaxError(f"mismatched input {_display_token(tok)} expecting {_display_set(expected)}", tok[2], tok[3])
+
+    def _expect(self, ttype: str, *alternatives: str) -> Token:
+        tok = self.toks[self.i]
+        if tok[0] != ttype:
+            raise self._error((ttype,) + alternatives)
+        self.i += 1
+        return tok
+
+    def _expect_value(self, types: Sequence[str]) -> Token:
+        tok = self.toks[self.i]
+        if tok[0] not in types:
+            raise self._error(types)
+        self.i += 1
+        return tok
+
+    def _value(self, keyword: str, types: Sequence[str] = _TEXT) -> str:
+        # keyword ( VALOR )
+        self._expect(keyword)
+        self._expect("(")
+        tok = self._expect_value(types)
+        self._expect(")")
+        return unquote(tok[1])
+
+    def _opt_value(self, keyword: str, types: Sequence[str] = _TEXT) -> Optional[str]:
+        return self._value(keyword, types) if self._opt(keyword) else None
+
+    # --- start / cvs ---
+    def start(self) -> List[CVObjects]:
+        if self._opt("gvar"):
+            self._variables("gvar")
+        cvs = [self._cv()]
+        while self._at("cv"):
+            cvs.append(self._cv())
+        self._expect("EOF", "cv")
+        return cvs
+
+    def _variables(self, keyword: str) -> None:
+        # gvar/lvar { "nombre" = valor ; ... }  (el visitor no las usa)
+        self._expect(keyword)
+        self._expect("{")
+        while True:
+            self._expect("IDENT")
+            self._expect("=")
+            self._expect("CONJPALYNUM")
+            self._expect(";")
+            if not self._loop("IDENT"):
+                break
+        self._expect("}", "IDENT")
+
+    def _cv(self) -> CVObjects:
+        self._expect("cv")
+        ident = self._expect("IDENT")
+        self._expect("{")
+        if self._opt("lvar"):
+            self._variables("lvar")
+        datos = self._datospersonales()
+        formacion = self._formacion()
+        idiomas = self._idiomas() if self._opt("idiomas") else None
+        experiencia = self._experiencia() if self._opt("experiencia") else None
+        habilidades = self._habilidades() if self._opt("habilidades") else None
+        portafolio = self._portafolio() if self._opt("portafolio") else None
+        self._expect("}", "idiomas", "experiencia", "habilidades", "portafolio")
+        return CVObjects(
+            cv_id=unquote(ident[1]) or "CV",
+            datos=datos,
+            formacion=formacion,
+            idiomas=idiomas,
+            experiencia=experiencia,
+            habilidades=habilidades,
+            portafolio=portafolio,
+        )
+
+    # --- datos personales ---
+    def _datospersonales(self) -> DatosPersonales:
+        self._expect("datospersonales")
+        self._expect("{")
+        datos = DatosPersonales(nombre=self._value("nomyape"))
+        if not self._alt("foto", "fecha"):
+            raise self._error(("foto", "fecha"))
+        datos.foto = self._opt_value("foto", ("RUTA",))
+        datos.fecha_nacimiento = self._value("fecha", ("FECHA_NUM",))
+        datos.bio = self._opt_value("bio")
+        self._contacto(datos)
+        self._expect("}")
+        return datos
+
+    def _contacto(self, datos: DatosPersonales) -> None:
+        self._expect("contacto")
+        self._expect("{")
+        datos.email = self._value("email", ("MAIL",))
+        datos.telefono = self._value("telefono", ("TFNO",))
+        self._redes(datos)
+        self._expect("}")
+
+    def _redes(self, datos: DatosPersonales) -> None:
+        self._expect("redes")
+        self._expect("{")
+        if not self._alt("linkedin", "github", "web"):
+            raise self._error(("linkedin", "github", "web"))
+        datos.linkedin = self._opt_value("linkedin", ("RUTA",))
+        datos.github = self._opt_value("github", ("RUTA",))
+        datos.web = self._opt_value("web", ("RUTA",))
+        self._expect("}")
+
+    # --- formación ---
+    def _formacion(self) -> Formacion:
+        self._expect("formacion")
+        self._expect("{")
+        items = [self._oficial()]
+        while self._loop("oficial"):
+            items.append(self._oficial())
+        while self._loop("complementaria"):
+            items.append(self._complementaria())
+        self._expect("}", "oficial", "complementaria")
+        return Formacion(items=items)
+
+    def _oficial(self) -> FormacionItem:
+        self._expect("oficial")
+        self._expect("{")
+        titulo = self._value("titulo")
+        inst = self._value("expedidor")
+        desc = self._opt_value("descripcion")
+        logros = self._opt_value("logros")
+        fecha = self._value("fecha", ("FECHA_NUM",))
+        self._expect("}")
+        return FormacionItem(
+            titulo=titulo, institucion=inst, tipo="oficial", descripcion=desc, logros=logros, fecha=fecha
+        )
+
+    def _complementaria(self) -> FormacionItem:
+        self._expect("complementaria")
+        self._expect("{")
+        titulo = self._value("titulo")
+        self._opt_value("certificado", ("BOOL",))
+        inst = self._value("expedidor")
+        self._opt_value("horas", ("NUM",))
+        fecha = self._value("fecha", ("FECHA_NUM",))
+        self._expect("}")
+        en_curso = fecha.strip().lower() in {"en_curso", "encurso", "en curso"}
+        return FormacionItem(titulo=titulo, institucion=inst, tipo="complementaria", fecha=fecha, en_curso=en_curso)
+
+    # --- idiomas ---
+    def _idiomas(self) -> Idiomas:
+        self._expect("idiomas")
+        self._expect("{")
+        lst = [self._idioma()]
+        while self._loop("idioma"):
+            lst.append(self._idioma())
+        self._expect("}", "idioma")
+        return Idiomas(idiomas=lst)
+
+    def _idioma(self) -> Idioma:
+        self._expect("idioma")
+        self._expect("{")
+        nombre = self._value("nombre")
+        nivel = self._value("nivel", ("NVI",))
+        exp = self._opt_value("expedidor")
+        self._expect("}")
+        return Idioma(nombre=nombre, nivel=nivel, expedidor=exp)
+
+    # --- experiencia ---
+    def _experiencia(self) -> Experiencia:
+        self._expect("experiencia")
+        self._expect("{")
+        if not self._alt("laboral", "voluntariado"):
+            raise self._error(("laboral", "voluntariado"))
+        items = []
+        while self._loop("laboral"):
+            items.append(self._laboral())
+        while self._loop("voluntariado"):
+            items.append(self._voluntariado())
+        self._expect("}", "voluntariado")
+        return Experiencia(experiencias=items)
+
+    def _laboral(self) -> ExperienciaItem:
+        self._expect("laboral")
+        self._expect("{")
+        puesto = self._value("puesto")
+        horas = self._value("horas", ("NUM",))
+        org = self._value("organizacion")
+        desc = self._opt_value("responsabilidades")
+        self._expect("}")
+        return ExperienciaItem(tipo="laboral", organizacion=org, puesto=puesto, descripcion=desc, horas=int(horas))
+
+    def _voluntariado(self) -> ExperienciaItem:
+        self._expect("voluntariado")
+        self._expect("{")
+        puesto = self._value("puesto")
+        desc = self._value("descripcion")
+        horas = self._value("horas", ("NUM",))
+        org = self._value("organizacion")
+        self._expect("}")
+        return ExperienciaItem(tipo="voluntariado", organizacion=org, puesto=puesto, descripcion=desc, horas=int(horas))
+
+    # --- habilidades ---
+    def _habilidades(self) -> Habilidades:
+        self._expect("habilidades")
+        self._expect("{")
+        if not self._alt("soft", "hard"):
+            raise self._error(("soft", "hard"))
+        hs: List[Habilidad] = []
+        if self._opt("soft"):
+            self._soft(hs)
+        if self._opt("hard"):
+            self._hard(hs)
+        self._expect("}")
+        return Habilidades(habilidades=hs)
+
+    def _soft(self, hs: List[Habilidad]) -> None:
+        self._expect("soft")
+        self._expect("{")
+        hs.append(Habilidad(nombre=self._value("habilidad"), tipo="soft"))
+        while self._loop(","):
+            self._expect(",")
+            hs.append(Habilidad(nombre=self._value("habilidad"), tipo="soft"))
+        self._expect("}", ",")
+
+    def _hard(self, hs: List[Habilidad]) -> None:
+        self._expect("hard")
+        self._expect("{")
+        while True:
+            self._categoria(hs)
+            if not self._loop("categoria"):
+                break
+        self._expect("}", "categoria")
+
+    def _categoria(self, hs: List[Habilidad]) -> None:
+        self._expect("categoria")
+        self._expect("{")
+        cat = self._value("nombre")
+        while True:
+            nombre = self._value("habilidad")
+            nivel = self._value("nvhab", ("NVH",))
+            if nombre:
+                hs.append(Habilidad(nombre=nombre, tipo="hard", categoria=cat, nivel=nivel))
+            if not self._loop(","):
+                break
+            self._expect(",")
+        self._expect("}", ",")
+
+    # --- portafolio ---
+    def _portafolio(self) -> Portafolio:
+        self._expect("portafolio")
+        self._expect("{")
+        if not self._alt("proyecto", "meritos"):
+            raise self._error(("proyecto", "meritos"))
+        proyectos: List[Proyecto] = []
+        meritos: List[Merito] = []
+        while self._loop("proyecto"):
+            proyectos.append(self._proyecto())
+        while self._loop("meritos"):
+            meritos.append(self._merito())
+        self._expect("}", "meritos")
+        return Portafolio(proyectos=proyectos, meritos=meritos)
+
+    def _proyecto(self) -> Proyecto:
+        self._expect("proyecto")
+        self._expect("{")
+        nombre = self._value("nombre")
+        if self._opt("grupo"):
+            self._grupo()
+        desc = self._value("descripcion")
+        tec = split_tecnologias(self._value("tecnologias"))
+        self._opt_value("web", ("RUTA",))
+        self._expect("}")
+        return Proyecto(nombre=nombre, descripcion=desc, categoria=None, tecnologias=tec)
+
+    def _merito(self) -> Merito:
+        self._expect("meritos")
+        self._expect("{")
+        nombre = self._value("nombre")
+        desc = self._value("descripcion")
+        self._expect("}")
+        return Merito(nombre=nombre, descripcion=desc)
+
+    def _grupo(self) -> None:
+        # grupo { companero { nomyape(...) github(...)? }+ }  (el visitor no lo usa)
+        self._expect("grupo")
+        self._expect("{")
+        while True:
+            self._companero()
+            if not self._loop("companero"):
+                break
+        self._expect("}", "companero")
+
+    def _companero(self) -> None:
+        self._expect("companero")
+        self._expect("{")
+        self._value("nomyape")
+        self._opt_value("github", ("RUTA",))
+        self._expect("}")
+
+
+# ---------- --check: recuperación de errores ----------
+# Lo que contiene cada regla de CVLang.g4, en orden (? opcional, * y + repetidos;
+# las alternativas van como opcionales). Con esto se calcula, como hace ANTLR,
+# qué tokens pueden seguir a cada campo o bloque según dónde aparece.
+_RULES = {
+    "start": ("gvar?", "cv+", "EOF"),
+    "_variables": ("IDENT+", "}"),
+    "_cv": ("lvar?", "datospersonales", "formacion", "idiomas?", "experiencia?", "habilidades?", "portafolio?", "}"),
+    "_datospersonales": ("nomyape", "foto?", "fecha", "bio?", "contacto", "}"),
+    "_contacto": ("email", "telefono", "redes", "}"),
+    "_redes": ("linkedin?", "github?", "web?", "}"),
+    "_formacion": ("oficial+", "complementaria*", "}"),
+    "_oficial": ("titulo", "expedidor", "descripcion?", "logros?", "fecha", "}"),
+    "_complementaria": ("titulo", "certificado?", "expedidor", "horas?", "fecha", "}"),
+    "_idiomas": ("idioma+", "}"),
+    "_idioma": ("nombre", "nivel", "expedidor?", "}"),
+    "_experiencia": ("laboral*", "voluntariado*", "}"),
+    "_laboral": ("puesto", "horas", "organizacion", "responsabilidades?", "}"),
+    "_voluntariado": ("puesto", "descripcion", "horas", "organizacion", "}"),
+    "_habilidades": ("soft?", "hard?", "}"),
+    "_soft": ("habilidad", ",*", "}"),
+    "_hard": ("categoria+", "}"),
+    "_categoria": ("nombre", "habilidad", "nvhab", ",*", "}"),
+    "_portafolio": ("proyecto*", "meritos*", "}"),
+    "_proyecto": ("nombre", "grupo?", "descripcion", "tecnologias", "web?", "}"),
+    "_merito": ("nombre", "descripcion", "}"),
+    "_grupo": ("companero+", "}"),
+    "_companero": ("nomyape", "github?", "}"),
+}
+# Token con el que empieza cada regla (_variables: gvar o lvar, su argumento)
+_RULE_START = {name: name[1:] for name in _RULES}
+_RULE_START.update({"_merito": "meritos", "_variables": None})
+
+
+def _parse_items(items: Sequence[str]) -> List[Tuple[str, str]]:
+    return [(it.rstrip("?*+"), it[-1] if it[-1] in "?*+" and len(it) > 1 else "") for it in items]
+
+
+def _follow_sets(items: Sequence[str]) -> Dict[Optional[str], frozenset]:
+    """Token -> lo que puede venir tras él en la regla; None -> con qué puede empezar."""
+    parsed = _parse_items(items)
+
+    def from_(k: int) -> set:
+        out = set()
+        for tok, mark in parsed[k:]:
+            out.add(tok)
+            if mark not in ("?", "*"):
+                break
+        return out
+
+    sets: Dict[Optional[str], frozenset] = {None: frozenset(from_(0))}
+    for k, (tok, mark) in enumerate(parsed):
+        sets[tok] = frozenset(from_(k + 1) | ({tok} if mark in ("*", "+") else set()))
+    return sets
+
+
+_FOLLOW = {name: _follow_sets(items) for name, items in _RULES.items()}
+_MARKS = {name: dict(_parse_items(items)) for name, items in _RULES.items()}
+_KEYWORD_SET = frozenset(_KEYWORDS)
+_BLOCK_KEYWORDS = frozenset(k for k in _RULE_START.values() if k) | {"gvar", "lvar"}
+
+
+class _Checker(_Parser):
+    """
+    _Parser para --check: no para en el primer error. Sigue la estrategia
+    por defecto de ANTLR (DefaultErrorStrategy): si un token no encaja,
+    prueba a saltarlo ("extraneous input") o a darlo por puesto ("missing");
+    si no se puede, la regla que falla (un campo, una entrada, una sección)
+    informa ("mismatched input"), salta hasta un token que pueda seguir a
+    alguna de las reglas abiertas y el padre continúa. Tras un error no se
+    informa de otro hasta que encaje un token.
+
+    No es el ATN de ANTLR: las alternativas de la gramática se tratan como
+    opcionales (_RULES) y "missing"/"extraneous" se deciden con los FOLLOW de
+    esas reglas, así que algunos errores (sobre todo los que siguen a otro)
+    pueden salir con otro texto o no salir. Tampoco se imita que el runtime de
+    Python amplía el "expecting" de los bucles a partir del segundo error del
+    proceso (DefaultErrorStrategy.sync modifica el conjunto cacheado).
+    """
+
+    def __init__(self, tokens: List[Token]) -> None:
+        super().__init__(tokens)
+        self.errors: List[CVSyntaxError] = []
+        self._recovering = False
+        # [regla abierta, lo que puede seguirla, bucles ya empezados] de fuera hacia dentro
+        self._stack: List[list] = [["start", frozenset(), set()]]
+        # Tipos probados en la posición actual (opcionales, bucles): el "expecting" de ANTLR
+        self._tried: set = set()
+        self._tried_i = -1
+
+    def _at(self, *types: str) -> bool:
+        if self._tried_i != self.i:
+            self._tried, self._tried_i = set(), self.i
+        self._tried.update(types)
+        return self.toks[self.i][0] in types
+
+    def _expected(self, types: Sequence[str]) -> set:
+        return set(types) | (self._tried if self._tried_i == self.i else set())
+
+    def _error(self, expected: Sequence[str]) -> CVSyntaxError:
+        return super()._error(self._expected(expected))
+
+    def _follow(self, ttype: str) -> frozenset:
+        # Lo que puede venir justo después de ttype (para darlo por puesto)
+        rule, follow, _ = self._stack[-1]
+        if ttype in (")", "}"):
+            return follow
+        if ttype == "(":
+            return _VALUE_TYPES
+        if ttype == "{":
+            return _FOLLOW[rule][None] if rule in _FOLLOW else frozenset()
+        if ttype in _BLOCK_KEYWORDS:
+            return frozenset(("{", "IDENT"))
+        if ttype in _KEYWORD_SET:
+            return frozenset(("(",))
+        if ttype == "EOF":
+            return frozenset()
+        return frozenset((")", "{", "=", ";"))
+
+    def _inline(self, match, expected: set, missing: str) -> Token:
+        """Recuperación de un solo token: saltar el que sobra o dar por puesto el que falta."""
+        tok, nxt = self.toks[self.i], self.toks[min(self.i + 1, len(self.toks) - 1)]
+        if tok[0] != "EOF" and match(nxt[0]):
+            if not self._recovering:
+                msg = f"extraneous input {_display_token(tok)} expecting {_display_set(expected)}"
+                self.errors.append(CVSyntaxError(msg, tok[2], tok[3]))
+            self._recovering = False
+            self.i += 2
+            return nxt
+        if tok[0] in self._follow(missing):
+            if not self._recovering:
+                msg = f"missing {_display_set(expected)} at {_display_token(tok)}"
+                self.errors.append(CVSyntaxError(msg, tok[2], tok[3]))
+            self._recovering = True
+            return (missing, "0" if missing == "NUM" else "", tok[2], tok[3])
+        raise self._error(expected)
+
+    def _expect(self, ttype: str, *alternatives: str) -> Token:
+        # Las alternativas del mensaje salen de lo probado en esta posición (_tried)
+        tok = self.toks[self.i]
+        if tok[0] == ttype:
+            self._recovering = False
+            self.i += 1
+            return tok
+        return self._inline(ttype.__eq__, self._expected((ttype,)), ttype)
+
+    def _expect_value(self, types: Sequence[str]) -> Token:
+        tok = self.toks[self.i]
+        if tok[0] in types:
+            self._recovering = False
+            self.i += 1
+            return tok
+        return self._inline(types.__contains__, self._expected(types), types[0])
+
+    def _sync(self, ttype: str, back: bool, expected: Optional[frozenset] = None) -> None:
+        """
+        DefaultErrorStrategy.sync antes de un opcional o de un bucle: si el
+        token no puede ir aquí, a la entrada se salta si sobra uno (o falla
+        la regla) y en la vuelta de un bucle se salta hasta algo esperado.
+        """
+        if self._recovering:
+            return
+        if expected is None:
+            expected = _FOLLOW[self._stack[-1][0]][ttype] | {ttype}
+        tok = self.toks[self.i]
+        if tok[0] in expected:
+            return
+        msg = f"extraneous input {_display_token(tok)} expecting {_display_set(expected)}"
+        if back:
+            self.errors.append(CVSyntaxError(msg, tok[2], tok[3]))
+            self._recovering = True
+            sync = expected.union(*(f[1] for f in self._stack)) | {"EOF"}
+            while self.toks[self.i][0] not in sync:
+                self.i += 1
+        elif tok[0] != "EOF" and self.toks[self.i + 1][0] in expected:
+            self.errors.append(CVSyntaxError(msg, tok[2], tok[3]))
+            self.i += 1
+        else:
+            raise self._error(expected)
+
+    def _opt(self, ttype: str) -> bool:
+        self._sync(ttype, back=False)
+        return self._at(ttype)
+
+    def _alt(self, *types: str) -> bool:
+        # Entrada a un bloque de alternativas: solo se prueba a saltar un token (el error lo da _Parser)
+        if not self._recovering and not self._at(*types):
+            self._sync(types[0], back=False, expected=frozenset(types))
+        return self._at(*types)
+
+    def _loop(self, ttype: str) -> bool:
+        frame = self._stack[-1]
+        self._sync(ttype, back=ttype in frame[2] or _MARKS[frame[0]][ttype] == "+")
+        if self._at(ttype):
+            frame[2].add(ttype)
+            return True
+        return False
+
+    def _enter(self, rule: Optional[str], start: str) -> None:
+        parent = self._stack[-1]
+        if rule is not None and _MARKS[parent[0]].get(start) == "+" and start not in parent[2]:
+            # Primera vuelta de un x+: el sync de la entrada del bucle, en la regla de fuera
+            self._sync(start, back=False, expected=frozenset((start,)))
+            parent[2].add(start)
+        self._stack.append([rule, _FOLLOW.get(parent[0], {}).get(start, frozenset()), set()])
+
+    def _recover(self, err: CVSyntaxError) -> None:
+        # Como DefaultErrorStrategy.recover: hasta algo que pueda seguir a una regla abierta
+        if not self._recovering:
+            self.errors.append(err)
+        self._recovering = True
+        sync = frozenset().union(*(f[1] for f in self._stack)) | {"EOF"}
+        while self.toks[self.i][0] not in sync:
+            self.i += 1
+
+    def _value(self, keyword: str, types: Sequence[str] = _TEXT) -> str:
+        self._enter(None, keyword)
+        try:
+            return super()._value(keyword, types)
+        except CVSyntaxError as e:
+            self._recover(e)
+            return "0" if "NUM" in types else ""
+        finally:
+            self._stack.pop()
+
+    def check(self) -> List[CVSyntaxError]:
+        try:
+            if self._opt("gvar"):
+                self._variables("gvar")
+            self._cv()
+            while self._at("cv"):
+                self._cv()
+        except CVSyntaxError as e:
+            # Falla la regla cvs: ANTLR salta hasta el final
+            self._recover(e)
+        # start: cvs EOF; lo que sobre tras el último cv se salta entero, como en ANTLR
+        self._tried_i = -1
+        try:
+            self._expect("EOF")
+        except CVSyntaxError as e:
+            if not self._recovering:
+                self.errors.append(e)
+        return self.errors
+
+
+def _guarded(name: str, rule):
+    start = _RULE_START[name]
+
+    def run(self: _Checker, *args):
+        self._enter(name, start or args[0])
+        try:
+            return rule(self, *args)
+        except CVSyntaxError as e:
+            self._recover(e)
+            return None
+        finally:
+            self._stack.pop()
+
+    return run
+
+
+for _name in _RULES:
+    if _name != "start":
+        setattr(_Checker, _name, _guarded(_name, getattr(_Parser, _name)))
+
+
+def parse_tokens(tokens: List[Token]) -> List[CVObjects]:
+    return _Parser(tokens).start()
+
+
+def check_source(text: str) -> Tuple[List[CVLexError], List[CVSyntaxError]]:
+    """Todos los errores léxicos y sintácticos del texto (--check), sin parar en el primero."""
+    lex_errors: List[CVLexError] = []
+    tokens = tokenize(text, errors=lex_errors)
+    return lex_errors, _Checker(tokens).check()
+
+
+def parse_source(text: str, first_line: int = 1) -> List[CVObjects]:
+    """Un CVObjects por cada bloque cv del texto. CVLexError/CVSyntaxError en el primer error."""
+    return _Parser(tokenize(text, first_line)).start()
+
+
+def parse_file(input_path) -> List[CVObjects]:
+    with open(input_path, "r", encoding="utf-8") as f:
+        return parse_source(f.read())
+
+
+def parse_with_rd(input_path: Path, cache: Optional[ParseCache] = None) -> dict:
+    """Mismo resultado que parse_with_antlr (primer cv del archivo)."""
+    cvs = cache.load_or_parse(Path(input_path), parse_file, engine="rd") if cache is not None else parse_file(input_path)
+    objs = cvs[0]
+    return {
+        "cv_id": objs.cv_id,
+        "datos": objs.datos,
+        "formacion": objs.formacion,
+        "idiomas": objs.idiomas,
+        "experiencia": objs.experiencia,
+        "habilidades": objs.habilidades,
+        "portafolio": objs.portafolio,
+    }
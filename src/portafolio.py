@@ -1,7 +1,8 @@
 from dataclasses import dataclass, field, asdict
+from interning import intern_list, intern_opt
 from typing import List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class Proyecto:
     nombre: str
     descripcion: str
@@ -10,12 +11,16 @@ class Proyecto:
     web: Optional[str] = None
     grupo: Optional[List[str]] = None  # nombres de compañeros
 
-@dataclass
+    def __post_init__(self):
+        self.categoria = intern_opt(self.categoria)
+        self.tecnologias = intern_list(self.tecnologias)
+
+@dataclass(slots=True)
 class Merito:
     nombre: str
     descripcion: str
 
-@dataclass
+@dataclass(slots=True)
 class Portafolio:
     proyectos: List[Proyecto] = field(default_factory=list)
     meritos: List[Merito] = field(default_factory=list)
@@ -24,4 +29,7 @@ class Portafolio:
         return {
             "proyectos": [asdict(p) for p in self.proyectos],
             "meritos": [asdict(m) for m in self.meritos]
-        }
\ No newline at end of file
+        }
+
+    def view(self):
+        return {"proyectos": self.proyectos, "meritos": self.meritos}
\ No newline at end of file
@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import argparse
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import fields, is_dataclass
+import hashlib
+import importlib.util
+from itertools import islice
+import json
+from operator import attrgetter
+import os
+from pathlib import Path
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+from jinja2 import __version__ as JINJA_VERSION
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "build" / "jinja"
+DEFAULT_PRECOMPILED_DIR = PROJECT_ROOT / "build" / "templates"
+
+_STAMP_PREFIX = "# SOURCE_STAMP="
+_FRAGMENTS_PREFIX = "# FRAGMENTS="
+# Sube cuando cambia lo que decide fragment_plan: los módulos precompilados
+# guardan su plan y uno de una versión anterior se ignora
+_FRAGMENT_PLAN_VERSION = 2
+
+# Trozos de Template.generate() que se juntan en cada escritura
+WRITE_CHUNKS = 4096
+# Archivos comprimidos junto a cada salida (los de html_output.SUFFIXES)
+_SIBLING_SUFFIXES = (".gz", ".br")
+# Tope de la caché de secciones ya renderizadas de cada proceso
+FRAGMENT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _source_stamp(source: str) -> str:
+    # El código generado depende del texto de la plantilla y de la versión de Jinja
+    # (y del plan de fragmentos que va en su cabecera)
+    return hashlib.sha256(f"{JINJA_VERSION}\0{_FRAGMENT_PLAN_VERSION}\0{source}".encode("utf-8")).hexdigest()
+
+
+def precompiled_path(template_path, out_dir: Path = DEFAULT_PRECOMPILED_DIR) -> Path:
+    # Un módulo por ruta absoluta: dos plantilla1.html de carpetas distintas no chocan
+    resolved = Path(template_path).resolve()
+    tag = hashlib.sha1(str(resolved).encode("utf-8")).hexdigest()[:10]
+    return Path(out_dir) / f"tpl_{resolved.stem}_{tag}.py"
+
+
+def fragment_plan(env: Environment, source: str) -> Dict[str, str]:
+    """
+    Bloques de la plantilla que se pueden cachear ya renderizados: los que
+    solo leen la variable de su mismo nombre ({% block formacion %} solo usa
+    formacion). Devuelve nombre -> hash del bloque (su árbol, así que
+    editar otro bloque o el resto de la página no lo invalida).
+    Lo que leen las plantillas que un bloque incluye o importa no sale en
+    find_undeclared_variables: esos bloques no se cachean.
+    """
+    from jinja2 import meta, nodes
+
+    plan: Dict[str, str] = {}
+    for block in env.parse(source).find_all(nodes.Block):
+        if block.find((nodes.Include, nodes.Import, nodes.FromImport)) is not None:
+            continue
+        body = nodes.Template(block.body).set_environment(env)
+        if meta.find_undeclared_variables(body) <= {block.name}:
+            plan[block.name] = hashlib.sha1(repr(block).encode("utf-8")).hexdigest()
+    return plan
+
+
+_GETTERS: Dict[type, Any] = {}
+
+
+def _plain(value: Any) -> Any:
+    """
+    Los datos de una sección como listas/dicts para la clave de un bloque: las
+    dataclasses del modelo pasan a [clase, valores de sus campos] con un
+    attrgetter, en C (una lista de objetos de la misma clase, con un map).
+    """
+    tp = type(value)
+    if tp is dict:
+        return {k: _plain(v) for k, v in value.items()}
+    if tp is list or tp is tuple:
+        types = set(map(type, value))
+        if len(types) == 1:
+            (item,) = types
+            if is_dataclass(item):
+                return [_class_name(item), list(map(_getter(item), value))]
+        return value
+    if is_dataclass(tp):
+        return [_class_name(tp), _getter(tp)(value)]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    # Dataclasses anidadas en los campos de otra; el resto de tipos no JSON
+    # hacen fallar la clave (el bloque se renderiza con la página)
+    if is_dataclass(type(value)):
+        return _plain(value)
+    raise TypeError(f"{type(value).__name__} no va en la clave de un fragmento")
+
+
+def _class_name(tp: type) -> str:
+    return f"{tp.__module__}.{tp.__qualname__}"
+
+
+def _getter(tp: type):
+    getter = _GETTERS.get(tp)
+    if getter is None:
+        getter = _GETTERS[tp] = attrgetter(*(f.name for f in fields(tp)))
+    return getter
+
+
+# Forma canónica de los datos de una sección: JSON con las claves ordenadas
+_KEY_ENCODER = json.JSONEncoder(sort_keys=True, check_circular=False, separators=(",", ":"), default=_json_default)
+
+
+def _fragment_key(scope: str, digest: str, name: str, context: Dict[str, Any]) -> Optional[str]:
+    # Hash del bloque + de la plantilla (scope: su ruta, que también fija el
+    # Environment) + de los datos de su sección; None si no se pueden serializar
+    try:
+        data = _KEY_ENCODER.encode([scope, name in context, _plain(context.get(name))])
+    except (TypeError, ValueError, RecursionError):
+        return None
+    return digest + hashlib.blake2b(data.encode("ascii"), digest_size=16).hexdigest()
+
+
+class FragmentCache:
+    """
+    LRU en memoria de bloques renderizados (clave -> html), acotado en bytes.
+    Se puede usar desde varios hilos.
+    """
+
+    def __init__(self, max_bytes: int = FRAGMENT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            html = self._items.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key: str, html: str) -> None:
+        size = len(key) + len(html)
+        with self._lock:
+            if size > self.max_bytes or key in self._items:
+                return
+            self._items[key] = html
+            self._size += size
+            while self._size > self.max_bytes:
+                old_key, old = self._items.popitem(last=False)
+                self._size -= len(old_key) + len(old)
+
+
+class Renderer:
+    """
+    Un Environment de Jinja por carpeta de plantillas, reutilizado entre CVs.
+    Jinja ya guarda en memoria las plantillas compiladas de cada Environment;
+    además el bytecode se guarda en disco (FileSystemBytecodeCache) para que
+    otros procesos (workers del pool, siguientes ejecuciones) no recompilen.
+
+    Con cache_fragments(), cada {% block %} que solo depende de su sección
+    (fragment_plan) se guarda ya renderizado en una FragmentCache: la página
+    se monta con los bloques de la caché y solo se renderizan las secciones
+    cuyos datos (o cuyo bloque en la plantilla) cambiaron. Es para procesos
+    que vuelven a renderizar los mismos CVs (watch.py, serve.py); en un lote
+    de CVs distintos no hay aciertos y el hash de cada sección es coste extra.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        precompiled_dir: Optional[Path] = DEFAULT_PRECOMPILED_DIR,
+    ) -> None:
+        self._envs: Dict[str, Environment] = {}
+        self._precompiled_dir = precompiled_dir
+        self._modules: Dict[str, Tuple[int, Template]] = {}  # ruta -> (mtime_ns de la plantilla, Template)
+        self.fragments: Optional[FragmentCache] = None
+        # plantilla -> (su ruta resuelta, fragment_plan)
+        self._plans: "WeakKeyDictionary[Template, Tuple[str, Dict[str, str]]]" = WeakKeyDictionary()
+        self._bcc = None
+        if cache_dir is not None:
+            try:
+                Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                self._bcc = FileSystemBytecodeCache(str(cache_dir))
+            except OSError:
+                # Sin permisos de escritura: se compila igual, solo que sin caché en disco
+                self._bcc = None
+
+    def cache_fragments(self, max_bytes: int = FRAGMENT_CACHE_BYTES) -> None:
+        """Activa la caché de secciones (ver la clase)."""
+        if self.fragments is None:
+            self.fragments = FragmentCache(max_bytes)
+            self._modules.clear()  # las plantillas ya cargadas se vuelven a cargar con su plan
+
+    def environment(self, template_dir: Path) -> Environment:
+        key = str(Path(template_dir).resolve())
+        env = self._envs.get(key)
+        if env is None:
+            env = Environment(loader=FileSystemLoader(key), bytecode_cache=self._bcc)
+            self._envs[key] = env
+        return env
+
+    def template(self, template_path) -> Template:
+        template_path = Path(template_path)
+        if self._precompiled_dir is not None:
+            tpl = self._precompiled(template_path)
+            if tpl is not None:
+                return tpl
+        env = self.environment(template_path.parent)
+        tpl = env.get_template(template_path.name)
+        if self.fragments is not None and tpl not in self._plans:
+            plan = fragment_plan(env, template_path.read_text(encoding="utf-8"))
+            self._plans[tpl] = (str(template_path.resolve()), plan)
+        return tpl
+
+    def _precompiled(self, template_path: Path) -> Optional[Template]:
+        """
+        La plantilla desde el módulo que generó precompile_template(), si existe
+        y corresponde al texto actual de la plantilla. Se importa como cualquier
+        módulo (con su .pyc), sin pasar por el lexer/parser/compilador de Jinja.
+        """
+        key = str(template_path.resolve())
+        try:
+            mtime = template_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        cached = self._modules.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        path = precompiled_path(template_path, self._precompiled_dir)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stamp = f.readline().strip()[len(_STAMP_PREFIX):]
+                plan_line = f.readline()
+            source = template_path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        if stamp != _source_stamp(source) or not plan_line.startswith(_FRAGMENTS_PREFIX):
+            return None  # plantilla editada después de precompilar (o módulo antiguo): se compila normal
+
+        spec = importlib.util.spec_from_file_location(f"_cv_{path.stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        env = self.environment(template_path.parent)
+        tpl = env.template_class.from_module_dict(env, module.__dict__, env.make_globals(None))
+        if self.fragments is not None:
+            # El plan va en el propio módulo: no hace falta el parser de Jinja
+            self._plans[tpl] = (key, json.loads(plan_line[len(_FRAGMENTS_PREFIX):]))
+        self._modules[key] = (mtime, tpl)
+        return tpl
+
+    def generate(self, tpl: Template, context: Dict[str, Any]) -> Iterator[str]:
+        """Como tpl.generate(**context), con los bloques de fragment_plan desde la caché."""
+        scope, plan = self._plans.get(tpl, ("", None)) if self.fragments is not None else ("", None)
+        if not plan:
+            return tpl.generate(**context)
+        return self._assemble(tpl, scope, plan, context)
+
+    def _assemble(self, tpl: Template, scope: str, plan: Dict[str, str], context: Dict[str, Any]) -> Iterator[str]:
+        ctx = tpl.new_context(dict(context))
+        try:
+            for name, digest in plan.items():
+                key = _fragment_key(scope, digest, name, context)
+                if key is None:
+                    continue  # se renderiza con el resto de la página
+                html = self.fragments.get(key)
+                if html is None:
+                    html = "".join(tpl.blocks[name](ctx))
+                    self.fragments.put(key, html)
+                # El esqueleto hace `yield from context.blocks[name][0](context)`
+                ctx.blocks[name] = [lambda _ctx, html=html: (html,)]
+            yield from tpl.root_render_func(ctx)
+        except Exception:
+            yield tpl.environment.handle_exception()
+
+    def render(self, template_path, **context: Any) -> str:
+        return "".join(self.generate(self.template(template_path), context))
+
+    def render_cv(self, objs, template_path) -> str:
+        return self.render(template_path, **cv_context(objs))
+
+    def render_to_file(self, template_path, out_path, assets=None, output=None, **context: Any) -> int:
+        """
+        Renderiza por trozos directamente a out_path; devuelve los bytes escritos.
+        assets (assets.AssetPipeline, ya aplicado al contexto) reescribe el <head>;
+        output (html_output.OutputStage) minifica y comprime.
+        """
+        chunks = self.generate(self.template(template_path), context)
+        if assets is not None:
+            chunks = assets.rewrite_page(chunks)
+        return write_chunks(chunks, out_path, output=output)
+
+    def render_cv_to_file(self, objs, template_path, out_path, assets=None, output=None) -> int:
+        context = cv_context(objs)
+        if assets is not None:
+            context = assets.page_context(context)
+        return self.render_to_file(template_path, out_path, assets=assets, output=output, **context)
+
+
+def cv_context(objs) -> Dict[str, Any]:
+    # CVObjects (ANTLR / rd) o el dict raíz que imprime el parser de CUP
+    return objs.view() if hasattr(objs, "view") else dict(objs)
+
+
+def write_chunks(chunks: Iterable[str], out_path, batch: int = WRITE_CHUNKS, output=None) -> int:
+    """
+    Escribe los trozos de texto (p. ej. Template.generate()) a medida que se
+    producen, de batch en batch codificados en UTF-8, así que la memoria no
+    crece con el tamaño de la salida. Se escribe en un temporal de la misma
+    carpeta que al terminar se renombra sobre out_path: nunca queda una
+    salida a medias. Devuelve los bytes escritos.
+    output (html_output.OutputStage): minifica por el camino y escribe a la
+    vez los hermanos comprimidos (out_path.gz, out_path.br).
+    """
+    out_path = Path(out_path)
+    tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    comps = []
+    if output is not None:
+        chunks = output.apply(chunks)
+        comps = output.compressors()
+    ztmps = [Path(f"{tmp}{c.suffix}") for c in comps]
+    written = 0
+    it = iter(chunks)
+    try:
+        with ExitStack() as stack:
+            f = stack.enter_context(open(tmp, "wb"))
+            zfiles = [stack.enter_context(open(p, "wb")) for p in ztmps]
+            while True:
+                block = list(islice(it, batch))
+                if not block:
+                    break
+                data = "".join(block).encode("utf-8")
+                f.write(data)
+                written += len(data)
+                for c, zf in zip(comps, zfiles):
+                    zf.write(c.process(data))
+            for c, zf in zip(comps, zfiles):
+                zf.write(c.finish())
+        for c, p in zip(comps, ztmps):
+            os.replace(p, f"{out_path}{c.suffix}")
+        os.replace(tmp, out_path)
+    except BaseException:
+        for p in (tmp, *ztmps):
+            p.unlink(missing_ok=True)
+        raise
+    # Hermanos de una build anterior con otras opciones: quedarían desfasados
+    made = {c.suffix for c in comps}
+    for suffix in _SIBLING_SUFFIXES:
+        if suffix not in made:
+            Path(f"{out_path}{suffix}").unlink(missing_ok=True)
+    return written
+
+
+_RENDERER: Optional[Renderer] = None
+
+
+def get_renderer() -> Renderer:
+    """Renderer compartido por todo el proceso."""
+    global _RENDERER
+    if _RENDERER is None:
+        _RENDERER = Renderer()
+    return _RENDERER
+
+
+def precompile_template(template_path, out_dir: Path = DEFAULT_PRECOMPILED_DIR) -> Path:
+    """
+    Compila la plantilla a un módulo Python (y su .pyc) en out_dir. El Renderer
+    lo usa en lugar de compilar mientras la plantilla no cambie.
+    """
+    import py_compile
+
+    template_path = Path(template_path)
+    source = template_path.read_text(encoding="utf-8")
+    env = get_renderer().environment(template_path.parent)
+    code = env.compile(source, template_path.name, str(template_path.resolve()), raw=True, defer_init=True)
+
+    plan = fragment_plan(env, source)
+
+    out = precompiled_path(template_path, out_dir)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    tmp.write_text(
+        f"{_STAMP_PREFIX}{_source_stamp(source)}\n"
+        f"{_FRAGMENTS_PREFIX}{json.dumps(plan, sort_keys=True)}\n"
+        f"# Generado desde {template_path.name} con render_engine.py --precompile; no editar.\n"
+        f"{code}\n",
+        encoding="utf-8",
+    )
+    os.replace(tmp, out)
+    py_compile.compile(str(out), doraise=True)
+    return out
+
+
+def main():
+    # Render del JSON de Flex/CUP (cv.json) con el mismo Renderer que usa ANTLR
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--json", help="JSON del parser (ej: cv.json)")
+    ap.add_argument("--template", required=True, help="Ruta al .html (ej: templates/plantilla1.html)")
+    ap.add_argument("--out", help="Ruta de salida (ej: index.html)")
+    ap.add_argument("--metrics", nargs="?", const="text", choices=["text", "json"], help="Tiempos por fase por stderr")
+    ap.add_argument(
+        "--assets",
+        action="store_true",
+        help="Fotos al tamaño de la plantilla, nombres con hash y CSS crítico en línea (ver assets.py)",
+    )
+    ap.add_argument("--minify", action="store_true", help="Minifica el HTML y el CSS de <style>")
+    ap.add_argument(
+        "--compress",
+        nargs="?",
+        const="gz,br",
+        metavar="gz,br",
+        help="Escribe también <out>.gz y/o <out>.br (por defecto los dos)",
+    )
+    ap.add_argument(
+        "--precompile",
+        action="store_true",
+        help="Solo compila --template a un módulo Python en build/templates (lo usan las siguientes ejecuciones)",
+    )
+    args = ap.parse_args()
+
+    if args.precompile:
+        print(f"OK -> {precompile_template(args.template)}")
+        return
+    if not args.json or not args.out:
+        ap.error("--json y --out son obligatorios (salvo con --precompile)")
+
+    from metrics import Metrics
+
+    m = Metrics(enabled=bool(args.metrics))
+    with m.phase("json_decode"):
+        with open(args.json, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    assets = None
+    if args.assets:
+        from assets import AssetPipeline
+
+        with m.phase("assets"):
+            assets = AssetPipeline(Path(args.template), Path(args.out).parent)
+    output = None
+    if args.minify or args.compress:
+        from html_output import output_stage
+
+        try:
+            output = output_stage(args.minify, args.compress.split(",") if args.compress else ())
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(2)
+    # Render y escritura van juntos: la página sale por trozos al archivo
+    with m.phase("render"):
+        written = get_renderer().render_cv_to_file(data, args.template, args.out, assets=assets, output=output)
+    if args.metrics:
+        m.set("output_bytes", written)
+        m.report(args.metrics)
+
+    if written == 0:
+        print(f"[ERROR] {args.out} no se generó o está vacío", file=sys.stderr)
+        sys.exit(3)
+
+    print(f"OK -> {args.out} generado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Servicio HTTP de render (asyncio, sin dependencias nuevas) para generar CVs
+a demanda sin arrancar main.py por petición:
+
+    python src/serve.py --port 8080 --engine rd --jobs 4
+
+    POST /render?template=plantilla1.html[&cv=<cv_id>]   cuerpo: fuente CVLang -> text/html
+    POST /parse                                           cuerpo: fuente CVLang -> JSON
+    GET  /health                                          estado, caché y colas
+
+El parseo y el render van a un pool de procesos cuyos workers se calientan
+al arrancar (imports, plantillas compiladas, cachés DFA de ANTLR). Con
+--engine flexcup cada worker tiene además su JVM con el parser de CUP
+(parsers/flexcup_pool.py); su JSON no lleva cv_id, así que no admite &cv=. Las
+respuestas se guardan en una caché LRU por hash de la fuente (y plantilla);
+peticiones iguales en vuelo comparten el mismo trabajo. Si hay más de
+--max-queue peticiones esperando, se responde 503 con Retry-After en lugar
+de encolar sin límite. Cada respuesta lleva Server-Timing (queue, parse,
+render, total) y X-Cache (hit, miss o shared).
+
+Prueba de carga: bench/load_serve.py.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from build_cache import PROJECT_ROOT
+from cv_model import CVObjects
+
+DEFAULT_TEMPLATES_DIR = PROJECT_ROOT / "templates"
+# Se parsea al arrancar cada worker para calentar lexer/parser
+_WARMUP_INPUT = PROJECT_ROOT / "entradas" / "entrada.txt"
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# (estado, content-type, cuerpo, {fase: ms})
+Result = Tuple[int, str, bytes, Dict[str, float]]
+
+
+# ---------- workers del pool ----------
+_ENGINE = "antlr"
+_TEMPLATES_DIR = DEFAULT_TEMPLATES_DIR
+
+
+def _init_worker(engine: str, templates_dir: str) -> None:
+    global _ENGINE, _TEMPLATES_DIR
+    from render_engine import get_renderer
+
+    _ENGINE = engine
+    _TEMPLATES_DIR = Path(templates_dir)
+    # Fuentes que difieren en una sección (fallos de la caché de respuestas) reusan el resto
+    get_renderer().cache_fragments()
+    for tpl in sorted(_TEMPLATES_DIR.glob("*.html")):
+        try:
+            get_renderer().template(tpl)
+        except Exception:  # una plantilla rota no impide servir las demás
+            pass
+    if engine == "flexcup":
+        from parsers.flexcup_pool import shared_pool
+
+        shared_pool()
+    if engine == "antlr":
+        from parsers.antlr_warmup import prewarm
+
+        # Todas las reglas de la gramática, no solo las que usa _WARMUP_INPUT
+        prewarm()
+    if _WARMUP_INPUT.exists():
+        try:
+            _parse(_WARMUP_INPUT.read_text(encoding="utf-8"))
+        except Exception:
+            pass
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _parse(source: str) -> List[CVObjects]:
+    if _ENGINE == "rd":
+        from parsers import rd_engine
+
+        return rd_engine.parse_source(source)
+
+    if _ENGINE == "flexcup":
+        from parsers.flexcup_pool import shared_pool
+
+        # El dict raíz de CUP: se renderiza igual que un CVObjects (cv_context)
+        return [shared_pool().parse_source(source)]
+
+    from parsers.antlr_engine import ErrorCollector, parse_source
+
+    # Los errores van en la respuesta, no al stderr del servicio
+    return parse_source(source, ErrorCollector())
+
+
+def _error(status: int, message: str, timings: Dict[str, float]) -> Result:
+    body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+    return status, "application/json; charset=utf-8", body, timings
+
+
+def _job(kind: str, source: str, template: Optional[str], cv: Optional[str]) -> Result:
+    # En el worker: parseo (y render) de una petición; los errores de la
+    # entrada vuelven como 422, no como excepción
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    try:
+        cvs = _parse(source)
+    except Exception as e:  # el lexer de ANTLR lanza Exception en caracteres no reconocidos
+        return _error(422, str(e) or e.__class__.__name__, timings)
+    finally:
+        timings["parse"] = (time.perf_counter() - t0) * 1000
+
+    if kind == "parse":
+        body = json.dumps(
+            {"cvs": [{"cv_id": o.cv_id, **o.to_dict()} if isinstance(o, CVObjects) else o for o in cvs]},
+            ensure_ascii=False,
+        )
+        return 200, "application/json; charset=utf-8", body.encode("utf-8"), timings
+
+    objs = cvs[0] if cv is None else next((o for o in cvs if getattr(o, "cv_id", None) == cv), None)
+    if objs is None:
+        return _error(404, f"no hay ningún cv {cv!r} en la fuente", timings)
+    from render_engine import get_renderer
+
+    t0 = time.perf_counter()
+    html = get_renderer().render_cv(objs, _TEMPLATES_DIR / template)
+    timings["render"] = (time.perf_counter() - t0) * 1000
+    return 200, "text/html; charset=utf-8", html.encode("utf-8"), timings
+
+
+# ---------- servicio ----------
+class RenderService:
+    def __init__(
+        self,
+        engine: str = "antlr",
+        templates_dir: Path = DEFAULT_TEMPLATES_DIR,
+        jobs: Optional[int] = None,
+        cache_size: int = 256,
+        max_queue: int = 64,
+        max_body: int = 1 << 20,
+    ) -> None:
+        self.engine = engine
+        self.templates_dir = Path(templates_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self._cache: "OrderedDict[Tuple, Result]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._pool = None
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "shared": 0, "rejected": 0}
+
+    async def start(self) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=_init_worker, initargs=(self.engine, str(self.templates_dir))
+        )
+        # Un trabajo en curso por worker; el resto espera su turno (o recibe 503)
+        self._slots = asyncio.Semaphore(self.jobs)
+        loop = asyncio.get_running_loop()
+        # Arranca y calienta todos los workers antes de aceptar peticiones
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _ping) for _ in range(self.jobs)))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    # --- caché ---
+    def _cache_get(self, key: Tuple) -> Optional[Result]:
+        value = self._cache.get(key)
+        if value is not None:
+            self._cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: Tuple, value: Result) -> None:
+        if value[0] >= 500 or self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- trabajo ---
+    async def run(self, kind: str, source: bytes, template: Optional[str], cv: Optional[str]) -> Tuple[Result, str, float]:
+        """(resultado, estado de caché, ms esperando un worker)."""
+        tpl_stamp = None
+        if template is not None:
+            tpl_stamp = (self.templates_dir / template).stat().st_mtime_ns  # editar la plantilla invalida
+        key = (kind, self.engine, template, tpl_stamp, cv, hashlib.sha256(source).hexdigest())
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached, "hit", 0.0
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(shared), "shared", 0.0
+
+        if self._waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            return _error(503, "servicio saturado, reintenta", {}), "", 0.0
+
+        self.stats["misses"] += 1
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._inflight[key] = fut
+        try:
+            t0 = time.perf_counter()
+            self._waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            queued = (time.perf_counter() - t0) * 1000
+            try:
+                result = await loop.run_in_executor(self._pool, _job, kind, source.decode("utf-8"), template, cv)
+            finally:
+                self._slots.release()
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # ya se propaga aquí: que asyncio no avise de que nadie la leyó
+            raise
+        finally:
+            del self._inflight[key]
+        self._cache_put(key, result)
+        fut.set_result(result)
+        return result, "miss", queued
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[Result, str, float]:
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/health":
+            if method != "GET":
+                return _error(405, "usa GET", {}), "", 0.0
+            data = {
+                "ok": True,
+                "engine": self.engine,
+                "workers": self.jobs,
+                "cache": {"size": len(self._cache), "max": self.cache_size},
+                "waiting": self._waiting,
+                **self.stats,
+            }
+            return (200, "application/json", json.dumps(data).encode(), {}), "", 0.0
+        if url.path not in ("/render", "/parse"):
+            return _error(404, f"no existe {url.path}", {}), "", 0.0
+        if method != "POST":
+            return _error(405, "usa POST con la fuente CVLang en el cuerpo", {}), "", 0.0
+        try:
+            body.decode("utf-8")
+        except UnicodeDecodeError:
+            return _error(400, "el cuerpo no es UTF-8", {}), "", 0.0
+
+        template = None
+        if url.path == "/render":
+            template = params.get("template", "")
+            # Solo nombres de plantillas de la carpeta: nada de rutas
+            if not template or Path(template).name != template or not (self.templates_dir / template).is_file():
+                return _error(404, f"no existe la plantilla {template!r}", {}), "", 0.0
+        return await self.run(url.path[1:], body, template, params.get("cv"))
+
+    # --- HTTP ---
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 con keep-alive; una petición detrás de otra por conexión
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                t0 = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                    headers = {}
+                    for line in lines[1:]:
+                        if line:
+                            name, _, value = line.partition(":")
+                            headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    await self._respond(writer, _error(400, "petición mal formada", {}), "", 0.0, t0, False)
+                    break
+                if length > self.max_body:
+                    await self._respond(writer, _error(413, f"máximo {self.max_body} bytes", {}), "", 0.0, t0, False)
+                    break
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                self.stats["requests"] += 1
+                try:
+                    result, cache, queued = await self.dispatch(method, target, body)
+                except Exception as e:  # fallo del worker (p. ej. el proceso murió)
+                    result, cache, queued = _error(500, str(e) or e.__class__.__name__, {}), "", 0.0
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, result, cache, queued, t0, keep)
+                if not keep:
+                    break
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, result: Result, cache: str, queued: float, t0: float, keep: bool) -> None:
+        status, ctype, body, timings = result
+        total = (time.perf_counter() - t0) * 1000
+        phases = [f"queue;dur={queued:.2f}"] if cache == "miss" else []
+        # Con hit o shared el parseo no se hizo para esta petición
+        if cache == "miss":
+            phases += [f"{name};dur={ms:.2f}" for name, ms in timings.items()]
+        phases.append(f"total;dur={total:.2f}")
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            f"Content-Type: {ctype}",
+            f"Content-Length: {len(body)}",
+            f"Server-Timing: {', '.join(phases)}",
+            f"Connection: {'keep-alive' if keep else 'close'}",
+        ]
+        if cache:
+            head.append(f"X-Cache: {cache}")
+        if status == 503:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def serve(service: RenderService, host: str, port: int) -> None:
+    # SIGTERM (kill, systemd, bench/load_serve.py) para igual que Ctrl+C: se
+    # cierra el pool y no quedan workers huérfanos
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):  # Windows
+        pass
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    addr = server.sockets[0].getsockname()
+    print(f"Sirviendo en http://{addr[0]}:{addr[1]} (engine={service.engine}, workers={service.jobs})", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--engine", choices=["antlr", "rd", "flexcup"], default="antlr")
+    ap.add_argument("--templates", default=str(DEFAULT_TEMPLATES_DIR), help="Carpeta de las plantillas que se pueden pedir")
+    ap.add_argument("--jobs", type=int, default=None, help="Workers del pool (por defecto: nº de CPUs)")
+    ap.add_argument("--cache-size", type=int, default=256, help="Respuestas guardadas en la caché LRU (0 = sin caché)")
+    ap.add_argument("--max-queue", type=int, default=64, help="Peticiones esperando un worker antes de responder 503")
+    ap.add_argument("--max-body", type=int, default=1 << 20, help="Tamaño máximo de la fuente en bytes")
+    args = ap.parse_args()
+
+    service = RenderService(
+        engine=args.engine,
+        templates_dir=Path(args.templates),
+        jobs=args.jobs,
+        cache_size=args.cache_size,
+        max_queue=args.max_queue,
+        max_body=args.max_body,
+    )
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("Servicio parado", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
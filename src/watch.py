@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import hashlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from batch import unique_names, cv_filename, file_output_names
+from cv_builder import CVObjects
+from cv_stream import CVStreamParser, iter_cv_sources
+from render_engine import get_renderer
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Se inyecta antes de </body> en las páginas servidas por la vista previa
+_RELOAD_SNIPPET = b"""<script>
+(function () {
+  var page = location.pathname.split("/").pop() || "index.html";
+  new EventSource("/__reload").onmessage = function (e) {
+    var changed = e.data.split(",");
+    if (changed.indexOf("*") >= 0 || changed.indexOf(page) >= 0) location.reload();
+  };
+})();
+</script>
+"""
+
+
+class IncrementalBuilder:
+    """
+    Mantiene en memoria el lexer/parser, la plantilla compilada y los
+    CVObjects de cada bloque cv. Al cambiar un archivo solo se vuelven a
+    parsear los bloques cuyo texto cambió (clave: hash del texto) y solo se
+    reescriben las salidas afectadas.
+    """
+
+    def __init__(self, template_path: Path, out_dir: Path, single_file: bool) -> None:
+        self.template_path = Path(template_path)
+        self.out_dir = Path(out_dir)
+        self.single_file = single_file
+        self._parser = CVStreamParser()
+        # por archivo: [(nombre de salida, hash del bloque, CVObjects)]
+        self._files: Dict[str, List[Tuple[str, str, CVObjects]]] = {}
+
+    def _names(self, input_path: str, cvs: List[CVObjects]) -> List[str]:
+        if self.single_file:
+            return unique_names([cv_filename(o.cv_id) for o in cvs])
+        return file_output_names(input_path, [o.cv_id for o in cvs])
+
+    def _write(self, name: str, objs: CVObjects) -> None:
+        # Atómico: la vista previa nunca sirve una página a medio escribir
+        get_renderer().render_cv_to_file(objs, self.template_path, self.out_dir / name)
+
+    def build_file(self, input_path: str) -> Set[str]:
+        """Reconstruye un archivo; devuelve los nombres de salida que cambiaron."""
+        old = self._files.get(input_path, [])
+        by_hash = {h: objs for _, h, objs in old}
+        old_out = {name: h for name, h, _ in old}
+
+        hashes: List[str] = []
+        cvs: List[CVObjects] = []
+        with open(input_path, "r", encoding="utf-8") as fh:
+            for first_line, text in iter_cv_sources(fh):
+                h = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                objs = by_hash.get(h)
+                if objs is None:
+                    objs = self._parser.parse_block(text, first_line)
+                hashes.append(h)
+                cvs.append(objs)
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        entries = list(zip(self._names(input_path, cvs), hashes, cvs))
+        changed: Set[str] = set()
+        for name, h, objs in entries:
+            if old_out.get(name) != h or not (self.out_dir / name).exists():
+                self._write(name, objs)
+                changed.add(name)
+
+        # Salidas de cv que ya no existen en el archivo
+        for name in set(old_out) - {e[0] for e in entries}:
+            (self.out_dir / name).unlink(missing_ok=True)
+            changed.add(name)
+
+        self._files[input_path] = entries
+        return changed
+
+    def forget_file(self, input_path: str) -> Set[str]:
+        gone = {name for name, _, _ in self._files.pop(input_path, [])}
+        for name in gone:
+            (self.out_dir / name).unlink(missing_ok=True)
+        return gone
+
+    def rerender_all(self) -> Set[str]:
+        # Cambió la plantilla: no hace falta reparsear nada
+        changed: Set[str] = set()
+        for entries in self._files.values():
+            for name, _, objs in entries:
+                self._write(name, objs)
+                changed.add(name)
+        return changed
+
+
+class _Reloader:
+    """Versión + nombres cambiados, compartido entre el watcher y las conexiones SSE."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._version = 0
+        self._changed: List[str] = []
+
+    def notify(self, names: Set[str]) -> None:
+        with self._cond:
+            self._version += 1
+            self._changed = sorted(names)
+            self._cond.notify_all()
+
+    def wait(self, version: int, timeout: float) -> Tuple[int, List[str]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version, timeout=timeout)
+            return self._version, self._changed
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+
+def _make_handler(out_dir: Path, reloader: _Reloader):
+    class PreviewHandler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(out_dir), **kwargs)
+
+        def log_message(self, fmt, *args):  # sin ruido por cada petición
+            pass
+
+        def translate_path(self, path):
+            # styles.css, imagenes/... se sirven desde la raíz del proyecto si no están en out_dir
+            local = Path(super().translate_path(path))
+            if not local.exists():
+                rel = local.relative_to(out_dir.resolve()) if local.is_relative_to(out_dir.resolve()) else None
+                if rel is not None and (PROJECT_ROOT / rel).exists():
+                    return str(PROJECT_ROOT / rel)
+            return str(local)
+
+        def do_GET(self):
+            if self.path == "/__reload":
+                return self._events()
+            path = Path(self.translate_path(self.path))
+            if path.is_dir():
+                path = path / "index.html"
+            if path.suffix == ".html" and path.is_file():
+                body = path.read_bytes().replace(b"</body>", _RELOAD_SNIPPET + b"</body>", 1)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            return super().do_GET()
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            version = reloader.version
+            try:
+                while True:
+                    new_version, names = reloader.wait(version, timeout=15)
+                    if new_version == version:
+                        self.wfile.write(b": ping\n\n")  # mantiene viva la conexión
+                    else:
+                        version = new_version
+                        self.wfile.write(f"data: {','.join(names)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return PreviewHandler
+
+
+def _mtimes(paths: List[Path]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for p in paths:
+        try:
+            out[str(p)] = p.stat().st_mtime_ns
+        except OSError:
+            pass
+    return out
+
+
+def watch(
+    template_path: Path,
+    out_dir: Path,
+    input_path: Optional[Path] = None,
+    input_dir: Optional[Path] = None,
+    port: int = 8000,
+    interval: float = 0.2,
+) -> None:
+    """
+    Reconstruye al vuelo lo que cambie en las entradas, la plantilla o
+    styles.css y avisa a la vista previa (http://localhost:<port>/) para que
+    se recargue. port=0 desactiva el servidor.
+    """
+    # Cada cambio vuelve a renderizar CVs ya vistos: solo las secciones que cambian
+    get_renderer().cache_fragments()
+    builder = IncrementalBuilder(template_path, out_dir, single_file=input_path is not None)
+    reloader = _Reloader()
+    styles = PROJECT_ROOT / "styles.css"
+
+    def inputs() -> List[Path]:
+        if input_path is not None:
+            return [input_path]
+        return sorted(p for p in input_dir.glob("*.txt") if p.is_file())
+
+    def log(msg: str) -> None:
+        print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+    def rebuild(path: str) -> Set[str]:
+        t0 = time.perf_counter()
+        try:
+            changed = builder.build_file(path)
+        except Exception as e:  # se mantiene la última salida buena
+            log(f"ERROR {path}: {e}")
+            return set()
+        log(f"{path}: {len(changed)} salida(s) en {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return changed
+
+    seen = _mtimes(inputs())
+    for p in seen:
+        rebuild(p)
+    static = _mtimes([template_path, styles])
+
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(out_dir, reloader))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        log(f"Vista previa en http://127.0.0.1:{server.server_address[1]}/")
+    log("Vigilando cambios (Ctrl+C para salir)")
+
+    try:
+        while True:
+            time.sleep(interval)
+            changed: Set[str] = set()
+
+            now = _mtimes(inputs())
+            for p, m in now.items():
+                if seen.get(p) != m:
+                    changed |= rebuild(p)
+            for p in set(seen) - set(now):
+                changed |= builder.forget_file(p)
+            seen = now
+
+            now_static = _mtimes([template_path, styles])
+            if now_static.get(str(template_path)) != static.get(str(template_path)):
+                t0 = time.perf_counter()
+                try:
+                    changed |= builder.rerender_all()
+                    log(f"plantilla: re-render en {(time.perf_counter() - t0) * 1000:.1f} ms")
+                except Exception as e:
+                    log(f"ERROR plantilla: {e}")
+            if now_static.get(str(styles)) != static.get(str(styles)):
+                changed.add("*")
+            static = now_static
+
+            if changed:
+                reloader.notify(changed)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,8 @@
+from pathlib import Path
+import sys
+
+# Como los scripts de bench/: los módulos de src/ se importan por su nombre
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+# Donde el workflow genera el lexer/parser de ANTLR (CVLangLexer.py, ...)
+sys.path.insert(0, str(ROOT / "src" / "antlr_gen"))
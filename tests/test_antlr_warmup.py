@@ -0,0 +1,123 @@
+"""
+DFA de ANTLR guardadas con antlr_warmup.save_dfa(): un proceso que las carga
+parsea igual que uno en frío, y un archivo de otra gramática o runtime (otro
+dfa_stamp) no se carga.
+
+Las DFA son atributos de clase de CVLangLexer/CVLangParser, así que cada
+lado se ejecuta en un proceso nuevo: así "en frío" lo es de verdad.
+"""
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from build_cache import PROJECT_ROOT
+
+pytest.importorskip("antlr4")
+pytest.importorskip("CVLangLexer")
+
+from parsers import antlr_warmup  # noqa: E402
+
+ENTRADA = PROJECT_ROOT / "entradas" / "entrada.txt"
+
+# save <dfa> | load <dfa> | cold -, y después las entradas a parsear
+_HIJO = """
+import json, sys
+from pathlib import Path
+from parsers import antlr_warmup
+from parsers.antlr_engine import parse_file
+from check import check_paths
+
+modo, dfa, entradas = sys.argv[1], Path(sys.argv[2]), sys.argv[3:]
+out = {}
+if modo == "save":
+    antlr_warmup.warm_up()
+    antlr_warmup.save_dfa(dfa)
+elif modo == "load":
+    out["loaded"] = antlr_warmup.load_dfa(dfa)
+out["states"] = antlr_warmup.dfa_states()
+out["resultados"] = []
+for path in entradas:
+    (res,) = check_paths([path], engine="antlr", jobs=1)
+    diags = [repr(d) for d in res.diagnostics]
+    cvs = [o.to_dict() for o in parse_file(path)] if not diags else None
+    out["resultados"].append({"diagnostics": diags, "cvs": cvs})
+print(json.dumps(out, ensure_ascii=False))
+"""
+
+
+def _hijo(modo: str, dfa: Path, *entradas: Path) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    proc = subprocess.run(
+        [sys.executable, "-c", _HIJO, modo, str(dfa), *map(str, entradas)],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        env=env,
+        check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+@pytest.fixture(scope="module")
+def entradas(tmp_path_factory) -> list:
+    carpeta = tmp_path_factory.mktemp("warmup")
+    texto = ENTRADA.read_text(encoding="utf-8")
+    casos = {
+        "valida.txt": texto,
+        "sintactico.txt": texto.replace("horas (99)", "horas (99", 1),
+        "lexico.txt": texto.replace("(Venta)", "(Venta) ~", 1),
+    }
+    for nombre, contenido in casos.items():
+        (carpeta / nombre).write_text(contenido, encoding="utf-8")
+    return [carpeta / nombre for nombre in casos]
+
+
+@pytest.fixture(scope="module")
+def dfa_guardadas(tmp_path_factory) -> tuple:
+    path = tmp_path_factory.mktemp("dfa") / "cvlang.dfa"
+    saved = _hijo("save", path)
+    assert saved["states"] > 0
+    return path, saved["states"]
+
+
+def test_guardar_cargar_y_parsear(dfa_guardadas: tuple, entradas: list):
+    path, states = dfa_guardadas
+    cold = _hijo("cold", Path("-"), *entradas)
+    loaded = _hijo("load", path, *entradas)
+    assert loaded["loaded"] is True
+    # Antes de parsear nada ya están todos los estados del warm-up
+    assert _hijo("load", path)["states"] == states
+    assert loaded["resultados"] == cold["resultados"]
+    valida, sintactico, lexico = loaded["resultados"]
+    assert valida["cvs"] and not valida["diagnostics"]
+    assert sintactico["diagnostics"] and lexico["diagnostics"]
+
+
+def _con_cabecera(path: Path, destino: Path, cabecera: bytes) -> Path:
+    data = path.read_bytes()
+    destino.write_bytes(cabecera + data[data.index(b"\n") :])
+    return destino
+
+
+def test_stamp_de_otra_gramatica_no_se_carga(dfa_guardadas: tuple, tmp_path: Path):
+    path, _ = dfa_guardadas
+    otra = _con_cabecera(path, tmp_path / "otra.dfa", b"CVD1" + b"0" * 64)
+    assert _hijo("load", otra) == {"loaded": False, "states": 0, "resultados": []}
+
+
+def test_archivo_invalido_no_toca_las_dfa(dfa_guardadas: tuple, tmp_path: Path):
+    path, _ = dfa_guardadas
+    antes = antlr_warmup.dfa_states()
+    data = path.read_bytes()
+    truncado = tmp_path / "truncado.dfa"
+    truncado.write_bytes(data[: data.index(b"\n") + 1 + (len(data) - data.index(b"\n")) // 2])
+    basura = _con_cabecera(path, tmp_path / "basura.dfa", b"CVD1" + antlr_warmup.dfa_stamp().encode())
+    basura.write_bytes(basura.read_bytes()[: data.index(b"\n") + 1] + b"no es un pickle")
+    sin_magic = _con_cabecera(path, tmp_path / "sin_magic.dfa", antlr_warmup.dfa_stamp().encode())
+    for p in (truncado, basura, sin_magic, tmp_path / "no_existe.dfa"):
+        assert antlr_warmup.load_dfa(p) is False, p.name
+    assert antlr_warmup.dfa_states() == antes
@@ -0,0 +1,67 @@
+"""
+build_cache.py: la clave de build ve los cambios de la plantilla en el mismo
+proceso, y el manifiesto sigue valiendo desde otro directorio o movido.
+"""
+import json
+import os
+from pathlib import Path
+import shutil
+
+from build_cache import MANIFEST_NAME, BuildManifest, build_key
+
+ENTRADA = Path(__file__).resolve().parent.parent / "entradas" / "entrada.txt"
+
+
+def test_clave_cambia_si_cambia_la_plantilla(tmp_path: Path):
+    tpl = tmp_path / "cv.html"
+    tpl.write_text("<p>{{ datos.nombre }}</p>", encoding="utf-8")
+    antes = build_key(ENTRADA, tpl)
+    assert build_key(ENTRADA, tpl) == antes
+    # Mismo tamaño, otro contenido y otro mtime (como al editarla con --watch)
+    tpl.write_text("<b>{{ datos.nombre }}</b>", encoding="utf-8")
+    st = tpl.stat()
+    os.utime(tpl, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert build_key(ENTRADA, tpl) != antes
+
+
+def _manifiesto_con_salida(site: Path) -> tuple:
+    site.mkdir()
+    out = site / "entrada.html"
+    out.write_text("<p>x</p>", encoding="utf-8")
+    m = BuildManifest.for_dir(site)
+    m.record(ENTRADA, "k", [str(out)])
+    m.save()
+    return m, out
+
+
+def test_salidas_relativas_a_la_carpeta(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _manifiesto_con_salida(Path("site"))
+    data = json.loads((tmp_path / "site" / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert data["entries"][str(ENTRADA.resolve())]["outputs"] == ["entrada.html"]
+
+    # Desde otro directorio de trabajo
+    monkeypatch.chdir(ENTRADA.parent)
+    m = BuildManifest.for_dir(tmp_path / "site")
+    assert m.is_fresh(ENTRADA, "k", [str(tmp_path / "site" / "entrada.html")])
+    assert m.outputs(ENTRADA) == [str(tmp_path / "site" / "entrada.html")]
+    assert not m.is_fresh(ENTRADA, "otra")
+
+
+def test_carpeta_movida(tmp_path: Path):
+    _manifiesto_con_salida(tmp_path / "site")
+    shutil.move(str(tmp_path / "site"), str(tmp_path / "publicado"))
+    m = BuildManifest.for_dir(tmp_path / "publicado")
+    assert m.is_fresh(ENTRADA, "k")
+    (tmp_path / "publicado" / "entrada.html").unlink()
+    assert not m.is_fresh(ENTRADA, "k")
+
+
+def test_manifiesto_de_otra_version_se_ignora(tmp_path: Path):
+    (tmp_path / MANIFEST_NAME).write_text(
+        json.dumps({"version": 1, "entries": {str(ENTRADA.resolve()): {"key": "k", "outputs": []}}}),
+        encoding="utf-8",
+    )
+    assert not BuildManifest.for_dir(tmp_path).is_fresh(ENTRADA, "k")
+    (tmp_path / MANIFEST_NAME).write_text("[]", encoding="utf-8")
+    assert not BuildManifest.for_dir(tmp_path).is_fresh(ENTRADA, "k")
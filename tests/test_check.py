@@ -0,0 +1,74 @@
+"""
+main.py --check: los dos engines informan de todos los errores de un archivo
+(no solo del primero) con el mismo tipo, posición y mensaje.
+"""
+from pathlib import Path
+
+import pytest
+
+from build_cache import PROJECT_ROOT
+from check import LEXICO, SINTACTICO, check_paths
+
+ENTRADA = (PROJECT_ROOT / "entradas" / "entrada.txt").read_text(encoding="utf-8")
+
+
+def _cambia(text: str, *pares: str) -> str:
+    for viejo, nuevo in zip(pares[::2], pares[1::2]):
+        assert viejo in text
+        text = text.replace(viejo, nuevo, 1)
+    return text
+
+
+CASOS = {
+    # Varios errores en el mismo cv: el checker sigue tras el primero
+    "extraneos": _cambia(ENTRADA, "fecha (10/01/2026)", "fecha fecha (10/01/2026)", "puesto (", "puesto puesto ("),
+    "faltan_parentesis": _cambia(ENTRADA, "telefono (699999999)", "telefono 699999999)", "horas (99)", "horas (99"),
+    "llave_y_campo_vacio": _cambia(ENTRADA, "    contacto {", "    contacto {{", "horas (99)", "horas ()"),
+    "lexicos": _cambia(ENTRADA, "(Venta)", "(Venta) ~", "(alto)", "(alto) ~"),
+    "lexico_y_comentario": _cambia(ENTRADA, "horas (99)", "horas (9 9)") + "\n/* sin cerrar",
+    # Un error en cada cv del archivo
+    "dos_cvs": _cambia(ENTRADA, "horas (99)", "horas (99")
+    + "\n"
+    + _cambia(ENTRADA, 'cv "Antonio Lobato"', 'cv "Otro"', "titulo (Vendedor de coches)", "titulo (Vendedor de coches) titulo"),
+}
+
+
+@pytest.fixture(scope="module")
+def entradas(tmp_path_factory) -> dict:
+    carpeta = tmp_path_factory.mktemp("check")
+    paths = {}
+    for nombre, texto in CASOS.items():
+        paths[nombre] = carpeta / f"{nombre}.txt"
+        paths[nombre].write_text(texto, encoding="utf-8")
+    return paths
+
+
+def _diagnostics(path: Path, engine: str):
+    (res,) = check_paths([str(path)], engine=engine, jobs=1)
+    assert res.error is None
+    return res.diagnostics
+
+
+@pytest.mark.parametrize("nombre", sorted(CASOS))
+def test_rd_informa_de_todos_los_errores(entradas: dict, nombre: str):
+    diags = _diagnostics(entradas[nombre], "rd")
+    assert len(diags) >= 2
+    assert [(d.line, d.column) for d in diags] == sorted((d.line, d.column) for d in diags)
+
+
+@pytest.mark.parametrize("nombre", sorted(CASOS))
+def test_rd_y_antlr_coinciden(entradas: dict, nombre: str):
+    pytest.importorskip("antlr4")
+    pytest.importorskip("CVLangLexer")
+    assert _diagnostics(entradas[nombre], "rd") == _diagnostics(entradas[nombre], "antlr")
+
+
+def test_tipos_de_error(entradas: dict):
+    assert {d.kind for d in _diagnostics(entradas["lexicos"], "rd")} == {LEXICO}
+    assert {d.kind for d in _diagnostics(entradas["extraneos"], "rd")} == {SINTACTICO}
+
+
+def test_entrada_valida(tmp_path: Path):
+    path = tmp_path / "ok.txt"
+    path.write_text(ENTRADA, encoding="utf-8")
+    assert _diagnostics(path, "rd") == []
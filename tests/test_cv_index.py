@@ -0,0 +1,146 @@
+"""
+cv_index.py: construir el índice, actualizarlo según mtime/tamaño y
+contenido, precedencia de NOT/AND/OR y consultas mal formadas.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from build_cache import PROJECT_ROOT
+from cv_index import CVIndex, query
+
+ENTRADA = (PROJECT_ROOT / "entradas" / "entrada.txt").read_text(encoding="utf-8")
+
+
+def _cv(nombre: str, habilidad: str, nivel: str, tecnologia: str) -> str:
+    text = ENTRADA
+    for viejo, nuevo in (
+        ('cv "Antonio Lobato"', f'cv "{nombre}"'),
+        ("habilidad (Vender coches)", f"habilidad ({habilidad})"),
+        ("nvhab (alto)", f"nvhab ({nivel})"),
+        ("tecnologias (Internet)", f"tecnologias ({tecnologia})"),
+    ):
+        assert viejo in text
+        text = text.replace(viejo, nuevo, 1)
+    return text
+
+
+CVS = {
+    "ana.txt": _cv("Ana", "Vender coches", "alto", "Python"),
+    "bea.txt": _cv("Bea", "Docker", "medio", "Internet"),
+    "carlos.txt": _cv("Carlos", "Docker", "alto", "Pythón"),
+}
+
+
+@pytest.fixture
+def corpus(tmp_path: Path) -> Path:
+    carpeta = tmp_path / "entradas"
+    carpeta.mkdir()
+    for nombre, texto in CVS.items():
+        (carpeta / nombre).write_text(texto, encoding="utf-8")
+    return carpeta
+
+
+def _build(corpus: Path, index_path: Path, **kw):
+    idx = CVIndex(index_path)
+    stats = idx.update(sorted(corpus.glob("*.txt")), engine="rd", jobs=1, **kw)
+    idx.save()
+    return idx, stats
+
+
+def _ids(idx: CVIndex, text: str) -> list:
+    return [cv_id for _, cv_id in query(idx, text)]
+
+
+def test_construir_y_consultar(corpus: Path, tmp_path: Path):
+    idx, stats = _build(corpus, tmp_path / "cvindex.bin")
+    assert stats == (3, 0, 0, [])
+    idx = CVIndex.load(tmp_path / "cvindex.bin")
+    assert _ids(idx, "habilidad:docker") == ["Bea", "Carlos"]
+    assert _ids(idx, "habilidad:docker@alto") == ["Carlos"]
+    # Sin mayúsculas ni tildes, y valores con espacios entre comillas
+    assert _ids(idx, "tecnologia:PYTHON") == ["Ana", "Carlos"]
+    assert _ids(idx, 'habilidad:"Vender  Coches"@alto') == ["Ana"]
+    assert idx.terms("tecnologia") == [("python", 2), ("internet", 1)]
+
+
+def test_actualizacion_incremental(corpus: Path, tmp_path: Path):
+    index_path = tmp_path / "cvindex.bin"
+    _build(corpus, index_path)
+    # Nada cambió: no se reparsea nada
+    assert _build(corpus, index_path)[1] == (0, 3, 0, [])
+
+    # Otro mtime, mismo contenido: tampoco (solo se renueva el sello)
+    ana = corpus / "ana.txt"
+    st = ana.stat()
+    os.utime(ana, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert _build(corpus, index_path)[1] == (0, 3, 0, [])
+
+    # Otro contenido: solo ese archivo
+    ana.write_text(_cv("Ana", "Docker", "bajo", "Python"), encoding="utf-8")
+    idx, stats = _build(corpus, index_path)
+    assert stats == (1, 2, 0, [])
+    assert _ids(idx, "habilidad:docker") == ["Ana", "Bea", "Carlos"]
+
+    # Un archivo que ya no está se quita; uno roto queda con su error
+    (corpus / "bea.txt").unlink()
+    (corpus / "roto.txt").write_text('cv "x" {', encoding="utf-8")
+    idx, (reparsed, unchanged, removed, errors) = _build(corpus, index_path)
+    assert (reparsed, unchanged, removed) == (1, 2, 1)
+    assert [Path(p).name for p, _ in errors] == ["roto.txt"]
+    assert _ids(CVIndex.load(index_path), "habilidad:docker") == ["Ana", "Carlos"]
+
+    # force (o cambiar de engine) reparsea todo
+    assert _build(corpus, index_path, force=True)[1][:3] == (3, 0, 0)
+
+
+@pytest.mark.parametrize(
+    "consulta, esperado",
+    [
+        # AND (explícito o implícito) se aplica antes que OR
+        ("habilidad:docker OR tecnologia:python AND cv:ana", ["Ana", "Bea", "Carlos"]),
+        ("habilidad:docker OR tecnologia:python cv:bea", ["Bea", "Carlos"]),
+        ("(habilidad:docker OR tecnologia:python) AND cv:ana", ["Ana"]),
+        # NOT solo afecta al término (o paréntesis) siguiente
+        ("NOT habilidad:docker tecnologia:python", ["Ana"]),
+        ("NOT habilidad:docker OR cv:bea", ["Ana", "Bea"]),
+        ("NOT (habilidad:docker OR cv:ana)", []),
+        ("NOT NOT cv:ana", ["Ana"]),
+        ("tecnologia:python AND NOT nvhab:alto", []),
+    ],
+)
+def test_precedencia(corpus: Path, tmp_path: Path, consulta: str, esperado: list):
+    idx, _ = _build(corpus, tmp_path / "cvindex.bin")
+    assert _ids(idx, consulta) == esperado
+
+
+@pytest.mark.parametrize(
+    "consulta",
+    [
+        "",
+        "   ",
+        "habilidad:",
+        'idioma:""@c1',
+        "idioma:ingles@",
+        "docker",
+        "campo:docker",
+        "(habilidad:docker",
+        "habilidad:docker)",
+        "AND habilidad:docker",
+        "habilidad:docker OR",
+        "NOT",
+        "()",
+    ],
+)
+def test_consulta_mal_formada(corpus: Path, tmp_path: Path, consulta: str):
+    idx, _ = _build(corpus, tmp_path / "cvindex.bin")
+    with pytest.raises(ValueError):
+        query(idx, consulta)
+
+
+def test_archivo_que_no_es_un_indice(tmp_path: Path):
+    path = tmp_path / "cvindex.bin"
+    path.write_bytes(b"XXXX" + bytes(16))
+    with pytest.raises(ValueError):
+        CVIndex.load(path)
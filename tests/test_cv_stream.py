@@ -0,0 +1,89 @@
+"""
+cv_stream.py: troceo en bloques de primer nivel (llaves en cadenas y
+comentarios) y números de línea del archivo original con un bloque gvar.
+"""
+import io
+import re
+
+import pytest
+
+pytest.importorskip("antlr4")
+pytest.importorskip("CVLangLexer")
+
+from antlr4 import InputStream  # noqa: E402
+
+from build_cache import PROJECT_ROOT  # noqa: E402
+from check import check_paths  # noqa: E402
+from CVLangLexer import CVLangLexer  # noqa: E402
+from cv_stream import CVStreamParser, iter_cv_sources, split_top_level_blocks  # noqa: E402
+
+ENTRADA = (PROJECT_ROOT / "entradas" / "entrada.txt").read_text(encoding="utf-8")
+
+
+def _bloques(text: str) -> list:
+    return list(split_top_level_blocks(io.StringIO(text)))
+
+
+def test_llaves_en_cadenas_y_comentarios():
+    text = (
+        'cv a { x ("}") /* } { */ }\n'
+        "/* comentario\n"
+        "   con } y { en varias líneas */\n"
+        'cv b { y ("{{") }\n'
+    )
+    assert _bloques(text) == [
+        (1, 'cv a { x ("}") /* } { */ }'),
+        (1, '\n/* comentario\n   con } y { en varias líneas */\ncv b { y ("{{") }'),
+    ]
+
+
+def test_dos_bloques_en_una_linea_y_anidados():
+    assert _bloques("cv a { b { } } cv c { }\n\n") == [(1, "cv a { b { } }"), (1, " cv c { }")]
+
+
+def test_lo_que_queda_sin_cerrar_se_devuelve():
+    assert _bloques('cv a { }\ncv b { "sin cerrar }\n') == [(1, "cv a { }"), (1, '\ncv b { "sin cerrar }\n')]
+    assert _bloques("cv a { }\n/* sin cerrar {\n") == [(1, "cv a { }"), (1, "\n/* sin cerrar {\n")]
+    # Un comentario cerrado al final no es un bloque
+    assert _bloques("cv a { }\n/* fin */\n") == [(1, "cv a { }")]
+
+
+GVAR = '/* variables */\ngvar {\n  "empresa" = compramos tu coche;\n}\n'
+
+
+def _archivo() -> str:
+    segundo = ENTRADA.replace('cv "Antonio Lobato"', 'cv "Otro"', 1).replace("horas (99)", "horas (99", 1)
+    return GVAR + ENTRADA + "\n" + segundo
+
+
+def _linea(text: str, fragmento: str, desde: int = 0) -> int:
+    return text.count("\n", 0, text.index(fragmento, desde)) + 1
+
+
+def test_gvar_delante_de_cada_cv_con_las_lineas_del_archivo():
+    text = _archivo()
+    fuentes = list(iter_cv_sources(io.StringIO(text)))
+    assert len(fuentes) == 2
+    for (line, source), nombre in zip(fuentes, ('cv "Antonio Lobato"', 'cv "Otro"')):
+        assert source.startswith(GVAR.rstrip("\n"))
+        # Con el lexer empezando en `line`, el cv cae en su línea del archivo
+        lexer = CVLangLexer(InputStream(source))
+        lexer.line = line
+        cv = next(t for t in lexer.getAllTokens() if t.text == "cv")
+        assert cv.line == _linea(text, nombre)
+
+
+def test_error_en_la_linea_del_archivo(tmp_path, capsys):
+    text = _archivo()
+    path = tmp_path / "dos.txt"
+    path.write_text(text, encoding="utf-8")
+    cvs = CVStreamParser().iter_file(io.StringIO(text))
+    assert next(cvs).cv_id == "Antonio Lobato"
+    with pytest.raises(ValueError):
+        next(cvs)
+    lineas = {int(n) for n in re.findall(r"line (\d+):", capsys.readouterr().err)}
+    # La misma línea que con el archivo entero (main.py --check)
+    (res,) = check_paths([str(path)], engine="antlr", jobs=1)
+    assert lineas == {d.line for d in res.diagnostics}
+    # Falta el ')' de horas: el error sale en el token siguiente
+    assert lineas == {_linea(text, "organizacion", text.index('cv "Otro"'))}
@@ -0,0 +1,73 @@
+"""
+Engines antlr y rd: mismos CVObjects (los casos de bench/parity_rd.py) y
+claves de build distintas, así que cambiar de engine reconstruye.
+"""
+from pathlib import Path
+import shutil
+import sys
+
+import pytest
+
+from batch import build_dir
+from build_cache import PROJECT_ROOT, build_key
+from parse_cache import parse_key
+
+ENTRADA = PROJECT_ROOT / "entradas" / "entrada.txt"
+PLANTILLA = PROJECT_ROOT / "templates" / "plantilla1.html"
+
+
+def _parity_cases():
+    # Sin el runtime de ANTLR o sin el lexer/parser generados no hay con qué comparar
+    pytest.importorskip("antlr4")
+    pytest.importorskip("CVLangLexer")
+    sys.path.insert(0, str(PROJECT_ROOT / "bench"))
+    import parity_rd
+
+    # Menos que el script (30 corpus, 300 mutaciones) para que la suite sea rápida
+    return parity_rd, parity_rd.build_cases(seeds=10, mutations=100)
+
+
+def test_rd_y_antlr_coinciden():
+    parity_rd, cases = _parity_cases()
+    failures = [msg for name, text in cases if (msg := parity_rd.compare(name, text)) is not None]
+    assert not failures, "\n".join(failures)
+
+
+def test_claves_distintas_por_engine():
+    keys = {e: build_key(ENTRADA, PLANTILLA, engine=e) for e in ("antlr", "rd", "flexcup")}
+    assert len(set(keys.values())) == 3
+    assert parse_key(ENTRADA, "antlr") != parse_key(ENTRADA, "rd")
+
+
+def test_cambiar_de_engine_reconstruye(tmp_path: Path):
+    pytest.importorskip("CVLangLexer")
+    inputs, out = tmp_path / "entradas", tmp_path / "site"
+    inputs.mkdir()
+    shutil.copy(ENTRADA, inputs / ENTRADA.name)
+
+    def build(engine: str):
+        (res,) = build_dir(inputs, str(PLANTILLA), out, jobs=1, engine=engine)
+        assert res.ok, res.error
+        return res
+
+    assert not build("antlr").cached
+    assert build("antlr").cached
+    # Misma entrada y plantilla, otro engine: la salida se vuelve a generar
+    html = (out / "entrada.html").read_bytes()
+    assert not build("rd").cached
+    assert build("rd").cached
+    assert (out / "entrada.html").read_bytes() == html
+
+
+def test_antlr_con_colector_de_errores(capsys):
+    pytest.importorskip("CVLangLexer")
+    from parsers.antlr_engine import ErrorCollector, parse_file, parse_source
+
+    texto = ENTRADA.read_text(encoding="utf-8")
+    errors = ErrorCollector()
+    with pytest.raises(ValueError, match=r"^line 26:6 missing '\)'"):
+        parse_source(texto.replace("horas (99)", "horas (99", 1), errors)
+    assert [line for line, _, _ in errors.errors] == [26]
+    # Los errores van al colector, no a stderr; y el parser compartido sigue sirviendo
+    assert capsys.readouterr().err == ""
+    assert [o.cv_id for o in parse_file(ENTRADA)] == [o.cv_id for o in parse_source(texto)] == ["Antonio Lobato"]
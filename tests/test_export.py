@@ -0,0 +1,107 @@
+"""
+Esquema canónico de cv_export.py: el mismo registro venga de antlr, de rd o
+del dict raíz de CUP, y el encuadre de iter_lines (json y ndjson).
+"""
+import copy
+import json
+
+import pytest
+
+from build_cache import PROJECT_ROOT
+from cv_export import FIELDS, SCHEMA, SCHEMA_VERSION, canonical, iter_lines
+from parsers import rd_engine
+
+ENTRADA = PROJECT_ROOT / "entradas" / "entrada.txt"
+_LISTS = [s for s in FIELDS if s != "datos"]
+
+
+def _rd(path=ENTRADA):
+    return rd_engine.parse_file(str(path))
+
+
+def _como_cup(objs) -> dict:
+    # Lo que imprime el parser de CUP: to_dict(), horas como texto y "" en lo que falta
+    root = copy.deepcopy(objs.to_dict())
+    for xp in root["experiencia"]["experiencia"]:
+        xp["horas"] = "" if xp["horas"] is None else str(xp["horas"])
+    for f in root["formacion"]["formacion"]:
+        f["descripcion"] = f["descripcion"] or ""
+    return root
+
+
+def _sin(record: dict, *claves: str) -> dict:
+    return {k: v for k, v in record.items() if k not in claves}
+
+
+def test_registro_tiene_todas_las_claves():
+    (objs,) = _rd()
+    r = canonical(objs, "rd", "entrada.txt")
+    assert (r["schema"], r["version"], r["engine"], r["source"], r["index"]) == (
+        SCHEMA, SCHEMA_VERSION, "rd", "entrada.txt", 0
+    )
+    assert r["cv_id"] == objs.cv_id
+    assert tuple(r["datos"]) == FIELDS["datos"]
+    for section in _LISTS:
+        assert isinstance(r[section], list)
+        assert all(tuple(item) == FIELDS[section] for item in r[section])
+    # Lo opcional que falta es null, nunca ""
+    assert "" not in [v for s in _LISTS for item in r[s] for v in item.values()]
+
+
+def test_antlr_y_rd_dan_el_mismo_registro():
+    pytest.importorskip("antlr4")
+    pytest.importorskip("CVLangLexer")
+    from parsers.antlr_engine import parse_file
+
+    (rd,) = _rd()
+    (antlr,) = parse_file(ENTRADA)
+    assert _sin(canonical(antlr, "antlr"), "engine") == _sin(canonical(rd, "rd"), "engine")
+
+
+def test_dict_de_cup_da_el_mismo_registro():
+    (objs,) = _rd()
+    cup = canonical(_como_cup(objs), "flexcup")
+    assert cup["engine"] == "flexcup"
+    # El JSON de CUP no lleva cv_id
+    assert cup["cv_id"] is None
+    assert _sin(cup, "engine", "cv_id") == _sin(canonical(objs, "rd"), "engine", "cv_id")
+
+
+def test_dict_de_cup_sin_secciones():
+    r = canonical({"datos": {"nombre": "Ana", "bio": ""}}, "flexcup")
+    assert r["datos"]["nombre"] == "Ana" and r["datos"]["bio"] is None
+    assert all(r[s] == [] for s in _LISTS)
+
+
+def _records(n: int) -> list:
+    (objs,) = _rd()
+    return [canonical(objs, "rd", "entrada.txt", i) for i in range(n)]
+
+
+@pytest.mark.parametrize("n", [0, 1, 3])
+def test_ndjson_una_linea_por_cv(n: int):
+    text = "".join(iter_lines(_records(n), "ndjson"))
+    assert text.endswith("\n") or n == 0
+    lines = text.splitlines()
+    assert [json.loads(line) for line in lines] == _records(n)
+    # UTF-8 sin escapar y sin saltos dentro de un registro
+    assert all("\\u00" not in line for line in lines)
+
+
+@pytest.mark.parametrize("n", [0, 1, 3])
+def test_json_un_documento(n: int):
+    doc = json.loads("".join(iter_lines(_records(n), "json")))
+    assert doc == {"schema": SCHEMA, "version": SCHEMA_VERSION, "cvs": _records(n)}
+
+
+def test_iter_lines_no_consume_todo_de_golpe():
+    consumidos = []
+
+    def records():
+        for r in _records(3):
+            consumidos.append(r["index"])
+            yield r
+
+    chunks = iter_lines(records(), "ndjson")
+    next(chunks)
+    assert consumidos == [0]
@@ -0,0 +1,102 @@
+"""
+Ida y vuelta de una entrada por un worker de FlexCupPool, y el engine flexcup
+de batch.py y serve.py (hace falta Java y el parser de CUP compilado).
+Con CV_REQUIRE_FLEXCUP=1 (workflow tests.yml) no se saltan: fallan si falta algo.
+"""
+import json
+import os
+from pathlib import Path
+import shutil
+
+import pytest
+
+from parsers.flexcup_engine import parse_with_flexcup
+from parsers.flexcup_pool import PROJECT_ROOT, FlexCupError, FlexCupPool, shared_pool
+
+ENTRADA = PROJECT_ROOT / "entradas" / "entrada.txt"
+PLANTILLA = PROJECT_ROOT / "templates" / "plantilla1.html"
+
+_SIN_CUP = (
+    shutil.which("java") is None
+    or not (PROJECT_ROOT / "gramatica" / "flexcup" / "parser.class").exists()
+    or not (PROJECT_ROOT / "tools" / "java-cup.jar").exists()
+)
+pytestmark = pytest.mark.skipif(
+    _SIN_CUP and not os.environ.get("CV_REQUIRE_FLEXCUP"),
+    reason="sin Java o sin el parser de CUP compilado (paso 'Build with Flex/CUP' del workflow)",
+)
+
+
+def test_worker_ida_y_vuelta():
+    with FlexCupPool(size=1) as pool:
+        por_ruta = pool.parse_path(ENTRADA)
+        por_fuente = pool.parse_source(ENTRADA.read_text(encoding="utf-8"))
+        # Mismo worker, segunda petición: el estado del parser se reinicia
+        assert pool.parse_path(ENTRADA) == por_ruta
+
+    assert por_ruta == por_fuente
+    assert por_ruta["datos"]["nombre"]
+    # La misma clase y classpath que sin pool (una JVM por entrada)
+    assert parse_with_flexcup(ENTRADA, PROJECT_ROOT) == por_ruta
+
+
+def test_worker_se_reemplaza_tras_error_lexico():
+    # El lexer de JFlex hace System.exit ante un carácter no reconocido
+    with FlexCupPool(size=1) as pool:
+        with pytest.raises(FlexCupError):
+            pool.parse_source("cv \"x\" { ~ }")
+        assert pool.parse_path(ENTRADA)["datos"]["nombre"]
+
+
+def test_build_dir_con_flexcup(tmp_path: Path):
+    from batch import build_dir
+
+    inputs, out = tmp_path / "entradas", tmp_path / "site"
+    inputs.mkdir()
+    shutil.copy(ENTRADA, inputs / ENTRADA.name)
+    nombre = shared_pool().parse_path(ENTRADA)["datos"]["nombre"]
+
+    (res,) = build_dir(inputs, str(PLANTILLA), out, jobs=1, engine="flexcup")
+    assert res.ok, res.error
+    assert res.outputs == [str(out / "entrada.html")]
+    assert nombre in (out / "entrada.html").read_text(encoding="utf-8")
+    (res,) = build_dir(inputs, str(PLANTILLA), out, jobs=1, engine="flexcup")
+    assert res.cached
+
+
+def test_serve_con_flexcup():
+    import serve
+
+    serve._init_worker("flexcup", str(PLANTILLA.parent))
+    source = ENTRADA.read_text(encoding="utf-8")
+    esperado = shared_pool().parse_source(source)
+
+    status, _, body, _ = serve._job("parse", source, None, None)
+    assert status == 200
+    assert json.loads(body) == {"cvs": [esperado]}
+    status, ctype, body, _ = serve._job("render", source, PLANTILLA.name, None)
+    assert (status, ctype) == (200, "text/html; charset=utf-8")
+    assert esperado["datos"]["nombre"] in body.decode("utf-8")
+    status, _, _, _ = serve._job("render", 'cv "x" { ~ }', PLANTILLA.name, None)
+    assert status == 422
+
+
+def test_emit_con_flexcup(tmp_path: Path):
+    import subprocess
+    import sys
+
+    from cv_export import canonical
+    from parsers import rd_engine
+
+    out = tmp_path / "cvs.ndjson"
+    subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / "src" / "main.py"), "--input", str(ENTRADA),
+         "--engine", "flexcup", "--emit", "ndjson", "--out", str(out)],
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+    )
+    (record,) = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert record["engine"] == "flexcup"
+    # Mismo registro que rd salvo engine y cv_id (el JSON de CUP no lo lleva)
+    rd = canonical(rd_engine.parse_file(str(ENTRADA))[0], "flexcup", str(ENTRADA))
+    assert {**record, "cv_id": None} == {**rd, "cv_id": None}
@@ -0,0 +1,90 @@
+"""
+HtmlMinifier: la salida no depende de cómo venga troceada la entrada, y los
+espacios y el CSS quedan como deben.
+"""
+import random
+
+import pytest
+
+from html_output import HtmlMinifier, minify_css, minify_html
+
+DOC = """<!DOCTYPE html>
+<html>
+  <head>
+    <title> CV  de Ana </title>
+    <style>
+      /* tema */
+      body { color :red ; margin : 0 }
+      a :hover , p > b { content : "a ; } b" }
+    </style>
+    <!--[if IE]><link rel="stylesheet" href="ie.css"><![endif]-->
+  </head>
+  <body>
+    <!-- cabecera -->
+    <h1 title="a > b">Ana   <em>García</em> <!-- apellido --> López</h1>
+    <p>uno <!-- x --> dos <span>tres</span> <!--y--> <b>cuatro</b></p>
+    <pre>  texto
+   con   espacios </pre>
+    <script>if (a < b && c > d) { x = "<p>"; }</script>
+    <textarea>  sin <!-- tocar -->  </textarea>
+  </body>
+</html>
+"""
+
+
+def _una_vez(text: str) -> str:
+    m = HtmlMinifier()
+    return m.feed(text) + m.close()
+
+
+def _en_trozos(text: str, cortes) -> str:
+    m = HtmlMinifier()
+    out, prev = [], 0
+    for c in list(cortes) + [len(text)]:
+        out.append(m.feed(text[prev:c]))
+        prev = c
+    return "".join(out) + m.close()
+
+
+def test_salida_esperada():
+    html = _una_vez(DOC)
+    assert "<title>CV de Ana</title>" in html
+    assert "<h1 title=\"a > b\">Ana <em>García</em> López</h1>" in html
+    assert "<p>uno dos <span>tres</span> <b>cuatro</b></p>" in html
+    assert "<pre>  texto\n   con   espacios </pre>" in html
+    assert '<script>if (a < b && c > d) { x = "<p>"; }</script>' in html
+    assert "<textarea>  sin <!-- tocar -->  </textarea>" in html
+    assert "<!--[if IE]>" in html and "cabecera" not in html
+    assert "  " not in html.replace("<pre>  texto\n   con   espacios </pre>", "").replace(
+        "<textarea>  sin <!-- tocar -->  </textarea>", ""
+    )
+
+
+def test_un_corte_en_cualquier_sitio():
+    esperado = _una_vez(DOC)
+    for corte in range(len(DOC) + 1):
+        assert _en_trozos(DOC, [corte]) == esperado, corte
+
+
+def test_muchos_trozos():
+    rng = random.Random(0)
+    esperado = _una_vez(DOC)
+    for _ in range(200):
+        cortes = sorted(rng.sample(range(1, len(DOC)), rng.randint(2, 40)))
+        assert _en_trozos(DOC, cortes) == esperado
+    # Un carácter por trozo, como los de Template.generate() en el peor caso
+    assert "".join(minify_html(DOC, batch=1)) == esperado
+
+
+@pytest.mark.parametrize(
+    "css, esperado",
+    [
+        ("a { color :red ; margin : 0 ; }", "a{color:red;margin:0}"),
+        ("div :first-child { x : 1 }", "div :first-child{x:1}"),
+        ("a :hover,b{--v :2}", "a :hover,b{--v:2}"),
+        ('p{content : " a : b "}', 'p{content:" a : b "}'),
+        ("/* x */ p { }", "p{}"),
+    ],
+)
+def test_minify_css(css: str, esperado: str):
+    assert minify_css(css) == esperado
@@ -0,0 +1,84 @@
+"""ParseCache: formato en disco (CVP1 + pickle), tamaño total, LRU y claves."""
+import hashlib
+import os
+from pathlib import Path
+
+from build_cache import build_version, engine_version, file_hash
+from parse_cache import ParseCache, parse_key
+
+ENTRADA = Path(__file__).resolve().parent.parent / "entradas" / "entrada.txt"
+VALOR = {"datos": {"nombre": "x" * 1000}}
+
+
+def _tam(cache: ParseCache, key: str) -> int:
+    return cache._path(key).stat().st_size
+
+
+def _envejece(cache: ParseCache, key: str, segundos: int) -> None:
+    st = cache._path(key).stat()
+    os.utime(cache._path(key), ns=(st.st_atime_ns, st.st_mtime_ns - segundos * 10**9))
+
+
+def test_ida_y_vuelta_con_magic(tmp_path: Path):
+    cache = ParseCache(tmp_path)
+    cache.put("ab12", VALOR)
+    assert cache._path("ab12").read_bytes().startswith(b"CVP1")
+    assert cache.get("ab12") == VALOR
+    assert cache.get("cd34") is None
+
+
+def test_archivo_sin_magic_o_corrupto_se_borra(tmp_path: Path):
+    cache = ParseCache(tmp_path)
+    for key, data in (("aa00", b"XXXX" + b"basura"), ("bb00", b"CVP1" + b"no es pickle")):
+        cache.put(key, VALOR)
+        cache._path(key).write_bytes(data)
+        assert cache.get(key) is None
+        assert not cache._path(key).exists()
+
+
+def test_sobrescribir_no_suma_dos_veces(tmp_path: Path):
+    cache = ParseCache(tmp_path)
+    cache.put("aa00", VALOR)
+    size = _tam(cache, "aa00")
+    for _ in range(10):
+        cache.put("aa00", VALOR)
+    cache.put("bb00", VALOR)
+    assert cache._total == cache._scan_size() == 2 * size
+    # Una entrada corrupta que se borra deja de contar
+    cache._path("bb00").write_bytes(b"CVP1" + b"x" * (size - 4))
+    assert cache.get("bb00") is None
+    assert cache._total == cache._scan_size() == size
+
+
+def test_lru_borra_los_menos_usados(tmp_path: Path):
+    cache = ParseCache(tmp_path)
+    cache.put("aa00", VALOR)
+    size = _tam(cache, "aa00")
+    cache.max_bytes = 3 * size + size // 2  # caben tres
+    cache.put("bb00", VALOR)
+    cache.put("cc00", VALOR)
+    for i, key in enumerate(("aa00", "bb00", "cc00")):
+        _envejece(cache, key, 100 - i)
+    # Un acierto la hace la más reciente
+    assert cache.get("aa00") == VALOR
+    cache.put("dd00", VALOR)
+    # Al pasar del máximo se baja al 90%: se va bb00 (la más vieja) y solo ella
+    assert [k for k in ("aa00", "bb00", "cc00", "dd00") if cache._path(k).exists()] == ["aa00", "cc00", "dd00"]
+    assert cache._total == 3 * size
+
+
+def test_entrada_mayor_que_el_maximo_no_se_guarda(tmp_path: Path):
+    cache = ParseCache(tmp_path, max_bytes=100)
+    cache.put("aa00", VALOR)
+    assert not cache._path("aa00").exists()
+
+
+def test_clave(tmp_path: Path):
+    h = hashlib.sha256()
+    for part in (build_version(), engine_version("rd"), file_hash(ENTRADA)):
+        h.update(part.encode())
+    assert parse_key(ENTRADA, "rd") == h.hexdigest()
+    assert len({parse_key(ENTRADA, e) for e in ("antlr", "rd", "flexcup")}) == 3
+    otra = tmp_path / "otra.txt"
+    otra.write_text(ENTRADA.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    assert parse_key(otra, "rd") != parse_key(ENTRADA, "rd")
@@ -0,0 +1,68 @@
+"""Caché de secciones de Renderer.cache_fragments(): qué bloques se cachean y con qué clave."""
+from pathlib import Path
+
+from render_engine import Renderer, fragment_plan, precompile_template
+
+BLOQUE = "{% block formacion %}{{ formacion }}{% endblock %}"
+
+
+def _renderer() -> Renderer:
+    r = Renderer(cache_dir=None, precompiled_dir=None)
+    r.cache_fragments()
+    return r
+
+
+def _plantilla(carpeta: Path, texto: str, nombre: str = "cv.html") -> Path:
+    carpeta.mkdir(parents=True, exist_ok=True)
+    path = carpeta / nombre
+    path.write_text(texto, encoding="utf-8")
+    return path
+
+
+def test_bloque_de_una_seccion_se_cachea(tmp_path: Path):
+    tpl = _plantilla(tmp_path, "<p>{{ nombre }}</p>" + BLOQUE)
+    r = _renderer()
+    assert r.render(tpl, nombre="a", formacion="x") == "<p>a</p>x"
+    assert r.render(tpl, nombre="b", formacion="x") == "<p>b</p>x"
+    assert (r.fragments.misses, r.fragments.hits) == (1, 1)
+    assert r.render(tpl, nombre="b", formacion="y") == "<p>b</p>y"
+
+
+def test_bloque_con_include_no_se_cachea(tmp_path: Path):
+    # inc.html lee `datos`, que no sale en las variables del bloque
+    _plantilla(tmp_path, " {{ datos }}", "inc.html")
+    tpl = _plantilla(tmp_path, '{% block formacion %}{{ formacion }}{% include "inc.html" %}{% endblock %}')
+    r = _renderer()
+    assert r.render(tpl, formacion="x", datos="ANA") == "x ANA"
+    assert r.render(tpl, formacion="x", datos="LUIS") == "x LUIS"
+
+
+def test_bloques_con_import_no_entran_en_el_plan(tmp_path: Path):
+    _plantilla(tmp_path, "{% macro m() %}{{ datos }}{% endmacro %}", "macros.html")
+    source = (
+        '{% block formacion %}{% import "macros.html" as mm %}{{ formacion }}{% endblock %}'
+        '{% block idiomas %}{% from "macros.html" import m %}{{ idiomas }}{% endblock %}'
+        "{% block habilidades %}{{ habilidades }}{% endblock %}"
+    )
+    env = Renderer(cache_dir=None, precompiled_dir=None).environment(tmp_path)
+    assert set(fragment_plan(env, source)) == {"habilidades"}
+
+
+def test_plantillas_distintas_no_comparten_fragmentos(tmp_path: Path):
+    # Mismo bloque y mismos datos en dos plantillas: cada una tiene sus claves
+    a = _plantilla(tmp_path / "a", BLOQUE)
+    b = _plantilla(tmp_path / "b", BLOQUE)
+    r = _renderer()
+    r.render(a, formacion="x")
+    r.render(b, formacion="x")
+    assert (r.fragments.misses, r.fragments.hits) == (2, 0)
+
+
+def test_plan_precompilado_sin_include(tmp_path: Path):
+    _plantilla(tmp_path, " {{ datos }}", "inc.html")
+    tpl = _plantilla(tmp_path, '{% block formacion %}{{ formacion }}{% include "inc.html" %}{% endblock %}')
+    precompile_template(tpl, tmp_path / "build")
+    r = Renderer(cache_dir=None, precompiled_dir=tmp_path / "build")
+    r.cache_fragments()
+    assert r.render(tpl, formacion="x", datos="ANA") == "x ANA"
+    assert r.render(tpl, formacion="x", datos="LUIS") == "x LUIS"